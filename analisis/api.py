@@ -0,0 +1,348 @@
+"""
+API JSON asíncrona para integraciones (LIMS).
+
+- POST /api/v1/jobs/            envía una o varias secuencias y encola sus análisis
+                                 (search_mode=AA: búsqueda traducida en ensamblados;
+                                 backend=kmer|aho|banded|pairwise2: motor de detección;
+                                 priority=clinical: delante de la cola, requiere el
+                                 permiso analisis.clinical_priority)
+- GET  /api/v1/jobs/            lista los jobs recientes del usuario
+- GET  /api/v1/jobs/<id>/       estado del job (?wait=N espera hasta N s a que termine)
+- GET  /api/v1/jobs/<id>/hits/  genes y mutaciones detectados
+- GET  /api/v1/scheduler/       profundidad de la cola y tiempos de espera del pool
+                                 (el staff ve el detalle de todos los usuarios)
+
+Las vistas son async: mientras un job está pendiente no ocupan un hilo del
+servidor ASGI, y el análisis bloqueante corre en el pool de submit_job()
+(reparto justo entre usuarios, services.scheduler).
+Autenticación: HTTP Basic (obligatoria para POST) o sesión (solo lectura).
+"""
+import asyncio
+import base64
+import binascii
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.models import User
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.text import get_valid_filename
+from django.views.decorators.csrf import csrf_exempt
+
+from .constants import FASTQ_EXTENSIONS
+from .models import AnalysisJob, Sequence
+from .services.compression import strip_compression_suffix
+from .services.fasta_stream import parse_fasta_stream, FastaFormatError
+from .services.jobs import scheduler, submit_job
+from .services.stats_cache import store_profile
+from .upload_handlers import FastaUploadHandler
+
+MAX_WAIT_SECONDS = 60
+POLL_INTERVAL = 1.0
+MAX_LIST = 100
+MAX_NAME_LENGTH = 80   # ?name= del cuerpo crudo (el FileField admite 100 con "fasta/" y la extensión)
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """El cuerpo crudo supera settings.RAM_API_UPLOAD_MAX_MB."""
+
+
+# ---------- autenticación ----------
+
+async def _api_user(request):
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Basic "):
+        try:
+            username, _, password = base64.b64decode(header[6:]).decode("utf-8").partition(":")
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+        return await aauthenticate(request, username=username, password=password)
+    # La sesión del navegador solo se acepta para lecturas (la API no usa CSRF)
+    if request.method in ("GET", "HEAD"):
+        user = await request.auser()
+        if user.is_authenticated:
+            return user
+    return None
+
+
+def api_view(view):
+    """Autentica la petición (request.api_user) y responde 401 en JSON si falla."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await _api_user(request)
+        if user is None:
+            response = JsonResponse({"error": "Autenticación requerida"}, status=401)
+            response["WWW-Authenticate"] = 'Basic realm="RAM API"'
+            return response
+        request.api_user = user
+        return await view(request, *args, **kwargs)
+    return csrf_exempt(wrapper)
+
+
+# ---------- serialización ----------
+
+def job_to_dict(job):
+    return {
+        "id": job.pk,
+        "status": job.status,
+        "mode": job.mode,
+        "search_mode": job.search_mode,
+        "backend": job.backend,
+        "risk_level": job.risk_level,
+        "identity_pct": job.identity_pct,
+        "coverage_pct": job.coverage_pct,
+        "peak_rss_kb": job.peak_rss_kb,
+        "clinical_priority": job.clinical_priority,
+        "alert_genes": job.alert_genes,
+        "alert_at": job.alert_at.isoformat() if job.alert_at else None,
+        "time_to_alert_s": job.time_to_alert,
+        "created_at": job.created_at.isoformat(),
+        "sequence": {
+            "id": job.sequence_id,
+            "name": job.sequence.name,
+            "data_type": job.sequence.data_type,
+            "length_bp": job.sequence.length_bp,
+            "sha256": job.sequence.sha256,
+        },
+        "status_url": reverse("api_job_status", args=[job.pk]),
+        "hits_url": reverse("api_job_hits", args=[job.pk]),
+    }
+
+
+def hit_to_dict(g):
+    return {
+        "kind": g.kind,
+        "gene": g.gene_name,
+        "mutation": g.mutation or None,
+        "source": g.source,
+        "antibiotic_class": g.antibiotic_class,
+        "matches": g.matches,
+        "identity": g.identity,
+        "coverage": g.coverage,
+        "mean_depth": g.mean_depth,
+        "contig": g.contig or None,
+        "start": g.start,
+        "end": g.end,
+        "classification": g.classification,
+    }
+
+
+def _user_jobs(user):
+    return AnalysisJob.objects.select_related("sequence").filter(sequence__owner=user)
+
+
+# ---------- envío ----------
+
+def _pending_uploads(request):
+    """
+    Archivos de la petición como (nombre, archivo, tipo, stats | error).
+    Multipart: uno o varios archivos (validados por FastaUploadHandler).
+    Cuerpo crudo: un FASTA/FASTQ, comprimido o no (?name=...&format=fastq),
+    copiado a disco por bloques (ver _spool_body).
+    """
+    if request.content_type == "multipart/form-data":
+        # request.FILES procesa el cuerpo: recién entonces el manejador llenó el registro
+        files = [(field, f) for field in request.FILES for f in request.FILES.getlist(field)]
+        log = list(getattr(request, "fasta_upload_log", []))
+        discarded = sum("error" in info for _, _, info in log)
+        # El nombre del formulario solo vale para un único archivo
+        single_name = request.POST.get("name") if len(files) + discarded == 1 else None
+        items = []
+        for field, f in files:
+            info = next((i for fld, name, i in log if fld == field and name == f.name), None)
+            if info is not None:
+                log.remove((field, f.name, info))
+            items.append(_classify(single_name or f.name, f, info))
+        # Archivos descartados por el manejador (FASTA mal formado)
+        items.extend((name, None, None, info) for _, name, info in log if "error" in info)
+        return items
+
+    name = _upload_name(request.GET.get("name") or "api_upload")
+    fmt = request.GET.get("format", "fasta").lower()
+    content = _spool_body(request, f"{name}.{'fastq' if fmt == 'fastq' else 'fasta'}")
+    return [_classify(name, content, None)]
+
+
+def _spool_body(request, filename):
+    """
+    Copia el cuerpo crudo a un archivo temporal por bloques (request.body lo
+    cargaría entero en memoria y se limita a DATA_UPLOAD_MAX_MEMORY_SIZE).
+    UploadTooLarge si supera settings.RAM_API_UPLOAD_MAX_MB (0: sin límite).
+    """
+    limit = settings.RAM_API_UPLOAD_MAX_MB * 1024 * 1024
+    content = TemporaryUploadedFile(filename, request.content_type or "application/octet-stream", 0, None)
+    size = 0
+    try:
+        while chunk := request.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if limit and size > limit:
+                raise UploadTooLarge(f"El archivo supera el máximo de {settings.RAM_API_UPLOAD_MAX_MB} MB")
+            content.write(chunk)
+    except BaseException:
+        content.close()
+        raise
+    content.size = size
+    content.seek(0)
+    return content
+
+
+def _upload_name(raw):
+    """Nombre de archivo seguro a partir de ?name=; ValueError si no es válido."""
+    try:
+        name = get_valid_filename(raw)
+    except SuspiciousFileOperation:
+        raise ValueError(f"Nombre de archivo no válido: {raw!r}") from None
+    if len(name) > MAX_NAME_LENGTH:
+        raise ValueError(f"Nombre de archivo demasiado largo (máximo {MAX_NAME_LENGTH} caracteres)")
+    return name
+
+
+def _classify(name, f, info):
+    if strip_compression_suffix(f.name).lower().endswith(FASTQ_EXTENSIONS):
+        return name, f, "READS", None
+    if info is None:
+        try:
+            info = {"stats": parse_fasta_stream(f)[0]}
+        except FastaFormatError as e:
+            info = {"error": str(e)}
+        f.seek(0)
+    return name, f, "ASSEMBLY", info
+
+
+def _search_mode(request):
+    """search_mode del formulario o de la query string (NT por defecto)."""
+    mode = (request.POST.get("search_mode") or request.GET.get("search_mode") or "NT").upper()
+    return mode if mode in dict(AnalysisJob.SEARCH_MODE_CHOICES) else "NT"
+
+
+def _backend(request):
+    """backend del formulario o de la query string (kmer por defecto)."""
+    backend = request.POST.get("backend") or request.GET.get("backend") or "kmer"
+    return backend if backend in dict(AnalysisJob.BACKEND_CHOICES) else "kmer"
+
+
+def _clinical(request):
+    return (request.POST.get("priority") or request.GET.get("priority") or "").lower() == "clinical"
+
+
+@sync_to_async
+def _create_jobs(user, items, search_mode="NT", backend="kmer", clinical=False):
+    jobs, errors = [], []
+    for name, f, data_type, info in items:
+        if info and "error" in info:
+            errors.append({"file": name, "error": f"FASTA no válido: {info['error']}"})
+            continue
+        seq = Sequence(owner=user, name=name, data_type=data_type)
+        if info:
+            stats = info["stats"]
+            seq.length_bp = stats["length"]
+            seq.gc_pct = stats["gc_pct"]
+            seq.n_count = stats["n_count"]
+            seq.record_count = stats["records"]
+            seq.sha256 = stats["sha256"]
+            seq.fai = stats["fai"]
+        seq.fasta_file.save(f.name, f, save=False)
+        seq.save()
+        if info:
+            store_profile(info["stats"]["sha256"], info["stats"]["profile"])
+        jobs.append(AnalysisJob.objects.create(
+            sequence=seq, mode="READS" if data_type == "READS" else "REAL", status="PENDING",
+            search_mode=search_mode, backend=backend, clinical_priority=clinical,
+        ))
+    return jobs, errors
+
+
+@api_view
+async def jobs_collection(request):
+    if request.method == "POST":
+        request.upload_handlers.insert(0, FastaUploadHandler(request))
+        try:
+            items = await sync_to_async(_pending_uploads)(request)
+        except UploadTooLarge as e:
+            return JsonResponse({"error": str(e)}, status=413)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        if not items:
+            return JsonResponse({"error": "No se recibió ningún archivo"}, status=400)
+        clinical = _clinical(request)
+        try:
+            if clinical and not await request.api_user.ahas_perm("analisis.clinical_priority"):
+                return JsonResponse({"error": "Sin permiso para la prioridad clínica"}, status=403)
+            jobs, errors = await _create_jobs(request.api_user, items, _search_mode(request), _backend(request),
+                                              clinical)
+        finally:
+            # El temporal del cuerpo crudo ya se movió a MEDIA_ROOT (o sobra)
+            for _, content, _, _ in items:
+                if content is not None:
+                    content.close()
+        for job in jobs:
+            await sync_to_async(submit_job)(job.pk)
+        status = 202 if jobs else 400
+        return JsonResponse({"jobs": [job_to_dict(j) for j in jobs], "errors": errors}, status=status)
+
+    if request.method != "GET":
+        return JsonResponse({"error": "Método no permitido"}, status=405)
+    jobs = _user_jobs(request.api_user).order_by("-created_at")
+    status = request.GET.get("status", "").upper()
+    if status:
+        jobs = jobs.filter(status=status)
+    return JsonResponse({"jobs": [job_to_dict(j) async for j in jobs[:MAX_LIST]]})
+
+
+# ---------- consulta ----------
+
+async def _get_job(request, pk):
+    try:
+        return await _user_jobs(request.api_user).aget(pk=pk)
+    except AnalysisJob.DoesNotExist:
+        return None
+
+
+@api_view
+async def job_status(request, pk):
+    job = await _get_job(request, pk)
+    if job is None:
+        return JsonResponse({"error": "Job no encontrado"}, status=404)
+
+    # Espera larga opcional: la corrutina duerme sin ocupar un hilo
+    try:
+        wait = min(max(float(request.GET.get("wait", 0)), 0), MAX_WAIT_SECONDS)
+    except ValueError:
+        wait = 0
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while job.status in ("PENDING", "RUNNING") and loop.time() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        job = await _get_job(request, pk)
+
+    return JsonResponse(job_to_dict(job))
+
+
+@api_view
+async def job_hits(request, pk):
+    job = await _get_job(request, pk)
+    if job is None:
+        return JsonResponse({"error": "Job no encontrado"}, status=404)
+    hits = [hit_to_dict(g) async for g in job.detected_genes.order_by("-identity")]
+    return JsonResponse({"job": job_to_dict(job), "hits": hits})
+
+
+# ---------- planificador ----------
+
+@api_view
+async def scheduler_metrics(request):
+    """Métricas del pool de este proceso; sin staff, solo los totales y la cola propia."""
+    snapshot = scheduler().snapshot()
+    users = snapshot.pop("users")
+    user = request.api_user
+    if user.is_staff:
+        names = dict(await sync_to_async(list)(User.objects.filter(pk__in=list(users)).values_list("pk", "username")))
+        snapshot["users"] = {names.get(pk, str(pk)): data for pk, data in users.items()}
+    else:
+        snapshot["own"] = users.get(user.pk, {"pending": 0, "running": 0, "oldest_wait_s": 0.0})
+    return JsonResponse(snapshot)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AnalisisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analisis'
+
+    def ready(self):
+        from django.conf import settings
+        from . import signals  # noqa: F401  (registra la invalidación de caché)
+        if settings.RAM_PREWARM:
+            from .services.warmup import prewarm
+            prewarm(settings.RAM_PREWARM_MODULES)
@@ -1,3 +1,5 @@
 # analisis/constants.py
 HIGH_IDENTITY = 90.0
-HIGH_COVERAGE = 80.0
\ No newline at end of file
+HIGH_COVERAGE = 80.0
+FASTA_EXTENSIONS = (".fa", ".fasta")
+FASTQ_EXTENSIONS = (".fastq", ".fq")  # también comprimidos (.gz/.bz2/.xz)
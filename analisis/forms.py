@@ -1,14 +1,51 @@
 from django import forms
 from .models import Sequence
+from .constants import FASTA_EXTENSIONS, FASTQ_EXTENSIONS
+from .services.fasta_stream import parse_fasta_stream, FastaFormatError
+from .services.compression import strip_compression_suffix
 
 class SequenceUploadForm(forms.ModelForm):
     class Meta:
         model = Sequence
         fields = ["name", "fasta_file"]
 
+    def __init__(self, *args, fasta_uploads=None, **kwargs):
+        # fasta_uploads: resultados de FastaUploadHandler (request.fasta_uploads)
+        super().__init__(*args, **kwargs)
+        self.fasta_uploads = fasta_uploads or {}
+        self.fasta_stats = None
+
     def clean_fasta_file(self):
         f = self.cleaned_data["fasta_file"]
-        ok = f.name.lower().endswith((".fa",".fasta"))
+        # La compresión se detecta por contenido; aquí solo importa el formato
+        name = strip_compression_suffix(f.name).lower()
+        if name.endswith(FASTQ_EXTENSIONS):
+            # Lecturas crudas: se validan al mapearlas
+            self.instance.data_type = "READS"
+            return f
+        ok = name.endswith(FASTA_EXTENSIONS)
         if not ok:
-            raise forms.ValidationError("El archivo debe tener extensión .fa o .fasta")
+            raise forms.ValidationError("El archivo debe tener extensión .fa, .fasta, .fastq o .fq (opcionalmente .gz, .bz2 o .xz)")
+
+        info = self.fasta_uploads.get("fasta_file")
+        if info is None:
+            # Sin el manejador de subida: se valida leyendo el archivo una vez
+            try:
+                info = {"stats": parse_fasta_stream(f)[0]}
+            except FastaFormatError as e:
+                info = {"error": str(e)}
+            f.seek(0)
+        if "error" in info:
+            raise forms.ValidationError(f"FASTA no válido: {info['error']}")
+        self.fasta_stats = info["stats"]
         return f
+
+    def clean(self):
+        cleaned = super().clean()
+        # Si el manejador descartó el archivo, mostrar el motivo real
+        # en lugar de "campo obligatorio"
+        info = self.fasta_uploads.get("fasta_file")
+        if info and "error" in info and "fasta_file" in self._errors:
+            self._errors.pop("fasta_file")
+            self.add_error("fasta_file", f"FASTA no válido: {info['error']}")
+        return cleaned
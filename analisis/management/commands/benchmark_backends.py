@@ -0,0 +1,57 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from analisis.models import ResistanceGene
+from analisis.services.contigs import iter_records
+from analisis.services.engine import BACKENDS, load_reference
+from analisis.services.engine.benchmark import run_benchmark
+from analisis.services.loadtest import synthetic_fasta
+
+class Command(BaseCommand):
+    help = ("Compara los backends del motor de detección (tiempo, búsquedas y genes detectados) "
+            "sobre un FASTA o una secuencia sintética con genes del panel incrustados")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fasta", help="FASTA a analizar (por defecto, secuencia sintética)")
+        parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS),
+                            help="Backends a comparar; el primero es la referencia (default: todos)")
+        parser.add_argument("--genes", type=int, default=None, help="Limita el panel a los primeros N genes")
+        parser.add_argument("--genome-bp", type=int, default=20000,
+                            help="Largo de la secuencia sintética (default: 20000)")
+        parser.add_argument("--contigs", type=int, default=4, help="Registros de la secuencia sintética")
+        parser.add_argument("--inserts", type=int, default=5, help="Genes del panel incrustados (sintética)")
+        parser.add_argument("--min-identity", type=float, default=None,
+                            help="Identidad mínima 0-1 (default: la de cada backend)")
+        parser.add_argument("--min-coverage", type=float, default=None,
+                            help="Cobertura mínima 0-1 (default: la de cada backend)")
+        parser.add_argument("--repeat", type=int, default=1, help="Repeticiones; se informa la mejor")
+        parser.add_argument("--json", action="store_true", help="Imprime el resultado en JSON")
+
+    def handle(self, *args, **options):
+        genes = ResistanceGene.objects.order_by("pk")
+        if options["genes"]:
+            genes = genes[:options["genes"]]
+        genes = load_reference(genes)
+        if not genes:
+            raise CommandError("El panel de genes está vacío (ver load_ram_data)")
+        if options["fasta"]:
+            source = options["fasta"]
+        else:
+            inserts = [g.sequence for g in genes[:options["inserts"]]]
+            source = io.BytesIO(synthetic_fasta(options["genome_bp"], options["contigs"], inserts, seed=42))
+        records = list(iter_records(source))
+
+        rows = run_benchmark(records, genes, options["backends"], repeat=options["repeat"],
+                             min_identity=options["min_identity"], min_coverage=options["min_coverage"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        self.stdout.write(f"▶ {len(records)} contig(s), {sum(len(s) for _, s in records):,} bp, "
+                          f"panel de {len(genes)} gen(es); referencia: {options['backends'][0]}")
+        self.stdout.write(f"{'Backend':<12}{'Índice s':>10}{'Búsqueda s':>12}{'Búsquedas':>11}"
+                          f"{'Hits':>7}{'Sensib.':>9}{'Extra':>7}")
+        for r in rows:
+            self.stdout.write(f"{r['backend']:<12}{r['build_s']:>10}{r['search_s']:>12}{r['searches']:>11}"
+                              f"{r['hits']:>7}{r['recall']:>9}{r['extra']:>7}")
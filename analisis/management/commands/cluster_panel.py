@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from analisis.services.analyzers import cluster_reference_panel
+from analisis.services.clustering import CLUSTER_IDENTITY, CLUSTER_COVERAGE
+
+class Command(BaseCommand):
+    help = "Agrupa el panel de genes RAM en clústeres de alelos casi idénticos (representante por clúster)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--identity", type=float, default=CLUSTER_IDENTITY,
+                            help=f"Identidad mínima con el representante, 0-1 (default: {CLUSTER_IDENTITY})")
+        parser.add_argument("--coverage", type=float, default=CLUSTER_COVERAGE,
+                            help=f"Cobertura mínima del alelo, 0-1 (default: {CLUSTER_COVERAGE})")
+
+    def handle(self, *args, **options):
+        total, clusters = cluster_reference_panel(options["identity"], options["coverage"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Panel agrupado: {total} gen(es) en {clusters} clúster(es)."
+        ))
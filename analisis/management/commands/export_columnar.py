@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from analisis.models import AnalysisJob
+from analisis.services.columnar import FORMATS, ROW_GROUP_SIZE, ColumnarUnavailable, write
+from analisis.services.exports import EXPORTS
+
+class Command(BaseCommand):
+    help = "Exporta jobs o genes detectados a Parquet / Arrow IPC (requiere pyarrow)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("what", choices=sorted(EXPORTS), help="jobs: un registro por análisis; hits: por gen detectado")
+        parser.add_argument("output", help="Archivo de salida")
+        parser.add_argument("--format", choices=sorted(FORMATS), default="parquet", dest="fmt")
+        parser.add_argument("--owner", help="Solo las secuencias de este usuario")
+        parser.add_argument("--status", help="Solo los jobs con este estado (p. ej. DONE)")
+        parser.add_argument("--batch-size", type=int, default=ROW_GROUP_SIZE,
+                            help=f"Filas por row group / batch (default: {ROW_GROUP_SIZE})")
+
+    def handle(self, *args, **options):
+        jobs = AnalysisJob.objects.order_by("pk")
+        if options["owner"]:
+            jobs = jobs.filter(sequence__owner__username=options["owner"])
+        if options["status"]:
+            jobs = jobs.filter(status=options["status"].upper())
+        columns, rows = EXPORTS[options["what"]]
+        started = time.perf_counter()
+        try:
+            total = write(rows(jobs), columns, options["output"], fmt=options["fmt"],
+                          batch_size=options["batch_size"])
+        except ColumnarUnavailable as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} fila(s) → {options['output']} ({time.perf_counter() - started:.2f} s)"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from analisis.models import MutationTarget, PointMutation
+from analisis.services.mutations import DEMO_MUTATION_PANEL
+
+class Command(BaseCommand):
+    help = "Carga el panel simulado de mutaciones puntuales (gyrA, parC)"
+
+    def handle(self, *args, **kwargs):
+        for t in DEMO_MUTATION_PANEL:
+            target, _ = MutationTarget.objects.update_or_create(
+                gene_name=t["gene_name"],
+                defaults={
+                    "source": t["source"],
+                    "sequence": t["sequence"],
+                    "first_codon": t["first_codon"],
+                    "antibiotic_class": t["antibiotic_class"],
+                },
+            )
+            for position, ref_aa, resistant_aa in t["mutations"]:
+                PointMutation.objects.update_or_create(
+                    target=target, position=position,
+                    defaults={"ref_aa": ref_aa, "resistant_aa": resistant_aa},
+                )
+        total = PointMutation.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"✅ Panel de mutaciones cargado: {total} posiciones."))
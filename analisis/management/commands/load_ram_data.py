@@ -1,9 +1,15 @@
 from django.core.management.base import BaseCommand
 from analisis.models import ResistanceGene
+from analisis.services.analyzers import cluster_reference_panel
+from analisis.services.rescreen import rescreen_archive
 
 class Command(BaseCommand):
     help = "Carga genes RAM simulados de CARD y ResFinder"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--rescreen", action="store_true",
+                            help="Re-analiza el archivo contra los genes nuevos o modificados")
+
     def handle(self, *args, **kwargs):
         genes = [
             ("CARD", "blaTEM", "ATGAGTATTCAACATTTCCGTGTCGCCCTTATTCCCTTTTTTGCGGCATTTTGCCTTCCTGTTTTTGCTCACCCAGAAACGCTGGTGAAAGTA", "Beta-lactámicos", "Beta-lactamasa TEM-1, confiere resistencia a penicilinas"),
@@ -17,4 +23,10 @@ class Command(BaseCommand):
                 source=src, gene_name=name, sequence=seq,
                 antibiotic_class=abx, description=desc
             )
+        total, clusters = cluster_reference_panel()
         self.stdout.write(self.style.SUCCESS("✅ Datos CARD y ResFinder cargados correctamente."))
+        self.stdout.write(f"Panel agrupado: {total} gen(es) en {clusters} clúster(es).")
+        if kwargs["rescreen"]:
+            summary = rescreen_archive(log=self.stdout.write)
+            self.stdout.write(f"Re-screening incremental: {summary['jobs']} job(s) actualizados, "
+                              f"{summary['hits']} coincidencia(s).")
@@ -0,0 +1,71 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from analisis.models import ResistanceGene, Sequence
+from analisis.services.loadtest import run_load_test, summarize, synthetic_fasta
+
+USER_PREFIX = "loadtest_"
+
+
+class Command(BaseCommand):
+    help = ("Prueba de carga contra un servidor local: N usuarios sintéticos suben secuencias, "
+            "ejecutan análisis y consultan dashboard, historial y CSV")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000",
+                            help="Servidor a probar (default: http://127.0.0.1:8000)")
+        parser.add_argument("--users", type=int, default=10, help="Usuarios concurrentes (default: 10)")
+        parser.add_argument("--iterations", type=int, default=3,
+                            help="Recorridos completos por usuario (default: 3)")
+        parser.add_argument("--genome-bp", type=int, default=20000,
+                            help="Largo de la secuencia sintética (default: 20000)")
+        parser.add_argument("--contigs", type=int, default=1, help="Registros de la secuencia sintética")
+        parser.add_argument("--think-time", type=float, default=0.0,
+                            help="Pausa en segundos entre recorridos de un usuario")
+        parser.add_argument("--timeout", type=float, default=120, help="Timeout por petición en segundos")
+        parser.add_argument("--json", action="store_true", help="Imprime el resumen en JSON")
+        parser.add_argument("--cleanup", action="store_true",
+                            help="Al terminar, elimina los usuarios sintéticos y sus secuencias")
+
+    def handle(self, *args, **options):
+        # Los usuarios se crean en la misma base de datos que usa el servidor local
+        password = "loadtest-pass"
+        credentials = []
+        for i in range(options["users"]):
+            user, _ = User.objects.get_or_create(username=f"{USER_PREFIX}{i}")
+            user.set_password(password)
+            user.save()
+            credentials.append((user.username, password))
+
+        # Se incrustan algunos genes del panel para ejercitar también el guardado de hits
+        inserts = list(ResistanceGene.objects.values_list("sequence", flat=True)[:3])
+        fasta = synthetic_fasta(options["genome_bp"], options["contigs"], inserts, seed=42)
+
+        if not options["json"]:
+            self.stdout.write(f"▶ {options['users']} usuario(s) × {options['iterations']} recorrido(s) "
+                              f"contra {options['base_url']} ({len(fasta):,} bytes por subida)")
+        elapsed, samples = run_load_test(options["base_url"], credentials, iterations=options["iterations"],
+                                         fasta=fasta, think_time=options["think_time"],
+                                         timeout=options["timeout"])
+        rows = summarize(elapsed, samples)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"elapsed_s": round(elapsed, 2), "endpoints": rows}, indent=2))
+        else:
+            self.stdout.write(f"{'Endpoint':<22}{'Peticiones':>11}{'req/s':>9}{'p50 ms':>10}"
+                              f"{'p95 ms':>10}{'p99 ms':>10}{'Errores':>9}")
+            for r in rows:
+                self.stdout.write(f"{r['endpoint']:<22}{r['requests']:>11}{r['throughput']:>9}{r['p50_ms']:>10}"
+                                  f"{r['p95_ms']:>10}{r['p99_ms']:>10}{r['error_pct']:>8}%")
+            for r in rows:
+                if r["errors"] and r["endpoint"] != "TOTAL":
+                    detail = ", ".join(f"{e}: {n}" for e, n in r["errors"].items())
+                    self.stdout.write(self.style.WARNING(f"  {r['endpoint']}: {detail}"))
+            self.stdout.write(self.style.SUCCESS(f"✅ Prueba de carga terminada en {elapsed:.1f}s"))
+
+        if options["cleanup"]:
+            users = User.objects.filter(username__startswith=USER_PREFIX)
+            for seq in Sequence.objects.filter(owner__in=users):
+                seq.fasta_file.delete(save=False)
+            users.delete()
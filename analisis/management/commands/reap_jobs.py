@@ -0,0 +1,34 @@
+from concurrent.futures import wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from analisis.services.reaper import reap_stale_jobs
+
+class Command(BaseCommand):
+    help = ("Recupera análisis abandonados: los RUNNING sin latido se reencolan "
+            "(hasta --max-attempts intentos) o se marcan ERROR")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stale-seconds", type=int, default=settings.RAM_JOB_STALE_SECONDS,
+                            help=f"Segundos sin latido para considerar abandonado un job "
+                                 f"(default: {settings.RAM_JOB_STALE_SECONDS})")
+        parser.add_argument("--max-attempts", type=int, default=settings.RAM_JOB_MAX_ATTEMPTS,
+                            help=f"Intentos antes de marcar ERROR (default: {settings.RAM_JOB_MAX_ATTEMPTS})")
+        parser.add_argument("--no-requeue", action="store_true",
+                            help="No reencola: marca ERROR todos los jobs abandonados")
+        parser.add_argument("--pending", action="store_true",
+                            help="Incluye los PENDING con más de --stale-seconds en cola (tras un reinicio)")
+
+    def handle(self, *args, **options):
+        counts, futures = reap_stale_jobs(options["stale_seconds"], options["max_attempts"],
+                                          requeue=not options["no_requeue"], include_pending=options["pending"])
+        if not counts:
+            self.stdout.write("No hay jobs abandonados.")
+            return
+        for status, n in sorted(counts.items()):
+            self.stdout.write(f"  {status}: {n}")
+        if futures:
+            # El pool es de este proceso: esperar a que los reencolados terminen
+            self.stdout.write(f"▶ Ejecutando {len(futures)} job(s) reencolado(s)...")
+            wait(futures)
+        self.stdout.write(self.style.SUCCESS(f"✅ {sum(counts.values())} job(s) recuperado(s)."))
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from analisis.services.surveillance import rebuild
+
+class Command(BaseCommand):
+    help = ("Reconstruye la matriz de presencia de genes entre muestras (vigilancia) "
+            "a partir del último análisis terminado de cada secuencia")
+
+    def handle(self, *args, **options):
+        samples = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Matriz de presencia reconstruida: {samples} muestra(s) → {settings.RAM_PRESENCE_PATH}"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from analisis.services.rescreen import rescreen_archive
+
+class Command(BaseCommand):
+    help = ("Re-analiza las secuencias existentes solo contra genes RAM nuevos o modificados "
+            "(pensado para cron, ver analisis.services.rescreen)")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100,
+                            help="Secuencias por lote (default: 100)")
+
+    def handle(self, *args, **options):
+        summary = rescreen_archive(batch_size=options["batch_size"], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Re-screening incremental: {summary['jobs']} job(s) actualizados, "
+            f"{summary['genes']} gen(es) evaluados, {summary['hits']} coincidencia(s)."
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0004_analysisjob_risk_level_detectedgene_antibiotic_class_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sequence',
+            name='gc_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sequence',
+            name='n_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sequence',
+            name='record_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sequence',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0006_incremental_rescreen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MutationTarget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('CARD', 'CARD'), ('ResFinder', 'ResFinder')], max_length=20)),
+                ('gene_name', models.CharField(max_length=100, unique=True)),
+                ('sequence', models.TextField()),
+                ('first_codon', models.PositiveIntegerField(default=1)),
+                ('antibiotic_class', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='detectedgene',
+            name='kind',
+            field=models.CharField(choices=[('GENE', 'Gen adquirido'), ('MUTATION', 'Mutación puntual')], default='GENE', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='detectedgene',
+            name='mutation',
+            field=models.CharField(blank=True, default='', max_length=30),
+        ),
+        migrations.CreateModel(
+            name='PointMutation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('ref_aa', models.CharField(max_length=1)),
+                ('resistant_aa', models.CharField(max_length=20)),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mutations', to='analisis.mutationtarget')),
+            ],
+            options={
+                'ordering': ['target', 'position'],
+                'unique_together': {('target', 'position')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0007_mutation_panel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectedgene',
+            name='mean_depth',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sequence',
+            name='data_type',
+            field=models.CharField(choices=[('ASSEMBLY', 'Ensamblado (FASTA)'), ('READS', 'Lecturas (FASTQ)')], default='ASSEMBLY', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='analysisjob',
+            name='mode',
+            field=models.CharField(choices=[('DEMO', 'DEMO'), ('REAL', 'REAL'), ('READS', 'READS')], default='DEMO', max_length=8),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0008_reads_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='progress',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0009_job_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectedgene',
+            name='end',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='detectedgene',
+            name='start',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sequence',
+            name='fai',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
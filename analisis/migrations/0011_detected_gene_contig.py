@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0010_fasta_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detectedgene',
+            name='contig',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0011_detected_gene_contig'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='peak_rss_kb',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0012_job_peak_rss'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('length', models.BigIntegerField()),
+                ('gc_pct', models.FloatField()),
+                ('n_count', models.BigIntegerField()),
+                ('ambiguous_count', models.BigIntegerField(default=0)),
+                ('base_counts', models.JSONField(default=dict)),
+                ('window_size', models.PositiveIntegerField()),
+                ('gc_profile', models.JSONField(default=list)),
+                ('gc_skew', models.JSONField(default=list)),
+                ('kmer_k', models.PositiveSmallIntegerField()),
+                ('kmer_counts', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0013_sequence_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resistancegene',
+            name='representative',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cluster_members', to='analisis.resistancegene'),
+        ),
+    ]
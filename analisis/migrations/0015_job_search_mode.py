@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0014_resistance_gene_cluster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='search_mode',
+            field=models.CharField(choices=[('NT', 'Nucleótidos'), ('AA', 'Aminoácidos (6 marcos)')], default='NT', max_length=2),
+        ),
+    ]
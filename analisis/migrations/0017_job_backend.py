@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0016_job_cancel_budget'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='backend',
+            field=models.CharField(choices=[('kmer', 'k-mer exacto (semilla)'), ('aho', 'Aho-Corasick'), ('banded', 'Smith-Waterman en banda'), ('pairwise2', 'pairwise2 (referencia)')], default='kmer', max_length=16),
+        ),
+    ]
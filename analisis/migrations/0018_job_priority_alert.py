@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0017_job_backend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='alert_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='alert_genes',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
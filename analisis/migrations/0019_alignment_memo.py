@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0018_job_priority_alert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlignmentMemo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64)),
+                ('gene_version', models.PositiveIntegerField()),
+                ('params', models.CharField(max_length=16)),
+                ('hits', models.JSONField(default=list)),
+                ('size', models.PositiveIntegerField()),
+                ('last_used_at', models.DateTimeField(db_index=True)),
+                ('gene', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='analisis.resistancegene')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('sha256', 'params', 'gene', 'gene_version'), name='alignment_memo_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0019_alignment_memo'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='analysisjob',
+            options={'permissions': [('clinical_priority', 'Puede enviar análisis con prioridad clínica')]},
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='clinical_priority',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.migrations.recorder import MigrationRecorder
+
+BATCH_SIZE = 500
+
+
+def backfill_panel_versions(apps, schema_editor):
+    """
+    Los jobs anteriores al control de versiones (0006) no tienen
+    panel_versions y pending_genes() los daba por desactualizados contra todo
+    el panel (updated_at de los genes existentes es la fecha de la migración).
+    Se registra como analizada la versión 1 de los genes que ya existían
+    entonces y no cambiaron desde (version 1, updated_at hasta esa fecha);
+    los agregados o modificados después siguen pendientes.
+    """
+    applied = (MigrationRecorder(schema_editor.connection).migration_qs
+               .filter(app="analisis", name="0006_incremental_rescreen")
+               .values_list("applied", flat=True).first())
+    if applied is None:
+        return
+    ResistanceGene = apps.get_model("analisis", "ResistanceGene")
+    AnalysisJob = apps.get_model("analisis", "AnalysisJob")
+    versions = {str(pk): 1 for pk in ResistanceGene.objects.filter(version=1, updated_at__lte=applied)
+                .values_list("pk", flat=True)}
+    if not versions:
+        return
+    legacy = list(AnalysisJob.objects.filter(status="DONE", created_at__lt=applied, panel_versions={})
+                  .values_list("pk", flat=True))
+    for i in range(0, len(legacy), BATCH_SIZE):
+        AnalysisJob.objects.filter(pk__in=legacy[i:i + BATCH_SIZE]).update(panel_versions=versions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analisis', '0020_job_clinical_priority'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_panel_versions, migrations.RunPython.noop),
+    ]
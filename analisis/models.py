@@ -1,38 +1,142 @@
 from django.db import models
+from django.db.models import Case, F, When
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Sequence(models.Model):
+    DATA_TYPE_CHOICES = (("ASSEMBLY", "Ensamblado (FASTA)"), ("READS", "Lecturas (FASTQ)"))
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=200)
     fasta_file = models.FileField(upload_to="fasta/")
+    data_type = models.CharField(max_length=10, choices=DATA_TYPE_CHOICES, default="ASSEMBLY")
     length_bp = models.IntegerField(null=True, blank=True)
+    # Calculados durante la subida (FastaUploadHandler)
+    gc_pct = models.FloatField(null=True, blank=True)
+    n_count = models.IntegerField(null=True, blank=True)
+    record_count = models.IntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    # Índice .fai (services.fasta_index); vacío si el FASTA no es indexable
+    fai = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self): return self.name
 
 class AnalysisJob(models.Model):
-    MODE_CHOICES = (("DEMO","DEMO"), ("REAL","REAL"))
+    MODE_CHOICES = (("DEMO","DEMO"), ("REAL","REAL"), ("READS","READS"))
     sequence = models.ForeignKey(Sequence, on_delete=models.CASCADE, related_name="jobs")
     mode = models.CharField(max_length=8, choices=MODE_CHOICES, default="DEMO")
-    status = models.CharField(max_length=20, default="PENDING")  # PENDING/RUNNING/DONE/ERROR
+    status = models.CharField(max_length=20, default="PENDING")  # PENDING/RUNNING/DONE/ERROR/CANCELLED
     identity_pct = models.FloatField(null=True, blank=True)
     coverage_pct = models.FloatField(null=True, blank=True)
     raw_summary = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     RISK_CHOICES = (('NONE','Sin riesgo'), ('LOW','Bajo'), ('MEDIUM','Moderado'), ('HIGH','Crítico'))
     risk_level = models.CharField(max_length=10, choices=RISK_CHOICES, default='NONE')
+    # {id de ResistanceGene: versión} de los genes contra los que se analizó
+    panel_versions = models.JSONField(default=dict, blank=True)
+    # Avance en vivo (services.progress.ProgressReporter), transmitido por SSE
+    progress = models.JSONField(default=dict, blank=True)
+    # Memoria pico (RSS, KB) observada durante la ejecución (services.resources.PeakRSS)
+    peak_rss_kb = models.IntegerField(null=True, blank=True)
+    SEARCH_MODE_CHOICES = (("NT", "Nucleótidos"), ("AA", "Aminoácidos (6 marcos)"))
+    # Búsqueda de genes en ensamblados (services.contigs.screen_contigs)
+    search_mode = models.CharField(max_length=2, choices=SEARCH_MODE_CHOICES, default="NT")
+    # Backend del motor de detección para la búsqueda en nucleótidos (services.engine)
+    BACKEND_CHOICES = (("kmer", "k-mer exacto (semilla)"), ("aho", "Aho-Corasick"),
+                       ("banded", "Smith-Waterman en banda"), ("pairwise2", "pairwise2 (referencia)"))
+    backend = models.CharField(max_length=16, choices=BACKEND_CHOICES, default="kmer")
+    # Cancelación pedida por el usuario; el análisis en curso la atiende en su
+    # próximo punto de control (services.budget)
+    cancel_requested = models.BooleanField(default=False)
+    # Inicio de la ejecución y último latido del worker (services.reaper)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Presupuestos en segundos (None: los de settings)
+    wall_budget_s = models.IntegerField(null=True, blank=True)
+    cpu_budget_s = models.IntegerField(null=True, blank=True)
+    # Alerta temprana: momento en que un gen prioritario superó los umbrales
+    # de riesgo alto (services.priority) y los genes que la dispararon
+    alert_at = models.DateTimeField(null=True, blank=True)
+    alert_genes = models.JSONField(default=list, blank=True)
+    # Prioridad clínica: el planificador (services.scheduler) lo ejecuta antes
+    # que el resto de la cola; enviarlo así requiere el permiso clinical_priority
+    clinical_priority = models.BooleanField(default=False)
+
+    class Meta:
+        permissions = [("clinical_priority", "Puede enviar análisis con prioridad clínica")]
+
+    @property
+    def time_to_alert(self):
+        """Segundos desde el inicio de la ejecución hasta la alerta (None si no hubo)."""
+        if self.alert_at is None or self.started_at is None:
+            return None
+        return round((self.alert_at - self.started_at).total_seconds(), 3)
 class DetectedGene(models.Model):
+    KIND_CHOICES = (("GENE", "Gen adquirido"), ("MUTATION", "Mutación puntual"))
     job = models.ForeignKey("AnalysisJob", on_delete=models.CASCADE, related_name="detected_genes")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default="GENE")
     gene_name = models.CharField(max_length=100)
+    mutation = models.CharField(max_length=30, blank=True, default="")  # p. ej. S83L (solo kind=MUTATION)
     source = models.CharField(max_length=20, blank=True, null=True)
     antibiotic_class = models.CharField(max_length=100, blank=True, null=True)
     matches = models.IntegerField(default=0)
     identity = models.FloatField(default=0)
     coverage = models.FloatField(default=0)
     classification = models.CharField(max_length=20, default="Desconocido")
+    mean_depth = models.FloatField(null=True, blank=True)  # Solo en modo lecturas (coverage = amplitud)
+    # Ubicación en la secuencia analizada: contig (registro del FASTA) y
+    # coordenadas base 0 con fin exclusivo (no aplica a lecturas)
+    contig = models.CharField(max_length=200, blank=True, default="")
+    start = models.IntegerField(null=True, blank=True)
+    end = models.IntegerField(null=True, blank=True)
 
     def __str__(self):
+        if self.kind == "MUTATION":
+            return f"{self.gene_name} {self.mutation}"
         return f"{self.gene_name} ({self.identity}%, {self.coverage}%)"
+class ResistanceGeneQuerySet(models.QuerySet):
+    """
+    update() y bulk_update() no pasan por save(): si cambian la secuencia
+    también suben la versión y dejan sin agrupar los genes modificados, para
+    que el re-screening incremental los vuelva a buscar.
+    """
+
+    def _ungroup(self, changed):
+        # Los miembros de un representante modificado quedan sin agrupar (como en save())
+        ResistanceGene.objects.filter(representative__in=changed).exclude(pk__in=changed).update(representative=None)
+
+    def update(self, **kwargs):
+        sequence = kwargs.get("sequence")
+        if not isinstance(sequence, str):
+            return super().update(**kwargs)
+        changed = list(self.exclude(sequence=sequence).values_list("pk", flat=True))
+        kwargs.setdefault("version", Case(When(sequence=sequence, then=F("version")), default=F("version") + 1))
+        kwargs.setdefault("representative", Case(When(sequence=sequence, then=F("representative")), default=None))
+        kwargs.setdefault("updated_at", timezone.now())
+        rows = super().update(**kwargs)
+        self._ungroup(changed)
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        if "sequence" not in fields:
+            return super().bulk_update(objs, fields, batch_size=batch_size)
+        objs = list(objs)
+        old = dict(ResistanceGene.objects.filter(pk__in=[o.pk for o in objs]).values_list("pk", "sequence"))
+        now = timezone.now()
+        changed = []
+        for obj in objs:
+            if obj.pk in old and old[obj.pk] != obj.sequence:
+                obj.version += 1
+                obj.representative = None
+                obj.updated_at = now
+                changed.append(obj.pk)
+        fields = list(dict.fromkeys([*fields, "version", "representative", "updated_at"]))
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        self._ungroup(changed)
+        return rows
+
+
 class ResistanceGene(models.Model):
     SOURCE_CHOICES = [
         ('CARD', 'CARD'),
@@ -43,7 +147,97 @@ class ResistanceGene(models.Model):
     sequence = models.TextField()  # Secuencia genética completa o representativa
     antibiotic_class = models.CharField(max_length=100, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
+    # Se incrementa cuando cambia la secuencia (re-screening incremental)
+    version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Representante del clúster de alelos (services.clustering); el representante
+    # se apunta a sí mismo y null significa sin agrupar (se busca siempre)
+    representative = models.ForeignKey("self", on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name="cluster_members")
+
+    objects = ResistanceGeneQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.gene_name} ({self.source})"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            old_seq = ResistanceGene.objects.filter(pk=self.pk).values_list("sequence", flat=True).first()
+            if old_seq is not None and old_seq != self.sequence:
+                self.version += 1
+                # El clúster se calculó con la secuencia anterior: queda sin agrupar
+                # (y sus miembros, si era representante) hasta re-agrupar el panel
+                ResistanceGene.objects.filter(representative=self).exclude(pk=self.pk).update(representative=None)
+                self.representative = None
+        super().save(*args, **kwargs)
+
+class MutationTarget(models.Model):
+    """Gen diana de mutaciones puntuales (p. ej. gyrA, parC)."""
+    source = models.CharField(max_length=20, choices=ResistanceGene.SOURCE_CHOICES)
+    gene_name = models.CharField(max_length=100, unique=True)
+    sequence = models.TextField()  # Referencia silvestre, en marco de lectura
+    first_codon = models.PositiveIntegerField(default=1)  # Nº del primer codón de `sequence` en la proteína
+    antibiotic_class = models.CharField(max_length=100, blank=True, null=True)
 
     def __str__(self):
         return f"{self.gene_name} ({self.source})"
+
+class PointMutation(models.Model):
+    target = models.ForeignKey(MutationTarget, on_delete=models.CASCADE, related_name="mutations")
+    position = models.PositiveIntegerField()  # Codón, numeración de la proteína
+    ref_aa = models.CharField(max_length=1)
+    resistant_aa = models.CharField(max_length=20)  # Alelos resistentes, p. ej. "LFW"
+
+    class Meta:
+        unique_together = ("target", "position")
+        ordering = ["target", "position"]
+
+    def __str__(self):
+        return f"{self.target.gene_name} {self.ref_aa}{self.position}{self.resistant_aa}"
+
+class SequenceStats(models.Model):
+    """
+    Estadísticas de una secuencia (services.seqstats), guardadas por huella
+    SHA-256: el mismo genoma subido varias veces se mide una sola vez.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    length = models.BigIntegerField()
+    gc_pct = models.FloatField()
+    n_count = models.BigIntegerField()
+    ambiguous_count = models.BigIntegerField(default=0)
+    base_counts = models.JSONField(default=dict)
+    window_size = models.PositiveIntegerField()
+    gc_profile = models.JSONField(default=list)  # GC % por ventana
+    gc_skew = models.JSONField(default=list)     # (G-C)/(G+C) por ventana
+    kmer_k = models.PositiveSmallIntegerField()
+    kmer_counts = models.JSONField(default=list)  # 4^k conteos en orden lexicográfico ACGT
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.length} bp, GC {self.gc_pct}%)"
+
+
+class AlignmentMemo(models.Model):
+    """
+    Resultado crudo (sin umbrales) de buscar un gen de referencia en una
+    secuencia (services.memo), por huella SHA-256 de la secuencia, gen y
+    versión del gen, y huella de los parámetros de puntuación del backend.
+    Lo reutilizan los re-análisis y los análisis de otros usuarios del mismo
+    archivo; se descarta por antigüedad de uso (LRU) al superar el tamaño máximo.
+    """
+    sha256 = models.CharField(max_length=64)
+    gene = models.ForeignKey(ResistanceGene, on_delete=models.CASCADE, related_name="+")
+    gene_version = models.PositiveIntegerField()
+    params = models.CharField(max_length=16)  # huella de backend y parámetros (memo.params_key)
+    hits = models.JSONField(default=list)  # hits crudos por contig (vacío: sin coincidencias)
+    size = models.PositiveIntegerField()  # bytes de hits en JSON
+    last_used_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["sha256", "params", "gene", "gene_version"], name="alignment_memo_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} × gen {self.gene_id} v{self.gene_version} [{self.params}]"
     # analisis/models.py
@@ -0,0 +1,101 @@
+"""
+Alineamiento local (Smith-Waterman, Bio.pairwise2) con presupuesto de memoria.
+
+pairwise2 arma matrices de (len(query)+1) × (len(ref)+1) celdas, así que una
+query de varios megabases puede agotar la RAM. Aquí la query se recorre en
+ventanas solapadas cuyo tamaño se calcula para que las matrices de cada
+ventana quepan en el presupuesto.
+
+El solape es de MAX_SPAN_FACTOR × len(ref) bases: con este esquema de puntaje
+un alineamiento local óptimo no puede abarcar más de 3 × len(ref) bases de la
+query (cada columna con gap resta al menos 1 y el puntaje máximo es 2 por
+base de la referencia), así que siempre cae completo dentro de alguna ventana
+y el resultado es el mismo que alineando la secuencia entera.
+
+pairwise2 se importa al primer alineamiento (ver warmup).
+
+No depende de Django.
+"""
+import functools
+import os
+import warnings
+
+MATCH, MISMATCH, GAP_OPEN, GAP_EXTEND = 2, -1, -2, -1
+# Bytes por celda medidos con tracemalloc (matrices de puntaje y de traceback)
+BYTES_PER_CELL = 48
+MAX_SPAN_FACTOR = 3
+# Presupuesto por alineamiento; configurable con la variable de entorno RAM_ALIGN_MEMORY_MB
+DEFAULT_MEMORY_MB = int(os.environ.get("RAM_ALIGN_MEMORY_MB", 256))
+
+
+@functools.cache
+def load_pairwise2():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # pairwise2 está marcado como obsoleto en Biopython reciente
+        from Bio import pairwise2
+    return pairwise2
+
+
+def window_plan(query_len, ref_len, memory_mb=DEFAULT_MEMORY_MB):
+    """
+    Retorna (ventana, paso) en bases de la query. La ventana nunca es menor
+    que dos solapes: con un presupuesto muy bajo se prioriza la exactitud.
+    """
+    overlap = MAX_SPAN_FACTOR * ref_len
+    window = int(memory_mb * 1024 * 1024 // (BYTES_PER_CELL * (ref_len + 1)))
+    window = max(window, 2 * overlap, 1)
+    if window >= query_len:
+        return query_len, query_len
+    return window, window - overlap
+
+
+def iter_windows(query_len, ref_len, memory_mb=DEFAULT_MEMORY_MB):
+    """Genera (inicio, fin) de las ventanas que cubren la query."""
+    window, step = window_plan(query_len, ref_len, memory_mb)
+    start = 0
+    while True:
+        end = min(start + window, query_len)
+        yield start, end
+        if end >= query_len:
+            return
+        start += step
+
+
+def _metrics(alignment, offset, ref_len):
+    seq_a, seq_b, score, start, end = alignment
+    matches = sum(1 for a, b in zip(seq_a[start:end], seq_b[start:end]) if a == b and a != '-')
+    alignment_length = end - start
+    # start/end del alineamiento son columnas; se reportan en coordenadas de la query
+    return {
+        'identity': matches / alignment_length if alignment_length > 0 else 0.0,
+        'coverage': alignment_length / ref_len if ref_len > 0 else 0.0,
+        'start': offset + start - seq_a[:start].count('-'),
+        'end': offset + end - seq_a[:end].count('-'),
+        'alignment_length': alignment_length,
+        'score': score,
+    }
+
+
+def align_and_score(query, ref, memory_mb=DEFAULT_MEMORY_MB):
+    """
+    Alinea query vs ref y calcula identidad, cobertura y ubicación del mejor
+    alineamiento local. Con queries grandes alinea por ventanas (ver
+    window_plan); ante empates gana la ventana más cercana al inicio.
+    """
+    best = None
+    for lo, hi in iter_windows(len(query), len(ref), memory_mb):
+        alignments = load_pairwise2().align.localms(query[lo:hi], ref, MATCH, MISMATCH, GAP_OPEN, GAP_EXTEND,
+                                             one_alignment_only=True)
+        if alignments and (best is None or alignments[0][2] > best[0][2]):
+            best = (alignments[0], lo)
+
+    if best is None:
+        return {
+            'identity': 0.0,
+            'coverage': 0.0,
+            'start': -1,
+            'end': -1,
+            'alignment_length': 0,
+            'score': 0.0,
+        }
+    return _metrics(best[0], best[1], len(ref))
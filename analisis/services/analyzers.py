@@ -1,60 +1,166 @@
-import re
-from Bio import SeqIO
-from analisis.models import ResistanceGene
-# Genes RAM simulados del documento Avance 2
-GENES_CARD = {
-    "blaTEM": "ATGAGTATTCAACATTTCCGTGTCGCCCTTATTCCCTTTTTTGCGGCATTTTGCCTTCCTGTTTTTGCTCACCCAGAAACGCTGGTGAAAGTA",
-    "aac(3)-IIa": "ATGAACAAAACTATTCCTCTGGTACGTTAGCTATCCTGATGGATAAGATGGCGGGATACG",
-    "tetA": "ATGTTGATAAAGCATTGGAATTACAGAGCGATCCTATCAACGAGGTTTTCTTGGAGTTGC",
-    "mecA": "ATGCTAAAGTTCAAAAGAGTTCACCTTTCTTTTTAGCCAGTTTCCTTATCCTGCTGGTAA"
-}
-
-def analyze_realistic(fasta_path):
+from analisis.models import ResistanceGene, MutationTarget
+from .mutations import MutationPanel
+from .reads import map_reads
+from .contigs import screen_contigs
+from .memo import screen_contigs_memo
+from .clustering import CLUSTER_IDENTITY, CLUSTER_COVERAGE, cluster_sequences
+from .engine import DEFAULT_BACKEND, get_backend
+from .priority import is_critical, split_panel
+
+def load_mutation_panel():
+    """Compila el panel de mutaciones puntuales guardado en la base de datos."""
+    targets = MutationTarget.objects.prefetch_related("mutations")
+    return MutationPanel([
+        {
+            "gene_name": t.gene_name,
+            "source": t.source,
+            "antibiotic_class": t.antibiotic_class,
+            "first_codon": t.first_codon,
+            "sequence": t.sequence,
+            "mutations": [(m.position, m.ref_aa, m.resistant_aa) for m in t.mutations.all()],
+        }
+        for t in targets
+    ])
+
+
+def cluster_reference_panel(identity=CLUSTER_IDENTITY, coverage=CLUSTER_COVERAGE):
+    """
+    Agrupa ResistanceGene por identidad y guarda el representante de cada gen.
+    Retorna (genes, clústeres).
+    """
+    genes = list(ResistanceGene.objects.only("pk", "gene_name", "sequence", "representative"))
+    assigned = cluster_sequences({g.gene_name: g.sequence for g in genes}, identity, coverage)
+    by_name = {g.gene_name: g for g in genes}
+    for g in genes:
+        g.representative = by_name[assigned[g.gene_name]]
+    # bulk_update no pasa por save(): la versión de los genes no cambia
+    ResistanceGene.objects.bulk_update(genes, ["representative"], batch_size=500)
+    return len(genes), len(set(assigned.values()))
+
+
+def _gene_row(r):
+    return r["gene"], r["matches"], r["identity"], r["coverage"], r["source"], r["class"], r["contig"], r["start"], r["end"]
+
+
+def analyze_realistic(fasta_path, genes=None, mutation_panel=None, progress=None, workers=None, gc_pct=None,
+                      search_mode="NT", checkpoint=None, backend=DEFAULT_BACKEND, priority=(), on_alert=None,
+                      sha256=None):
     """
     Pipeline bioinformático con datos reales de CARD / ResFinder.
-    Busca coincidencias en la base de datos ResistanceGene.
+    Analiza cada registro del FASTA por separado (contigs en paralelo, ver
+    contigs.screen_contigs) buscando coincidencias en ResistanceGene
+    (o solo en `genes`, si se indica) y revisando el panel de mutaciones
+    puntuales. Retorna también las mutaciones resistentes encontradas.
+    Los genes agrupados se buscan por clúster (representante primero) y se
+    reporta el mejor alelo de cada uno. search_mode="AA": búsqueda traducida
+    en seis marcos (ver protein), para variantes sinónimas y homólogos distantes.
+    backend: backend del motor de detección para la búsqueda en nucleótidos (engine).
+    progress(contigs, bases, coincidencias nuevas, (genes ya buscados, genes de
+    la pasada)): callback por lote de contigs, en las dos pasadas (prioritarios
+    y resto del panel); contigs y bases son los de la pasada en curso.
+    gc_pct: GC ya calculado (SequenceStats); el análisis no vuelve a contarlo.
+    checkpoint: punto de control del bucle de detección (budget.JobBudget).
+    priority: familias de genes prioritarios (services.priority), buscadas en
+    una primera pasada; on_alert(filas) recibe enseguida las que superan los
+    umbrales de riesgo alto, mientras sigue la búsqueda del resto del panel.
+    sha256: huella del archivo; en nucleótidos reutiliza las búsquedas ya
+    hechas sobre el mismo contenido (services.memo).
     """
-    record = next(SeqIO.parse(fasta_path, "fasta"))
-    seq = str(record.seq).upper()
-    length = len(seq)
-    gc_content = round((seq.count("G") + seq.count("C")) / length * 100, 2)
-
-    genes = ResistanceGene.objects.all()
-    results = []
-
-    for gene in genes:
-        fragment = gene.sequence[:30]
-        found = len(re.findall(fragment, seq))
-        if found > 0:
-            identity = round(min((found * len(fragment)) / length * 100, 100), 2)
-            coverage = round(len(fragment) / length * 100, 2)
-            results.append({
-                "gene": gene.gene_name,
-                "source": gene.source,
-                "class": gene.antibiotic_class,
-                "matches": found,
-                "identity": identity,
-                "coverage": coverage
-            })
+    if genes is None:
+        genes = ResistanceGene.objects.all()
+    if mutation_panel is None:
+        mutation_panel = load_mutation_panel()
+    genes = list(genes)
+    memo = sha256 is not None and search_mode == "NT"
+
+    def screen(panel, **kwargs):
+        if memo:
+            return screen_contigs_memo(fasta_path, panel, sha256, workers=workers, checkpoint=checkpoint,
+                                       backend=backend, **kwargs)
+        return screen_contigs(fasta_path, panel, workers=workers, search_mode=search_mode, checkpoint=checkpoint,
+                              backend=backend, **kwargs)
+
+    def pass_progress(done, panel):
+        if progress is None:
+            return None
+        return lambda contigs, bases, hits: progress(contigs, bases, hits, (done, len(panel)))
+
+    first, rest = split_panel(genes, priority) if priority else ([], genes)
+    results, searches, reused = [], 0, 0
+    if first:
+        screened = screen(first, progress=pass_progress(0, first))
+        results, searches, reused = screened["hits"], screened["searches"], screened.get("memo_hits", 0)
+        critical = [r for r in results if is_critical(r)]
+        if critical and on_alert:
+            on_alert([_gene_row(r) for r in critical])
+    screened = screen(rest, mutation_panel=mutation_panel if len(mutation_panel) else None,
+                      progress=pass_progress(len(first), rest))
+    length, contigs = screened["length"], screened["contigs"]
+    results, mutations = results + screened["hits"], screened["mutations"]
+    searches += screened["searches"]
+    reused += screened.get("memo_hits", 0)
+    gc_content = gc_pct if gc_pct is not None else "n/d"
+    mutation_lines = [
+        f" - {m['gene']} {m['mutation']} ({m['source']}) en {m['contig']}: clase={m['class']} | identidad del gen={m['identity']}%"
+        for m in mutations
+    ]
+    if len(mutation_panel):
+        mutation_lines.insert(0, f"Mutaciones puntuales ({len(mutation_panel)} posiciones en panel): {len(mutations)} resistente(s)")
 
     if not results:
-        summary = f"Secuencia sin coincidencias RAM (CARD/ResFinder). Longitud={length}bp, GC={gc_content}%"
-        return length, 0.0, 0.0, summary, []
+        summary = f"Secuencia sin coincidencias RAM (CARD/ResFinder). Longitud={length}bp, GC={gc_content}%, contigs={contigs}"
+        return length, 0.0, 0.0, "\n".join([summary] + mutation_lines), [], mutations
 
     identity_avg = round(sum(r["identity"] for r in results) / len(results), 2)
     coverage_avg = round(sum(r["coverage"] for r in results) / len(results), 2)
 
     summary_lines = [
-        f"Secuencia analizada: {record.id}",
+        f"Secuencia analizada: {contigs} contig(s)",
         f"Largo: {length} bp | GC: {gc_content}%",
+        f"Búsquedas de genes: {searches} (panel de {len(genes)} gen(es), "
+        f"{'aminoácidos, 6 marcos' if search_mode == 'AA' else 'nucleótidos, ' + get_backend(backend).label})",
         f"Genes RAM detectados:"
     ]
+    if memo:
+        summary_lines.insert(3, f"Memoización: {reused} de {len(genes)} gen(es) con resultado ya guardado")
     for r in results:
         summary_lines.append(
-            f" - {r['gene']} ({r['source']}): clase={r['class']} | identidad={r['identity']}% | cobertura={r['coverage']}%"
+            f" - {r['gene']} ({r['source']}) en {r['contig']}:{r['start'] + 1}-{r['end']}: clase={r['class']} | "
+            f"identidad={r['identity']}% | cobertura={r['coverage']}%"
         )
     summary_lines.append(f"Promedio global → Identidad={identity_avg}% | Cobertura={coverage_avg}%")
+    if first:
+        summary_lines.append(f"Genes prioritarios buscados primero: {len(first)} ({', '.join(priority)})")
+    summary_lines.extend(mutation_lines)
+
+    return length, identity_avg, coverage_avg, "\n".join(summary_lines), [_gene_row(r) for r in results], mutations
+
 
-    return length, identity_avg, coverage_avg, "\n".join(summary_lines), [
-        (r["gene"], r["matches"], r["identity"], r["coverage"], r["source"], r["class"]) for r in results
-    ]
\ No newline at end of file
+def analyze_reads(fastq_path, genes=None, workers=None, progress=None, checkpoint=None):
+    """
+    Modo lecturas: mapea un FASTQ (comprimido o no) contra ResistanceGene.
+    Retorna (total de lecturas, resumen, resultados por gen con
+    amplitud de cobertura y profundidad media).
+    progress(lecturas procesadas): callback opcional por bloque.
+    checkpoint: punto de control del bucle de detección (budget.JobBudget).
+    """
+    if genes is None:
+        genes = ResistanceGene.objects.all()
+    by_name = {g.gene_name: g for g in genes}
+    total_reads, results = map_reads(fastq_path, {n: g.sequence for n, g in by_name.items()}, workers=workers,
+                                     progress=progress, checkpoint=checkpoint)
+    for r in results:
+        r["source"] = by_name[r["gene"]].source
+        r["class"] = by_name[r["gene"]].antibiotic_class
+
+    summary_lines = [f"Lecturas analizadas: {total_reads}"]
+    if not results:
+        summary_lines.append("Sin lecturas asignadas a genes RAM (CARD/ResFinder).")
+    else:
+        summary_lines.append("Genes RAM con lecturas asignadas:")
+    for r in results:
+        summary_lines.append(
+            f" - {r['gene']} ({r['source']}): clase={r['class']} | lecturas={r['reads']} | "
+            f"amplitud={r['breadth']}% | profundidad media={r['mean_depth']}x | identidad≈{r['identity']}%"
+        )
+    return total_reads, "\n".join(summary_lines), results
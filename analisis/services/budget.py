@@ -0,0 +1,64 @@
+"""
+Presupuestos de tiempo y cancelación de un análisis en curso.
+
+JobBudget es el `checkpoint` que los analizadores (screen_contigs, map_reads)
+llaman dentro del bucle de detección: tras cada lote de contigs o lecturas y,
+sin pool, tras cada gen. Si se superó el tiempo de reloj o de CPU, o si
+poll() informa una cancelación, lanza la excepción correspondiente y el
+análisis se corta en ese punto.
+
+La CPU se cuenta como la del hilo del job más la que reportan los procesos
+del pool por cada lote (worker_cpu), así varios jobs en el mismo proceso no
+se cobran entre sí.
+
+No depende de Django.
+"""
+import time
+
+POLL_INTERVAL = 1.0  # segundos entre consultas de poll()
+
+
+class JobCancelled(Exception):
+    """El usuario pidió cancelar el job."""
+
+
+class BudgetExceeded(Exception):
+    """El job superó su presupuesto de tiempo de reloj o de CPU."""
+
+
+class JobBudget:
+    def __init__(self, wall_seconds=None, cpu_seconds=None, poll=None, poll_interval=POLL_INTERVAL):
+        """
+        wall_seconds / cpu_seconds: límites (None o 0 → sin límite).
+        poll(): callback opcional, como máximo cada poll_interval segundos;
+        retorna True si el job fue cancelado (también sirve de latido).
+        """
+        self.wall_seconds = wall_seconds or None
+        self.cpu_seconds = cpu_seconds or None
+        self.poll = poll
+        self.poll_interval = poll_interval
+        self._started = time.monotonic()
+        self._thread_cpu = time.thread_time()
+        self._worker_cpu = 0.0
+        self._last_poll = float("-inf")
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self._started
+
+    @property
+    def cpu(self):
+        return time.thread_time() - self._thread_cpu + self._worker_cpu
+
+    def __call__(self, worker_cpu=0.0):
+        """Punto de control: suma la CPU de un lote del pool y verifica los límites."""
+        self._worker_cpu += worker_cpu
+        if self.wall_seconds and self.elapsed > self.wall_seconds:
+            raise BudgetExceeded(f"Tiempo máximo de ejecución superado ({self.wall_seconds:g} s)")
+        if self.cpu_seconds and self.cpu > self.cpu_seconds:
+            raise BudgetExceeded(f"Tiempo máximo de CPU superado ({self.cpu_seconds:g} s)")
+        now = time.monotonic()
+        if self.poll and now - self._last_poll >= self.poll_interval:
+            self._last_poll = now
+            if self.poll():
+                raise JobCancelled("Análisis cancelado por el usuario")
@@ -0,0 +1,83 @@
+"""
+Agrupamiento del panel de referencia por identidad (estilo CD-HIT).
+
+CARD y ResFinder traen familias grandes de alelos casi idénticos (variantes
+bla, por ejemplo). Al importar el panel se agrupan: los genes se recorren de
+mayor a menor largo y cada uno se une al primer representante con el que
+alcanza CLUSTER_IDENTITY de identidad y CLUSTER_COVERAGE de cobertura; si no
+hay ninguno, queda como representante de un clúster nuevo. Antes de alinear
+se descartan los representantes que no comparten suficientes k-mers (lema de
+q-gramas: con identidad p, al menos 1 - K·(1 - p) de los k-mers coinciden).
+
+La detección busca primero los representantes y solo expande a los miembros
+de un clúster cuando su representante tiene coincidencia; se reporta el mejor
+alelo del clúster.
+
+No depende de Django.
+"""
+from .alignment import align_and_score
+
+CLUSTER_IDENTITY = 0.90
+CLUSTER_COVERAGE = 0.90
+K = 8
+
+
+def _kmers(seq, k=K):
+    return {seq[i:i + k] for i in range(len(seq) - k + 1)}
+
+
+def cluster_sequences(sequences, identity=CLUSTER_IDENTITY, coverage=CLUSTER_COVERAGE):
+    """
+    sequences: {nombre: secuencia}. Retorna {nombre: nombre del representante}
+    (cada representante se apunta a sí mismo).
+    """
+    order = sorted(sequences, key=lambda name: (-len(sequences[name]), name))
+    min_shared = max(1 - K * (1 - identity), 0)
+    representatives = []  # (nombre, secuencia, k-mers)
+    assigned = {}
+    for name in order:
+        seq = sequences[name].upper()
+        kmers = _kmers(seq)
+        candidates = []
+        for rep_name, rep_seq, rep_kmers in representatives:
+            shared = len(kmers & rep_kmers) / len(kmers) if kmers else 0.0
+            if shared >= min_shared:
+                candidates.append((shared, rep_name, rep_seq))
+        # Primero el representante más parecido por k-mers
+        for _, rep_name, rep_seq in sorted(candidates, key=lambda c: -c[0]):
+            metrics = align_and_score(rep_seq, seq)
+            if metrics["identity"] >= identity and metrics["coverage"] >= coverage:
+                assigned[name] = rep_name
+                break
+        else:
+            assigned[name] = name
+            representatives.append((name, seq, kmers))
+    return assigned
+
+
+def hierarchy(items, cluster_of, is_representative):
+    """
+    Agrupa `items` en [(representante, [miembros]), ...] en el orden de
+    entrada. cluster_of(item) → clave del clúster (None: sin agrupar).
+    Los ítems sin clúster, o cuyo representante no está en `items` (p. ej. un
+    delta del panel), se buscan solos.
+    """
+    reps = {cluster_of(i): i for i in items if cluster_of(i) is not None and is_representative(i)}
+    members = {key: [] for key in reps}
+    groups = []
+    for item in items:
+        key = cluster_of(item)
+        if key in reps and not is_representative(item):
+            members[key].append(item)
+        elif key not in reps or item is reps[key]:
+            groups.append((item, members.get(key, []) if key in reps else []))
+    return groups
+
+
+def expansion_threshold(threshold, identity=CLUSTER_IDENTITY):
+    """
+    Umbral que debe alcanzar el representante para revisar su clúster: si un
+    miembro llega a `threshold` y el representante se le parece en `identity`,
+    el representante llega al menos a threshold + identity - 1.
+    """
+    return max(threshold + identity - 1, 0.0)
@@ -0,0 +1,177 @@
+"""
+Exportación columnar (Parquet / Arrow IPC) de jobs y genes detectados.
+
+Las filas llegan de un iterador de tuplas (p. ej. values_list().iterator()),
+se agrupan en lotes de ROW_GROUP_SIZE y cada lote se convierte columna por
+columna en un RecordBatch con un esquema fijo (JOB_COLUMNS, HIT_COLUMNS):
+cada lote es un row group del Parquet o un batch del stream Arrow. La
+salida se produce a medida que se escribe (stream()), sin armar el archivo
+completo en memoria.
+
+Los textos repetidos (estado, gen, clase, fuente...) se guardan como
+diccionario (categorías en pandas) y los números sin nulos se leen en pandas
+sin copia.
+
+pyarrow figura en requirements.txt, pero se importa al usarlo: sin él, las
+funciones lanzan ColumnarUnavailable.
+
+No depende de Django.
+"""
+import itertools
+
+ROW_GROUP_SIZE = 100_000
+
+# formato → (extensión, content type)
+FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrows", "application/vnd.apache.arrow.stream"),
+}
+
+# (columna, tipo): int32/int64/float64 (nulos permitidos), string, category
+# (texto como diccionario) y timestamp (UTC, microsegundos)
+JOB_COLUMNS = (
+    ("job_id", "int64"),
+    ("sequence_id", "int64"),
+    ("sequence_name", "string"),
+    ("owner", "category"),
+    ("mode", "category"),
+    ("search_mode", "category"),
+    ("backend", "category"),
+    ("status", "category"),
+    ("risk_level", "category"),
+    ("identity_pct", "float64"),
+    ("coverage_pct", "float64"),
+    ("length_bp", "int64"),
+    ("record_count", "int64"),
+    ("peak_rss_kb", "int64"),
+    ("created_at", "timestamp"),
+    ("started_at", "timestamp"),
+    ("alert_at", "timestamp"),
+)
+
+HIT_COLUMNS = (
+    ("job_id", "int64"),
+    ("sequence_id", "int64"),
+    ("kind", "category"),
+    ("gene_name", "category"),
+    ("mutation", "category"),
+    ("source", "category"),
+    ("antibiotic_class", "category"),
+    ("classification", "category"),
+    ("matches", "int32"),
+    ("identity", "float64"),
+    ("coverage", "float64"),
+    ("mean_depth", "float64"),
+    ("contig", "string"),
+    ("start", "int64"),
+    ("end", "int64"),
+)
+
+
+class ColumnarUnavailable(RuntimeError):
+    """pyarrow no está instalado."""
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ColumnarUnavailable("La exportación Parquet/Arrow requiere pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _arrow_type(pa, kind):
+    if kind == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    if kind == "timestamp":
+        return pa.timestamp("us", tz="UTC")
+    return getattr(pa, kind)()
+
+
+def schema(columns):
+    pa = _pyarrow()
+    return pa.schema([pa.field(name, _arrow_type(pa, kind)) for name, kind in columns])
+
+
+def record_batches(rows, columns, batch_size=ROW_GROUP_SIZE):
+    """RecordBatch de hasta `batch_size` filas con el esquema de `columns`."""
+    pa = _pyarrow()
+    target = schema(columns)
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, batch_size)):
+        arrays = []
+        for values, field in zip(zip(*chunk), target):
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=target)
+
+
+class _ChunkSink:
+    """Archivo de solo escritura que acumula lo escrito hasta take()."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._size = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _writer(pa, fmt, sink, target):
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(sink, target, compression="zstd")
+    if fmt == "arrow":
+        # Formato stream: cada batch puede traer su propio diccionario
+        return pa.ipc.new_stream(sink, target)
+    raise ValueError(f"Formato no válido: {fmt} (opciones: {', '.join(FORMATS)})")
+
+
+def stream(rows, columns, fmt="parquet", batch_size=ROW_GROUP_SIZE):
+    """
+    Genera los bytes del archivo `fmt` (parquet/arrow) a medida que se
+    escribe cada lote; sirve para StreamingHttpResponse.
+    """
+    pa = _pyarrow()
+    sink = _ChunkSink()
+    writer = _writer(pa, fmt, sink, schema(columns))
+    for batch in record_batches(rows, columns, batch_size):
+        writer.write_batch(batch)
+        if data := sink.take():
+            yield data
+    writer.close()
+    yield sink.take()
+
+
+def write(rows, columns, path, fmt="parquet", batch_size=ROW_GROUP_SIZE):
+    """Escribe el archivo `fmt` en `path`. Retorna el número de filas."""
+    pa = _pyarrow()
+    target = schema(columns)
+    total = 0
+    with open(path, "wb") as f:
+        writer = _writer(pa, fmt, f, target)
+        for batch in record_batches(rows, columns, batch_size):
+            writer.write_batch(batch)
+            total += batch.num_rows
+        writer.close()
+    return total
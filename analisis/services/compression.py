@@ -0,0 +1,133 @@
+"""
+Entrada comprimida transparente (gzip, bz2, xz).
+
+El formato se detecta por los bytes mágicos del contenido, no por la
+extensión, y se descomprime como flujo: nunca se escribe una copia
+descomprimida a disco.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zlib
+
+MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+MAGIC_LEN = max(len(m) for m, _ in MAGIC)
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz")
+OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+
+class CompressionError(ValueError):
+    """Archivo comprimido dañado o truncado."""
+
+
+def detect_compression(head: bytes):
+    """Retorna "gzip", "bz2", "xz" o None según los primeros bytes."""
+    for magic, name in MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def strip_compression_suffix(filename: str) -> str:
+    """'genoma.fa.gz' → 'genoma.fa' (para validar la extensión del contenido)."""
+    lower = filename.lower()
+    for suffix in COMPRESSED_SUFFIXES:
+        if lower.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+
+def open_binary(source):
+    """
+    Abre una ruta u objeto binario y retorna un flujo binario descomprimido.
+    Los objetos recibidos se rebobinan al inicio y no se cierran al cerrar
+    el flujo descomprimido.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            kind = detect_compression(fh.read(MAGIC_LEN))
+        return OPENERS[kind](source) if kind else open(source, "rb")
+
+    source.seek(0)
+    kind = detect_compression(source.read(MAGIC_LEN))
+    source.seek(0)
+    if kind == "gzip":
+        return gzip.GzipFile(fileobj=source)
+    if kind == "bz2":
+        return bz2.BZ2File(source)
+    if kind == "xz":
+        return lzma.LZMAFile(source)
+    return source
+
+
+def open_text(source, encoding="utf-8"):
+    """Como open_binary, pero en modo texto (p. ej. para Bio.SeqIO)."""
+    return io.TextIOWrapper(open_binary(source), encoding=encoding, errors="replace")
+
+
+def _new_decompressor(kind):
+    if kind == "gzip":
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    if kind == "bz2":
+        return bz2.BZ2Decompressor()
+    return lzma.LZMADecompressor()
+
+
+class StreamDecompressor:
+    """
+    Descompresión incremental para datos que llegan por bloques (subidas).
+
+    feed(bloque) retorna los bytes descomprimidos disponibles; el contenido
+    sin comprimir pasa tal cual. Soporta archivos multi-miembro (varios gzip
+    o bz2 concatenados, como los que produce bgzip o pbzip2).
+    """
+
+    def __init__(self):
+        self.kind = None
+        self._head = b""
+        self._detected = False
+        self._decomp = None
+
+    def feed(self, chunk: bytes) -> bytes:
+        if not self._detected:
+            self._head += chunk
+            if len(self._head) < MAGIC_LEN:
+                return b""
+            chunk, self._head = self._head, b""
+            self._detect(chunk)
+        return self._decompress(chunk) if self.kind else chunk
+
+    def flush(self) -> bytes:
+        """Procesa lo pendiente al final del flujo (archivos muy cortos)."""
+        if not self._detected:
+            chunk, self._head = self._head, b""
+            self._detect(chunk)
+            return self._decompress(chunk) if self.kind else chunk
+        if self.kind and not self._decomp.eof:
+            raise CompressionError(f"Archivo {self.kind} truncado")
+        return b""
+
+    def _detect(self, head):
+        self._detected = True
+        self.kind = detect_compression(head)
+        if self.kind:
+            self._decomp = _new_decompressor(self.kind)
+
+    def _decompress(self, data):
+        out = []
+        try:
+            while data:
+                if self._decomp.eof:
+                    # Siguiente miembro de un archivo concatenado
+                    self._decomp = _new_decompressor(self.kind)
+                out.append(self._decomp.decompress(data))
+                data = self._decomp.unused_data if self._decomp.eof else b""
+        except (zlib.error, OSError, EOFError, lzma.LZMAError) as e:
+            raise CompressionError(f"Archivo {self.kind} dañado: {e}") from e
+        return b"".join(out)
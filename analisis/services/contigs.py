@@ -0,0 +1,231 @@
+"""
+Análisis por contig de ensamblados multi-registro (borradores, bins de
+metagenoma).
+
+Cada registro del FASTA se lee en flujo y se analiza como una unidad
+independiente: nunca se concatenan contigs (lo que produciría coincidencias
+falsas en los bordes). Los contigs pequeños se agrupan en lotes de hasta
+BATCH_BP bases para no pagar el costo de comunicación por cada uno, y los
+lotes se procesan en paralelo con un pool de procesos. Como máximo hay
+2 lotes en vuelo por proceso, así la memoria queda acotada por el contig más
+grande y no por el tamaño del archivo.
+
+Cada contig se busca con un backend del motor de detección (ver engine;
+"kmer" por defecto), que recorre el panel por clústeres (ver clustering): se
+busca el representante y solo si aparece se revisan los demás alelos del
+clúster, reportando el que mejor coincide. En modo "AA" la búsqueda es
+traducida (ver protein): seis marcos contra un índice de k-mers de
+aminoácidos del panel.
+
+No depende de Django.
+"""
+import os
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+
+from Bio import SeqIO
+
+from .compression import open_text
+from .engine import DEFAULT_BACKEND, create_backend, load_reference
+from .pooling import run_pooled
+from .protein import MIN_COVERAGE, MIN_IDENTITY, ProteinIndex
+
+BATCH_BP = 1_000_000
+
+def iter_records(source):
+    """
+    Genera (id del registro, secuencia en mayúsculas) de un FASTA, uno a la vez.
+    source: ruta u objeto binario (comprimido o no); los objetos no se cierran.
+    """
+    handle = open_text(source)
+    try:
+        for record in SeqIO.parse(handle, "fasta"):
+            yield record.id, str(record.seq).upper()
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            handle.close()
+        else:
+            handle.detach()
+
+
+def iter_batches(records, max_bp=BATCH_BP):
+    """Agrupa (id, secuencia) en lotes de hasta max_bp bases (un contig mayor va solo)."""
+    batch, size = [], 0
+    for contig, seq in records:
+        if batch and size + len(seq) > max_bp:
+            yield batch
+            batch, size = [], 0
+        batch.append((contig, seq))
+        size += len(seq)
+    if batch:
+        yield batch
+
+
+# ---------- trabajo por lote (se ejecuta en los procesos del pool) ----------
+
+def screen_translated(seq, index, stats=None, progress=None):
+    """
+    Búsqueda traducida de `seq` en el ProteinIndex: hits con el mismo formato
+    que screen_sequence (identidad y cobertura de la proteína, en %).
+    stats: dict opcional donde se acumula "searches" (alineamientos).
+    progress(): callback opcional tras cada alineamiento y cada marco.
+    """
+    counters = {}
+    hits = index.search(seq, MIN_IDENTITY, MIN_COVERAGE, stats=counters, progress=progress)
+    if stats is not None:
+        stats["searches"] = stats.get("searches", 0) + counters.get("alignments", 0)
+    return [dict(h, identity=round(h["identity"] * 100, 2), coverage=round(h["coverage"] * 100, 2))
+            for h in hits]
+
+
+class _RecordHits:
+    """Hits crudos ya conocidos ({gen: {registro: hit}}) vistos desde un registro: {gen: hit o None}."""
+    __slots__ = ("known", "record")
+
+    def __init__(self, known, record):
+        self.known, self.record = known, record
+
+    def __contains__(self, name):
+        return name in self.known
+
+    def __getitem__(self, name):
+        return self.known[name].get(self.record)
+
+
+_worker_detector = None
+_worker_panel = None
+_worker_known = None
+
+
+def _init_worker(detector, mutation_panel, known=None):
+    global _worker_detector, _worker_panel, _worker_known
+    _worker_detector, _worker_panel, _worker_known = detector, mutation_panel, known
+
+
+def _screen_batch(batch, detector=None, mutation_panel=None, checkpoint=None, known=None, offset=0):
+    """
+    Analiza cada contig del lote por separado con `detector` (backend del
+    motor, o ProteinIndex para la búsqueda traducida). Retorna (contigs,
+    bases, coincidencias, mutaciones, búsquedas, segundos de CPU, memo), con
+    el id del contig en cada resultado.
+    checkpoint(): callback opcional tras cada contig y cada clúster, o cada
+    alineamiento en la búsqueda traducida (sin pool).
+    known: hits crudos ya conocidos por número de registro en el archivo
+    (ver screen_contigs); offset: número del primer registro del lote. Con
+    known, memo es (hits crudos de los genes buscados con su "record",
+    {gen: registros en que se buscó}, registros no vacíos); si no, None.
+    """
+    detector = detector if detector is not None else _worker_detector
+    mutation_panel = mutation_panel if mutation_panel is not None else _worker_panel
+    known = known if known is not None else _worker_known
+    cpu_start = time.thread_time()
+    tick = (lambda gene, hit: checkpoint()) if checkpoint else None
+    hits, mutations, bases, stats = [], [], 0, {}
+    raw, searched, records = [], Counter(), 0
+    for record, (contig, seq) in enumerate(batch, start=offset):
+        bases += len(seq)
+        if not seq:
+            continue
+        if isinstance(detector, ProteinIndex):
+            found = screen_translated(seq, detector, stats=stats, progress=checkpoint)
+        elif known is not None:
+            screened = {}
+            found = detector.search(seq, progress=tick, stats=stats, known=_RecordHits(known, record),
+                                    screened=screened)
+            raw.extend(dict(hit, record=record) for hit in screened.values() if hit is not None)
+            searched.update(screened.keys())
+            records += 1
+        else:
+            found = detector.search(seq, progress=tick, stats=stats)
+        hits.extend(dict(r, contig=contig) for r in found)
+        if mutation_panel is not None:
+            mutations.extend(dict(m, contig=contig) for m in mutation_panel.scan(seq) if m["resistant"])
+        if checkpoint:
+            checkpoint()
+    memo = (raw, searched, records) if known is not None else None
+    return len(batch), bases, hits, mutations, stats.get("searches", 0), time.thread_time() - cpu_start, memo
+
+
+def screen_contigs(source, genes, mutation_panel=None, workers=None, batch_bp=BATCH_BP, progress=None,
+                   search_mode="NT", checkpoint=None, backend=DEFAULT_BACKEND, known=None, **backend_options):
+    """
+    Analiza todos los registros de `source` contra `genes` (RefGene u objetos
+    con los mismos atributos) y, si se indica, el panel de mutaciones.
+
+    search_mode: "NT" (nucleótidos) o "AA" (traducida, seis marcos).
+    backend: backend del motor para la búsqueda en nucleótidos (engine),
+    con sus opciones (umbrales, banda...) en backend_options.
+    workers: procesos del pool (None → CPUs disponibles; 1 → sin pool).
+    progress(contigs, bases, coincidencias nuevas): callback opcional por lote.
+    checkpoint(worker_cpu=0.0): callback opcional (p. ej. budget.JobBudget)
+    tras cada lote del pool, con la CPU que usó, y cada segundo mientras
+    espera uno (ver pooling), o sin pool tras cada contig y clúster
+    (alineamiento en modo "AA"); si lanza una excepción el análisis se
+    detiene ahí y se descartan los lotes pendientes, sin esperar a los que
+    están en ejecución.
+    known: {gen: {registro: hit crudo}} de los genes con resultado ya
+    guardado (ver memo), por número de registro en el FASTA (base 0); no se
+    vuelven a buscar. Solo búsqueda en nucleótidos. El resultado trae además
+    screened: {gen: hits crudos con "record"} de los genes buscados en todos
+    los registros (sin umbrales; los que la poda por clúster omitió en alguno
+    no están).
+
+    Retorna un dict con: contigs, length, hits y mutations
+    (resistentes), cada resultado con su "contig", y searches (genes
+    buscados en total; menos que contigs × genes cuando hay clústeres; en
+    modo "AA", alineamientos de regiones con semillas; con "aho", una
+    pasada por contig).
+    """
+    workers = workers or os.cpu_count() or 1
+    genes = load_reference(genes)
+    if search_mode == "AA":
+        detector, known = ProteinIndex(genes), None
+    else:
+        detector = create_backend(backend, genes, **backend_options)
+    total = {"contigs": 0, "length": 0, "hits": [], "mutations": [], "searches": 0}
+    # Con known: hits crudos por gen, registros en que se buscó cada gen y registros no vacíos
+    raw, searched, records = defaultdict(list), Counter(), 0
+
+    def merge(result, pooled=False):
+        nonlocal records
+        n, bases, hits, mutations, searches, cpu, memo = result
+        if memo is not None:
+            for hit in memo[0]:
+                raw[hit["gene"]].append(hit)
+            searched.update(memo[1])
+            records += memo[2]
+        total["contigs"] += n
+        total["length"] += bases
+        total["searches"] += searches
+        total["hits"].extend(hits)
+        total["mutations"].extend(mutations)
+        if progress:
+            progress(total["contigs"], total["length"], hits)
+        if checkpoint and pooled:
+            checkpoint(cpu)
+
+    batches = iter_batches(iter_records(source), batch_bp)
+    # Con un solo lote (genoma pequeño o de un contig) no vale la pena el pool.
+    # El paralelismo es por lotes de contigs: un genoma de un único contig
+    # grande se analiza en un solo proceso
+    head = [b for b in (next(batches, None), next(batches, None)) if b is not None]
+    batches = chain(head, batches)
+    if workers == 1 or len(head) < 2:
+        offset = 0
+        for batch in batches:
+            merge(_screen_batch(batch, detector, mutation_panel, checkpoint, known, offset))
+            offset += len(batch)
+    else:
+        def tasks():
+            offset = 0
+            for batch in batches:
+                yield (batch,), {"offset": offset}
+                offset += len(batch)
+
+        run_pooled(_screen_batch, tasks(), lambda result: merge(result, pooled=True), workers,
+                   initializer=_init_worker, initargs=(detector, mutation_panel, known), checkpoint=checkpoint)
+    if known is not None:
+        total["screened"] = {g.gene_name: raw[g.gene_name] for g in genes
+                             if g.gene_name not in known and searched[g.gene_name] == records}
+    return total
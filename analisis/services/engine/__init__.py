@@ -0,0 +1,20 @@
+"""
+Motor de detección de genes RAM compartido por Django y la app Streamlit.
+
+- reference: panel común (RefGene, load_reference) a partir de
+  ResistanceGene o de la REF_DB de la app.
+- hits: esquema común de los resultados (HIT_FIELDS, make_hit).
+- registry: registro de backends; create_backend(nombre, genes, ...) y
+  backend.search(secuencia).
+
+Backends registrados: "kmer" (semilla exacta, el de siempre), "aho"
+(Aho-Corasick: mismos hits en una pasada por contig), "banded"
+(semillas k-mer + Smith-Waterman en banda) y "pairwise2" (Smith-Waterman
+completo, referencia). benchmark.run_benchmark los compara.
+
+No depende de Django.
+"""
+from .hits import HIT_FIELDS, make_hit
+from .reference import RefGene, load_reference, ref_gene
+from .registry import BACKENDS, DEFAULT_BACKEND, Backend, backend_choices, create_backend, get_backend, register
+from . import kmer, aho, banded, pairwise  # noqa: F401  (registran sus backends)
@@ -0,0 +1,88 @@
+"""
+Backend "aho": las semillas de todo el panel en una sola pasada
+(Aho-Corasick).
+
+Mismos hits que el backend "kmer", pero la secuencia se recorre una vez por
+contig en lugar de una vez por gen: con paneles de miles de genes (CARD) la
+búsqueda deja de crecer con el tamaño del panel. El autómata se compila como
+un DFA completo (transiciones con los enlaces de falla ya resueltos) sobre
+el alfabeto de las semillas; cualquier otro carácter vuelve a la raíz.
+
+No depende de Django.
+"""
+from collections import deque
+
+from .kmer import ExactKmerBackend, seed
+from .registry import register
+
+
+def build_automaton(patterns):
+    """
+    DFA de Aho-Corasick para `patterns` (cadenas no vacías).
+    Retorna (alfabeto {carácter: código}, transiciones [estado][código],
+    salidas [estado] → patrones que terminan ahí).
+    """
+    alphabet = {c: i for i, c in enumerate(sorted({c for p in patterns for c in p}))}
+    goto, outputs = [{}], [[]]
+    for pattern in patterns:
+        state = 0
+        for c in pattern:
+            code = alphabet[c]
+            if code not in goto[state]:
+                goto.append({})
+                outputs.append([])
+                goto[state][code] = len(goto) - 1
+            state = goto[state][code]
+        outputs[state].append(pattern)
+
+    # Completar transiciones por anchura con los enlaces de falla
+    delta = [[0] * len(alphabet) for _ in goto]
+    fail = [0] * len(goto)
+    queue = deque()
+    for code, child in goto[0].items():
+        delta[0][code] = child
+        queue.append(child)
+    while queue:
+        state = queue.popleft()
+        outputs[state] = outputs[state] + outputs[fail[state]]
+        for code in range(len(alphabet)):
+            child = goto[state].get(code)
+            if child is None:
+                delta[state][code] = delta[fail[state]][code]
+            else:
+                fail[child] = delta[fail[state]][code]
+                delta[state][code] = child
+                queue.append(child)
+    return alphabet, delta, outputs
+
+
+@register
+class AhoCorasickBackend(ExactKmerBackend):
+    name = "aho"
+    label = "Aho-Corasick (semillas del panel en una pasada)"
+    single_pass = True
+
+    def __init__(self, genes, **options):
+        super().__init__(genes, **options)
+        patterns = sorted({seed(g) for g in self.genes if g.sequence})
+        self.alphabet, self.delta, self.outputs = build_automaton(patterns)
+
+    def prepare(self, seq):
+        """{semilla: inicios sin solapamiento} de todas las semillas en `seq`."""
+        # Códigos por carácter; fuera del alfabeto → estado raíz (None)
+        codes = [self.alphabet.get(c) for c in seq]
+        delta, outputs = self.delta, self.outputs
+        found, next_free = {}, {}
+        state = 0
+        for end, code in enumerate(codes, start=1):
+            state = 0 if code is None else delta[state][code]
+            for pattern in outputs[state]:
+                start = end - len(pattern)
+                # Como re.finditer: una aparición no puede solapar la anterior
+                if start >= next_free.get(pattern, 0):
+                    found.setdefault(pattern, []).append(start)
+                    next_free[pattern] = end
+        return found
+
+    def positions(self, seq, gene, context):
+        return context.get(seed(gene), [])
@@ -0,0 +1,195 @@
+"""
+Backend "banded": semillas de k-mers y Smith-Waterman en banda.
+
+El panel se indexa una vez por k-mers de SEED_K nucleótidos (códigos
+enteros ordenados, como protein.ProteinIndex). Cada k-mer de la query
+compartido con un gen vota por su diagonal (posición en la query menos
+posición en el gen); la diagonal más votada de cada gen con al menos
+MIN_SEEDS semillas se alinea con Smith-Waterman de gaps afines restringido a
+una banda de ±BAND bases alrededor de ella. El costo por gen candidato es
+largo del gen × (2·BAND + 1) celdas, en lugar de largo del gen × largo de la
+query; los genes sin semillas no se alinean.
+
+No depende de Django.
+"""
+import numpy as np
+
+from ..alignment import GAP_EXTEND, GAP_OPEN, MATCH, MISMATCH
+from ..mutations import encode
+from .hits import make_hit
+from .registry import Backend, register
+
+SEED_K = 16
+MIN_SEEDS = 3
+BAND = 16
+_NEG = -(1 << 30)
+
+
+def kmer_codes(seq, k=SEED_K):
+    """Códigos de los k-mers de nucleótidos y su posición (se omiten los que tienen bases ambiguas)."""
+    codes = encode(seq)
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    invalid = np.concatenate([[0], np.cumsum(codes > 3)])
+    ok = invalid[k:] - invalid[:-k] == 0
+    values = np.zeros(n, dtype=np.int64)
+    for j in range(k):
+        values = values * 4 + np.minimum(codes[j:j + n], 3)
+    positions = np.flatnonzero(ok)
+    return values[positions], positions
+
+
+def banded_align(query, ref, diagonal, band=BAND):
+    """
+    Smith-Waterman local (gaps afines, mismo esquema que alignment) de ref
+    contra query, limitado a las celdas con |j - i - diagonal| <= band
+    (i: posición en ref, j: en query). Retorna (puntaje, idénticas,
+    columnas, inicio y fin en query, inicio y fin en ref) o None.
+    """
+    n, m, width = len(ref), len(query), 2 * band + 1
+    rows_h, rows_e, rows_f = [None], [None], [None]
+    best = (0, 0, 0)
+    for i in range(1, n + 1):
+        base = i + diagonal - band  # columna j de la celda k de la fila: base + k
+        lo, hi = max(1, base), min(m, base + width - 1)
+        h_row, e_row, f_row = [_NEG] * width, [_NEG] * width, [_NEG] * width
+        h_up, f_up = rows_h[i - 1], rows_f[i - 1]
+        rc = ref[i - 1]
+        h_left = 0 if lo == 1 else _NEG
+        e = _NEG
+        for j in range(lo, hi + 1):
+            k = j - base
+            if i == 1 or j == 1:
+                h_diag = 0
+            else:
+                h_diag = h_up[k]
+            if i == 1:
+                hu, fu = 0, _NEG
+            elif k + 1 < width:
+                hu, fu = h_up[k + 1], f_up[k + 1]
+            else:
+                hu, fu = _NEG, _NEG
+            e = max(h_left + GAP_OPEN, e + GAP_EXTEND)
+            f = max(hu + GAP_OPEN, fu + GAP_EXTEND)
+            h = max(0, h_diag + (MATCH if rc == query[j - 1] else MISMATCH), e, f)
+            h_row[k], e_row[k], f_row[k] = h, e, f
+            h_left = h
+            if h > best[0]:
+                best = (h, i, j)
+        rows_h.append(h_row)
+        rows_e.append(e_row)
+        rows_f.append(f_row)
+
+    score, i, j = best
+    if score <= 0:
+        return None
+
+    def cell(rows, i, j, edge):
+        if i == 0 or j == 0:
+            return edge
+        k = j - (i + diagonal - band)
+        return rows[i][k] if 0 <= k < width and j <= m else _NEG
+
+    # Traceback desde la mejor celda
+    end_i, end_j = i, j
+    identical = columns = 0
+    state = "H"
+    while i > 0 and j > 0:
+        if state == "H":
+            h = cell(rows_h, i, j, 0)
+            if h == 0:
+                break
+            s = MATCH if ref[i - 1] == query[j - 1] else MISMATCH
+            if cell(rows_h, i - 1, j - 1, 0) + s == h:
+                identical += ref[i - 1] == query[j - 1]
+                columns += 1
+                i, j = i - 1, j - 1
+            elif h == cell(rows_e, i, j, _NEG):
+                state = "E"
+            else:
+                state = "F"
+        elif state == "E":  # gap en ref: consume una base de la query
+            if cell(rows_h, i, j - 1, 0) + GAP_OPEN == cell(rows_e, i, j, _NEG):
+                state = "H"
+            columns += 1
+            j -= 1
+        else:  # gap en query: consume una base de ref
+            if cell(rows_h, i - 1, j, 0) + GAP_OPEN == cell(rows_f, i, j, _NEG):
+                state = "H"
+            columns += 1
+            i -= 1
+    return score, identical, columns, j, end_j, i, end_i
+
+
+@register
+class BandedSWBackend(Backend):
+    name = "banded"
+    label = "Smith-Waterman en banda (semillas k-mer)"
+    min_identity = 0.80
+    min_coverage = 0.60
+
+    def __init__(self, genes, band=BAND, **options):
+        super().__init__(genes, **options)
+        self.band = band
+        codes, gene_ids, positions = [], [], []
+        for i, gene in enumerate(self.genes):
+            c, p = kmer_codes(gene.sequence.upper())
+            codes.append(c)
+            positions.append(p)
+            gene_ids.append(np.full(len(c), i, dtype=np.int64))
+        empty = [np.empty(0, np.int64)]
+        order = np.argsort(np.concatenate(codes or empty), kind="stable")
+        self._codes = np.concatenate(codes or empty)[order]
+        self._gene = np.concatenate(gene_ids or empty)[order]
+        self._pos = np.concatenate(positions or empty)[order]
+        self.max_len = max((len(g.sequence) for g in self.genes), default=0)
+        self._index = {g.gene_name: i for i, g in enumerate(self.genes)}
+
+    def prepare(self, seq):
+        """{índice del gen: (semillas, diagonal)} con la diagonal más votada de cada gen."""
+        q_codes, q_pos = kmer_codes(seq)
+        left = np.searchsorted(self._codes, q_codes, "left")
+        counts = np.searchsorted(self._codes, q_codes, "right") - left
+        total = int(counts.sum())
+        if not total:
+            return {}
+        starts = np.repeat(left - (np.cumsum(counts) - counts), counts)
+        ref_idx = np.arange(total) + starts
+        genes = self._gene[ref_idx]
+        diagonals = np.repeat(q_pos, counts) - self._pos[ref_idx]
+        modulus = len(seq) + 2 * self.max_len + 1
+        keys, votes = np.unique(genes * modulus + diagonals + self.max_len, return_counts=True)
+        best = {}
+        for key, n in zip(keys[votes >= MIN_SEEDS], votes[votes >= MIN_SEEDS]):
+            gene, diagonal = divmod(int(key), modulus)
+            if n > best.get(gene, (0, 0))[0]:
+                best[gene] = (int(n), diagonal - self.max_len)
+        return best
+
+    def screen_gene(self, seq, gene, context):
+        candidate = context.get(self._index[gene.gene_name])
+        if candidate is None:
+            return None
+        votes, diagonal = candidate
+        ref = gene.sequence.upper()
+        lo = max(diagonal - self.band, 0)
+        hi = min(diagonal + len(ref) + self.band, len(seq))
+        aligned = banded_align(seq[lo:hi], ref, diagonal - lo, self.band)
+        if aligned is None:
+            return None
+        score, identical, columns, q_start, q_end, r_start, r_end = aligned
+        return make_hit(gene, votes, identical / columns if columns else 0.0, (r_end - r_start) / len(ref),
+                        lo + q_start, lo + q_end, score=score)
+
+    def params(self):
+        return {"k": SEED_K, "min_seeds": MIN_SEEDS, "band": self.band,
+                "scoring": [MATCH, MISMATCH, GAP_OPEN, GAP_EXTEND]}
+
+    def searched(self, gene, context):
+        # Solo se alinean los genes con semillas
+        return self._index[gene.gene_name] in context
+
+    def expand(self, seq, hit, members, context):
+        # Los alelos sin semillas no se alinean: revisar siempre el clúster es barato
+        return True
@@ -0,0 +1,46 @@
+"""
+Comparación de backends sobre las mismas secuencias y el mismo panel.
+
+Para cada backend mide el tiempo de construcción (índices, autómata) y de
+búsqueda, las búsquedas hechas y los genes detectados, y compara los genes
+detectados con los del backend de referencia (el primero de la lista):
+sensibilidad (genes de la referencia que también detecta) y genes extra.
+
+No depende de Django.
+"""
+import time
+
+from .registry import create_backend
+
+
+def run_benchmark(records, genes, backends, repeat=1, **options):
+    """
+    records: [(contig, secuencia en mayúsculas)]; genes: RefGene del panel.
+    backends: nombres registrados; el primero es la referencia.
+    Retorna una fila (dict) por backend, con los mejores tiempos de `repeat`.
+    """
+    rows = []
+    reference = None
+    for name in backends:
+        build_s = search_s = float("inf")
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            backend = create_backend(name, genes, **options)
+            built = time.perf_counter()
+            stats, found = {}, set()
+            for contig, seq in records:
+                found.update((contig, h["gene"]) for h in backend.search(seq, stats=stats))
+            build_s = min(build_s, built - started)
+            search_s = min(search_s, time.perf_counter() - built)
+        if reference is None:
+            reference = found
+        rows.append({
+            "backend": name,
+            "build_s": round(build_s, 4),
+            "search_s": round(search_s, 4),
+            "searches": stats.get("searches", 0),
+            "hits": len(found),
+            "recall": round(len(found & reference) / len(reference), 3) if reference else 1.0,
+            "extra": len(found - reference),
+        })
+    return rows
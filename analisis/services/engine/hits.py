@@ -0,0 +1,26 @@
+"""
+Esquema común de los hits de todos los backends.
+
+Un hit es un dict con HIT_FIELDS: gene, source, class (del RefGene),
+matches (semillas o bases idénticas, según el backend), identity y coverage (%, redondeados a 2 decimales) y start/end
+(base 0, fin exclusivo, en la secuencia analizada). Los backends pueden
+agregar claves propias (score, strand, frame).
+
+No depende de Django.
+"""
+HIT_FIELDS = ("gene", "source", "class", "matches", "identity", "coverage", "start", "end")
+
+
+def make_hit(gene, matches, identity, coverage, start, end, **extra):
+    """Hit de `gene` (RefGene); identity y coverage como fracción 0-1."""
+    return {
+        "gene": gene.gene_name,
+        "source": gene.source,
+        "class": gene.antibiotic_class,
+        "matches": matches,
+        "identity": round(identity * 100, 2),
+        "coverage": round(coverage * 100, 2),
+        "start": start,
+        "end": end,
+        **extra,
+    }
@@ -0,0 +1,82 @@
+"""
+Backend "kmer": búsqueda exacta de la semilla de cada gen.
+
+Es la detección original de la plataforma: se buscan las apariciones (sin
+solapamiento) de los primeros SEED_BP nucleótidos del gen y, a partir de
+cada una, la región del largo del gen (recortada al final de la secuencia).
+El hit es la región con más bases idénticas al gen: matches son esas bases,
+identity su fracción de la región comparada y coverage la del gen que cubre
+la región, como en los backends que alinean, así los mismos umbrales sirven
+para todos. Entre alelos de un clúster gana el de más bases idénticas.
+
+Los clústeres se arman al 90 % de identidad, y una semilla exacta no tolera
+ni una sustitución: un alelo puede conservar su semilla aunque la del
+representante no aparezca. Por eso el clúster se revisa completo si aparece
+la semilla de cualquiera de sus alelos; las apariciones de cada semilla se
+buscan una sola vez por secuencia (SeedScan).
+
+No depende de Django.
+"""
+import re
+
+from .hits import make_hit
+from .registry import Backend, register
+
+SEED_BP = 30
+
+
+def seed(gene):
+    return gene.sequence[:SEED_BP]
+
+
+class SeedScan(dict):
+    """{semilla: inicios} de las semillas ya buscadas en una secuencia; scans: búsquedas hechas."""
+    scans = 0
+
+
+@register
+class ExactKmerBackend(Backend):
+    name = "kmer"
+    label = "k-mer exacto (semilla)"
+
+    def prepare(self, seq):
+        return SeedScan()
+
+    def positions(self, seq, gene, context):
+        """Inicios de las apariciones de la semilla del gen."""
+        fragment = seed(gene)
+        if fragment not in context:
+            context[fragment] = [m.start() for m in re.finditer(fragment, seq)]
+            context.scans += 1
+        return context[fragment]
+
+    def expand(self, seq, hit, members, context):
+        return hit is not None or any(self.positions(seq, m, context) for m in members)
+
+    def count_searches(self, context, searches):
+        return context.scans
+
+    def screen_gene(self, seq, gene, context):
+        positions = self.positions(seq, gene, context) if gene.sequence else []
+        if not positions:
+            return None
+        best, best_start = -1, None
+        for start in positions:
+            identical = self.identical(seq, gene, start)
+            if identical > best:
+                best, best_start = identical, start
+        end = min(best_start + len(gene.sequence), len(seq))
+        return make_hit(gene, best, best / (end - best_start), (end - best_start) / len(gene.sequence),
+                        best_start, end)
+
+    def identical(self, seq, gene, start):
+        """Bases idénticas al gen en la región que empieza en `start`."""
+        region = seq[start:start + len(gene.sequence)]
+        return sum(a == b for a, b in zip(region, gene.sequence))
+
+    def params(self):
+        return {"seed_bp": SEED_BP}
+
+    def rank(self, seq, gene, hit):
+        # Bases del alelo completo que coinciden en la región encontrada
+        return hit["matches"]
@@ -0,0 +1,41 @@
+"""
+Backend "pairwise2": alineamiento local completo de cada gen contra la
+secuencia (alignment.align_and_score, por ventanas con presupuesto de
+memoria). Es la referencia de exactitud de la app Streamlit y el más lento:
+sirve para comparar los demás backends.
+
+No depende de Django.
+"""
+from ..alignment import DEFAULT_MEMORY_MB, GAP_EXTEND, GAP_OPEN, MATCH, MISMATCH, align_and_score
+from ..clustering import CLUSTER_COVERAGE, expansion_threshold
+from .hits import make_hit
+from .registry import Backend, register
+
+
+@register
+class Pairwise2Backend(Backend):
+    name = "pairwise2"
+    label = "pairwise2 (Smith-Waterman completo, referencia)"
+    min_identity = 0.80
+    min_coverage = 0.60
+
+    def __init__(self, genes, memory_mb=DEFAULT_MEMORY_MB, **options):
+        super().__init__(genes, **options)
+        self.memory_mb = memory_mb
+        # Umbral que debe alcanzar el representante para revisar su clúster
+        self.gate_identity = expansion_threshold(self.min_identity)
+        self.gate_coverage = expansion_threshold(self.min_coverage, CLUSTER_COVERAGE)
+
+    def screen_gene(self, seq, gene, context):
+        metrics = align_and_score(seq, gene.sequence, self.memory_mb)
+        if metrics["alignment_length"] == 0:
+            return None
+        return make_hit(gene, round(metrics["identity"] * metrics["alignment_length"]), metrics["identity"],
+                        metrics["coverage"], metrics["start"], metrics["end"], score=metrics["score"])
+
+    def params(self):
+        return {"memory_mb": self.memory_mb, "scoring": [MATCH, MISMATCH, GAP_OPEN, GAP_EXTEND]}
+
+    def expand(self, seq, hit, members, context):
+        return (hit is not None and hit["identity"] >= self.gate_identity * 100
+                and hit["coverage"] >= self.gate_coverage * 100)
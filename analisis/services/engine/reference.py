@@ -0,0 +1,45 @@
+"""
+Panel de referencia común a todos los backends.
+
+Los genes viajan como RefGene (sin ORM, se envían a los procesos del pool).
+load_reference() acepta las formas de panel que usan los front ends:
+ResistanceGene (Django), la REF_DB de la app Streamlit
+({gen: {'seq', 'antibiotic_class', ...}}) o un dict {gen: secuencia}.
+
+No depende de Django.
+"""
+from collections import namedtuple
+
+# cluster: clave del clúster (None: sin agrupar); representative: si lo encabeza
+RefGene = namedtuple("RefGene", "gene_name sequence source antibiotic_class cluster representative",
+                     defaults=(None, True))
+
+
+def ref_gene(gene):
+    """RefGene a partir de un ResistanceGene (u objeto con los mismos atributos)."""
+    if isinstance(gene, RefGene):
+        return gene
+    cluster = getattr(gene, "representative_id", None)
+    return RefGene(gene.gene_name, gene.sequence, gene.source, gene.antibiotic_class,
+                   cluster, cluster is None or cluster == getattr(gene, "pk", None))
+
+
+def load_reference(panel, clusters=None, source="REF_DB"):
+    """
+    Lista de RefGene a partir de `panel`: iterable de ResistanceGene/RefGene,
+    o dict {gen: datos} con datos = secuencia o dict con 'seq' (y
+    opcionalmente 'antibiotic_class' y 'source').
+    clusters: {gen: representante} (clustering.cluster_sequences) para los
+    paneles en dict; los ResistanceGene ya traen su representante.
+    """
+    if not isinstance(panel, dict):
+        return [ref_gene(g) for g in panel]
+    clusters = clusters or {}
+    genes = []
+    for name, data in panel.items():
+        if isinstance(data, str):
+            data = {"seq": data}
+        cluster = clusters.get(name)
+        genes.append(RefGene(name, data["seq"].upper(), data.get("source", source),
+                             data.get("antibiotic_class", ""), cluster, cluster is None or cluster == name))
+    return genes
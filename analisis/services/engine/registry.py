@@ -0,0 +1,157 @@
+"""
+Registro de backends de detección y comportamiento común.
+
+Un backend se construye con el panel (RefGene) y sus opciones, y
+search(seq) retorna los hits (ver hits) de una secuencia en mayúsculas.
+Las instancias se envían a los procesos del pool, así que deben poder
+serializarse con pickle.
+
+Backend.search() recorre el panel por clústeres (ver clustering): busca el
+representante con screen_gene() y, si expand() lo permite, los demás
+alelos; del clúster se reporta el hit aceptado (accept) de mayor rank().
+Los backends que buscan todo el panel de una vez sobrescriben search() o
+prepare().
+
+Para la memoización (services.memo) search() recibe los resultados crudos
+ya conocidos de algunos genes (known), que no se vuelven a buscar, y anota
+los de los genes que sí buscó (screened), antes de umbrales y clústeres: la
+poda por clúster es la misma con o sin memo. params() identifica los
+parámetros de puntuación que cambian el resultado crudo.
+
+No depende de Django.
+"""
+from ..clustering import hierarchy
+
+DEFAULT_BACKEND = "kmer"
+BACKENDS = {}
+
+
+def register(cls):
+    """Decorador: registra el backend por su `name`."""
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+def get_backend(name):
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Backend de detección desconocido: {name!r} "
+                         f"(disponibles: {', '.join(BACKENDS)})") from None
+
+
+def create_backend(name, genes, **options):
+    """Instancia el backend `name` para el panel `genes`."""
+    return get_backend(name)(genes, **options)
+
+
+def backend_choices():
+    """[(nombre, etiqueta)] de los backends registrados."""
+    return [(name, cls.label) for name, cls in BACKENDS.items()]
+
+
+class Backend:
+    name = ""
+    label = ""
+    # Umbrales por defecto (fracción 0-1); sobre identity/coverage del hit
+    min_identity = 0.0
+    min_coverage = 0.0
+    # True: una pasada por secuencia cuenta como una búsqueda (stats["searches"])
+    single_pass = False
+
+    def __init__(self, genes, min_identity=None, min_coverage=None, **options):
+        """
+        genes: RefGene del panel (reference.load_reference).
+        Las opciones que el backend no usa se ignoran, así los front ends
+        pueden pasar las mismas a cualquiera.
+        """
+        self.genes = list(genes)
+        if min_identity is not None:
+            self.min_identity = min_identity
+        if min_coverage is not None:
+            self.min_coverage = min_coverage
+        self.groups = hierarchy(self.genes, lambda g: g.cluster, lambda g: g.representative)
+
+    def __len__(self):
+        return len(self.genes)
+
+    # ---------- a implementar por cada backend ----------
+
+    def screen_gene(self, seq, gene, context):
+        """Mejor coincidencia de `gene` en `seq` (hit, aún sin umbrales) o None."""
+        raise NotImplementedError
+
+    def prepare(self, seq):
+        """Trabajo compartido por todos los genes de una secuencia (contexto de screen_gene)."""
+        return None
+
+    def searched(self, gene, context):
+        """Si screen_gene() hace trabajo para `gene` (cuenta en stats["searches"])."""
+        return True
+
+    def expand(self, seq, hit, members, context):
+        """Si el hit del representante (o None) justifica revisar los demás alelos del clúster."""
+        return hit is not None
+
+    def count_searches(self, context, searches):
+        """Búsquedas hechas en una secuencia (stats["searches"]); por defecto, las de searched()."""
+        return searches
+
+    def rank(self, seq, gene, hit):
+        """Orden entre alelos del mismo clúster (mayor es mejor)."""
+        return (hit["identity"], hit["coverage"])
+
+    def accept(self, hit):
+        return (hit is not None and hit["identity"] >= self.min_identity * 100
+                and hit["coverage"] >= self.min_coverage * 100)
+
+    def params(self):
+        """Parámetros de puntuación (JSON) que determinan el resultado crudo de screen_gene()."""
+        return {}
+
+    # ---------- búsqueda ----------
+
+    def search(self, seq, progress=None, stats=None, known=None, screened=None):
+        """
+        Hits de los genes del panel en `seq`, uno por clúster.
+        progress(gen, hit o None): callback opcional tras cada clúster.
+        stats: dict opcional donde se acumula "searches".
+        known: {nombre del gen: hit crudo o None} ya conocidos en `seq`; esos
+        genes no se vuelven a buscar.
+        screened: dict opcional donde se anota {nombre del gen: hit crudo o
+        None} de cada gen buscado (los que la poda por clúster omite no están).
+        """
+        context = self.prepare(seq)
+        results = []
+        searches = 0
+
+        def screen(gene):
+            nonlocal searches
+            if known is not None and gene.gene_name in known:
+                return known[gene.gene_name]
+            searches += self.searched(gene, context)
+            hit = self.screen_gene(seq, gene, context)
+            if screened is not None:
+                screened[gene.gene_name] = hit
+            return hit
+
+        for rep, members in self.groups:
+            hit = screen(rep)
+            best = hit if self.accept(hit) else None
+            best_rank = self.rank(seq, rep, best) if best else None
+            if members and self.expand(seq, hit, members, context):
+                for member in members:
+                    hit = screen(member)
+                    if not self.accept(hit):
+                        continue
+                    score = self.rank(seq, member, hit)
+                    if best is None or score > best_rank:
+                        best, best_rank = hit, score
+            if best is not None:
+                results.append(best)
+            if progress:
+                progress(rep, best)
+        if stats is not None:
+            stats["searches"] = (stats.get("searches", 0)
+                                 + (1 if self.single_pass else self.count_searches(context, searches)))
+        return results
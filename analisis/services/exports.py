@@ -0,0 +1,39 @@
+"""
+Filas de jobs y genes detectados para la exportación columnar
+(services.columnar), leídas de la base con values_list().iterator(): no se
+instancian modelos ni se carga el resultado completo en memoria.
+
+El orden de los campos sigue a JOB_COLUMNS / HIT_COLUMNS.
+"""
+from analisis.models import DetectedGene
+from .columnar import HIT_COLUMNS, JOB_COLUMNS, ROW_GROUP_SIZE
+
+JOB_FIELDS = (
+    "pk", "sequence_id", "sequence__name", "sequence__owner__username", "mode", "search_mode", "backend",
+    "status", "risk_level", "identity_pct", "coverage_pct", "sequence__length_bp", "sequence__record_count",
+    "peak_rss_kb", "created_at", "started_at", "alert_at",
+)
+HIT_FIELDS = (
+    "job_id", "job__sequence_id", "kind", "gene_name", "mutation", "source", "antibiotic_class", "classification",
+    "matches", "identity", "coverage", "mean_depth", "contig", "start", "end",
+)
+
+
+def job_rows(jobs):
+    """Filas de los jobs de `jobs` (queryset de AnalysisJob), en su orden."""
+    return jobs.values_list(*JOB_FIELDS).iterator(chunk_size=ROW_GROUP_SIZE)
+
+
+def hit_rows(jobs):
+    """Filas de los genes y mutaciones detectados en los jobs de `jobs`."""
+    return (DetectedGene.objects.filter(job__in=jobs.order_by().values("pk"))
+            .order_by("job_id", "pk")
+            .values_list(*HIT_FIELDS)
+            .iterator(chunk_size=ROW_GROUP_SIZE))
+
+
+# export → (columnas, función que da las filas a partir de un queryset de jobs)
+EXPORTS = {
+    "jobs": (JOB_COLUMNS, job_rows),
+    "hits": (HIT_COLUMNS, hit_rows),
+}
@@ -0,0 +1,267 @@
+"""
+Índice de acceso aleatorio para FASTA, compatible con `samtools faidx` (.fai).
+
+Por cada registro se guarda: nombre, largo, offset del primer residuo, bases
+por línea y bytes por línea. Con eso cualquier tramo (registro, inicio, fin)
+se obtiene con un seek y una lectura, sin recorrer el genoma.
+
+El índice se construye en la misma pasada de la subida (FastaStreamParser lo
+alimenta con los bytes descomprimidos). Los offsets son del contenido sin
+comprimir: en archivos gzip/bz2/xz el seek descomprime hasta el offset. Si las
+líneas de un registro no tienen un ancho uniforme el archivo no es indexable
+(igual que en samtools) y se recurre a una lectura secuencial.
+
+No depende de Django.
+"""
+from collections import namedtuple
+
+from .compression import open_binary
+
+FaiRecord = namedtuple("FaiRecord", "name length offset line_bases line_bytes")
+
+MAX_NAME_BYTES = 64 * 1024
+
+
+class FastaIndex:
+    """Registros .fai en el orden del archivo, accesibles por nombre."""
+
+    def __init__(self, records):
+        self.records = list(records)
+        self._by_name = {r.name: r for r in self.records}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    @property
+    def names(self):
+        return [r.name for r in self.records]
+
+    def get(self, name=None):
+        """Registro `name` (o el primero si name es None)."""
+        if name is None:
+            return self.records[0] if self.records else None
+        return self._by_name.get(name)
+
+    # ---------- formato .fai ----------
+
+    def to_fai(self) -> str:
+        return "".join(
+            f"{r.name}\t{r.length}\t{r.offset}\t{r.line_bases}\t{r.line_bytes}\n" for r in self.records
+        )
+
+    @classmethod
+    def from_fai(cls, text: str):
+        records = []
+        for line in text.splitlines():
+            if line.strip():
+                name, length, offset, line_bases, line_bytes = line.split("\t")[:5]
+                records.append(FaiRecord(name, int(length), int(offset), int(line_bases), int(line_bytes)))
+        return cls(records)
+
+    # ---------- acceso ----------
+
+    def fetch(self, handle, name, start, end) -> str:
+        """
+        Tramo [start, end) (base 0) del registro `name`, leído de `handle`
+        (binario, descomprimido y con seek). Los límites se recortan al registro.
+        """
+        rec = self.get(name)
+        if rec is None:
+            raise KeyError(name)
+        start, end = max(start, 0), min(end, rec.length)
+        if start >= end:
+            return ""
+        first = self._byte_offset(rec, start)
+        handle.seek(first)
+        data = handle.read(self._byte_offset(rec, end - 1) + 1 - first)
+        return data.translate(None, b"\r\n").decode("ascii").upper()
+
+    @staticmethod
+    def _byte_offset(rec, pos):
+        if not rec.line_bases:
+            return rec.offset
+        return rec.offset + pos // rec.line_bases * rec.line_bytes + pos % rec.line_bases
+
+
+class FaiBuilder:
+    """
+    Construye el índice a partir de los bytes del FASTA (ya descomprimidos)
+    recibidos por bloques. Solo guarda el largo de la línea en curso, así la
+    memoria no depende del ancho de línea ni del tamaño del genoma.
+    close() retorna el FastaIndex, o None si el archivo no es indexable.
+    """
+
+    def __init__(self):
+        self.valid = True
+        self.records = []
+        self._names = set()
+        self._offset = 0          # offset del inicio de la línea en curso
+        self._line_len = 0
+        self._kind = None         # "header", "comment", "seq" o None (línea vacía)
+        self._first = b""
+        self._last = b""
+        self._header = b""
+        self._rec = None          # [nombre, largo, offset, bases/línea, bytes/línea, cerrado]
+
+    def feed(self, chunk: bytes):
+        if not self.valid or not chunk:
+            return
+        lines = chunk.split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            self._segment(line)
+            self._end_line(newline=True)
+        self._segment(tail)
+
+    def close(self):
+        if self.valid and self._line_len:
+            self._end_line(newline=False)
+        self._finish_record()
+        if not self.valid or not self.records:
+            return None
+        return FastaIndex(self.records)
+
+    # ---------- internos ----------
+
+    def _segment(self, seg):
+        if not seg:
+            return
+        if self._line_len == 0:
+            self._first = seg[:1]
+            self._kind = {b">": "header", b";": "comment"}.get(self._first, "seq")
+        if self._kind == "header" and len(self._header) < MAX_NAME_BYTES:
+            self._header += seg
+        self._line_len += len(seg)
+        self._last = seg[-1:]
+
+    def _end_line(self, newline):
+        raw = self._line_len
+        kind = self._kind if raw else None
+        if kind == "header":
+            self._finish_record()
+            name = self._header[1:].split()
+            name = name[0].decode("utf-8", "replace") if name else f"registro_{len(self.records) + 1}"
+            self._rec = [name, 0, self._offset + raw + 1, 0, 0, False]
+        elif kind == "seq":
+            self._sequence_line(raw)
+        elif kind == "comment" and self._rec is not None and self._rec[1]:
+            # Un comentario entre líneas de secuencia rompe la aritmética de offsets
+            self.valid = False
+        elif kind is None:
+            # Línea vacía: el registro no puede continuar con más secuencia
+            if self._rec is not None and self._rec[1]:
+                self._rec[5] = True
+        self._offset += raw + (1 if newline else 0)
+        self._line_len = 0
+        self._kind = None
+        self._header = b""
+
+    def _sequence_line(self, raw):
+        rec = self._rec
+        bases = raw - (1 if self._last == b"\r" else 0)
+        if bases == 0:
+            # Línea vacía con CRLF
+            if rec is not None and rec[1]:
+                rec[5] = True
+            return
+        if rec is None or self._first in b" \t" or self._last in b" \t":
+            self.valid = False
+            return
+        if rec[1] == 0:
+            rec[2] = self._offset
+            rec[3], rec[4] = bases, raw + 1
+        elif rec[5] or bases > rec[3] or raw + 1 - bases != rec[4] - rec[3]:
+            # Línea corta seguida de más secuencia, o ancho/salto de línea distinto
+            self.valid = False
+            return
+        elif bases < rec[3]:
+            rec[5] = True
+        rec[1] += bases
+
+    def _finish_record(self):
+        if self._rec is None:
+            return
+        name, length, offset, line_bases, line_bytes, _ = self._rec
+        if name in self._names:
+            self.valid = False  # nombres repetidos: el índice sería ambiguo
+        self._names.add(name)
+        self.records.append(FaiRecord(name, length, offset, line_bases, line_bytes))
+        self._rec = None
+
+
+def build_index(source, chunk_size=64 * 1024):
+    """Indexa un FASTA (ruta u objeto binario, comprimido o no) leyéndolo una vez."""
+    builder = FaiBuilder()
+    handle = open_binary(source)
+    try:
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            builder.feed(chunk)
+    finally:
+        if handle is not source:
+            handle.close()
+    return builder.close()
+
+
+def fetch_region(source, index, name, start, end):
+    """
+    Tramo [start, end) del registro `name` (None → primer registro).
+    Con índice: un seek y una lectura. Sin índice (archivo no indexable):
+    lectura secuencial que se detiene al completar el tramo.
+    """
+    return fetch_regions(source, index, [(name, start, end)])[0]
+
+
+def fetch_regions(source, index, regions):
+    """
+    Como fetch_region para varias regiones, abriendo el archivo una sola vez.
+    Con índice se leen en el orden del archivo (offset del registro, inicio) y
+    se retornan en el orden pedido: en un archivo comprimido cada seek hacia
+    atrás vuelve a descomprimir desde el principio.
+    """
+    handle = open_binary(source)
+    try:
+        if index is not None:
+            regions = [(name if name is not None else index.records[0].name, start, end)
+                       for name, start, end in regions]
+            order = sorted(range(len(regions)),
+                           key=lambda i: (getattr(index.get(regions[i][0]), "offset", -1), regions[i][1]))
+            slices = [None] * len(regions)
+            for i in order:
+                slices[i] = index.fetch(handle, *regions[i])
+            return slices
+        return [_scan_region(handle, name, start, end) for name, start, end in regions]
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def _scan_region(handle, name, start, end):
+    handle.seek(0)
+    parts, pos, current, seen = [], 0, None, 0
+    for line in handle:
+        line = line.strip()
+        if line.startswith(b">"):
+            if current is not None and (name is None or current == name):
+                break
+            header = line[1:].split()
+            seen += 1
+            current = header[0].decode("utf-8", "replace") if header else f"registro_{seen}"
+            pos = 0
+            continue
+        if not line or line.startswith(b";") or current is None:
+            continue
+        if name is not None and current != name:
+            continue
+        lo, hi = max(start - pos, 0), min(end - pos, len(line))
+        if lo < hi:
+            parts.append(line[lo:hi])
+        pos += len(line)
+        if pos >= end:
+            break
+    return b"".join(parts).decode("ascii").upper()
@@ -0,0 +1,181 @@
+"""
+Lectura incremental de archivos FASTA.
+
+El parser recibe el archivo por bloques (tal como llega en la subida) y en
+una sola pasada valida el formato, mide la secuencia (seqstats: GC, N,
+perfiles por ventana y k-mers) y calcula su huella SHA-256. Acepta contenido comprimido (gzip/bz2/xz), detectado por sus bytes
+mágicos y descomprimido como flujo. En la misma pasada se construye el índice
+.fai (fasta_index) para leer tramos sin recorrer el archivo. No depende de
+Django, así que lo usan tanto la app Streamlit como el manejador de subida de
+la plataforma.
+"""
+import hashlib
+
+from .compression import StreamDecompressor, CompressionError
+from .fasta_index import FaiBuilder
+from .seqstats import SequenceStatsAccumulator
+
+# Códigos IUPAC aceptados en una secuencia de nucleótidos
+IUPAC_BASES = b"ACGTUNRYKMSWBDHV-"
+MAX_HEADER_BYTES = 64 * 1024
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class FastaFormatError(ValueError):
+    """El contenido no es un FASTA de nucleótidos válido."""
+
+
+class FastaStreamParser:
+    """
+    Parser FASTA alimentado por bloques de bytes.
+
+    - feed(chunk): procesa un bloque; lanza FastaFormatError apenas detecta
+      una cabecera ausente o un carácter no válido.
+    - close(): procesa el resto pendiente y devuelve las estadísticas
+      (incluye "fai", el índice en formato .fai, o "" si no es indexable, y
+      "profile", el resultado completo de SequenceStatsAccumulator).
+
+    La huella SHA-256 se calcula sobre los residuos normalizados (mayúsculas,
+    sin saltos de línea ni cabeceras, con un '>' entre registros), de modo que
+    el mismo genoma da la misma huella aunque cambie el ancho de línea.
+    """
+
+    def __init__(self, keep_sequence=False):
+        self.keep_sequence = keep_sequence
+        self.length = 0
+        self.records = 0
+        self.line_no = 0
+        self.record_ids = []
+        self._parts = []
+        self._hash = hashlib.sha256()
+        self._indexer = FaiBuilder()
+        self._profile = SequenceStatsAccumulator()
+        self.index = None
+        self._pending = b""
+        self._mid_sequence_line = False
+        self._closed = False
+
+    # ---------- entrada ----------
+
+    def feed(self, chunk: bytes):
+        if self._closed:
+            raise ValueError("El parser ya fue cerrado")
+        if not chunk:
+            return
+        self._indexer.feed(chunk)
+        lines = chunk.split(b"\n")
+        lines[0] = self._pending + lines[0]
+        self._pending = lines.pop()
+
+        for line in lines:
+            if self._mid_sequence_line:
+                # Continuación de una línea de secuencia ya procesada en parte
+                self._mid_sequence_line = False
+                self._sequence(line)
+            else:
+                self.line_no += 1
+                self._line(line)
+
+        # Las líneas de secuencia muy largas (genomas en una sola línea) se
+        # procesan sin esperar al salto de línea; cabeceras y comentarios sí se
+        # acumulan hasta completarse.
+        if self._pending and not self._pending.startswith((b">", b";")):
+            if self._mid_sequence_line:
+                self._sequence(self._pending)
+            else:
+                self.line_no += 1
+                self._line(self._pending)
+            self._pending = b""
+            self._mid_sequence_line = True
+        elif len(self._pending) > MAX_HEADER_BYTES:
+            raise FastaFormatError(f"Línea {self.line_no + 1}: cabecera demasiado larga")
+
+    def close(self) -> dict:
+        if not self._closed:
+            if self._pending:
+                if self._mid_sequence_line:
+                    self._sequence(self._pending)
+                else:
+                    self.line_no += 1
+                    self._line(self._pending)
+                self._pending = b""
+            self._closed = True
+            self.index = self._indexer.close()
+
+        if self.records == 0:
+            raise FastaFormatError("El archivo no contiene registros FASTA (falta la cabecera '>')")
+        if self.length == 0:
+            raise FastaFormatError("El archivo FASTA no contiene secuencia")
+        return self.stats()
+
+    # ---------- resultados ----------
+
+    def stats(self) -> dict:
+        profile = self._profile.result()
+        return {
+            "length": self.length,
+            "gc_pct": profile["gc_pct"],
+            "n_count": profile["n_count"],
+            "records": self.records,
+            "sha256": self._hash.hexdigest(),
+            "fai": self.index.to_fai() if self.index else "",
+            "profile": profile,
+        }
+
+    def sequence(self) -> str:
+        """Secuencia concatenada (solo si keep_sequence=True)."""
+        return b"".join(self._parts).decode("ascii")
+
+    # ---------- internos ----------
+
+    def _line(self, line: bytes):
+        line = line.strip()
+        if not line or line.startswith(b";"):
+            return
+        if line.startswith(b">"):
+            self.records += 1
+            header = line[1:].split()
+            self.record_ids.append(header[0].decode("utf-8", "replace") if header else f"registro_{self.records}")
+            self._hash.update(b">")
+            self._profile.new_record()
+            return
+        self._sequence(line)
+
+    def _sequence(self, line: bytes):
+        line = line.strip().upper()
+        if not line:
+            return
+        if self.records == 0:
+            raise FastaFormatError(f"Línea {self.line_no}: se esperaba una cabecera '>' antes de la secuencia")
+        invalid = line.translate(None, IUPAC_BASES)
+        if invalid:
+            char = invalid[:1].decode("latin-1")
+            raise FastaFormatError(f"Línea {self.line_no}: carácter no válido {char!r} en la secuencia")
+
+        self.length += len(line)
+        self._profile.feed(line)
+        self._hash.update(line)
+        if self.keep_sequence:
+            self._parts.append(line)
+
+
+def parse_fasta_stream(fileobj, keep_sequence=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lee un objeto tipo archivo (binario, comprimido o no) por bloques.
+    Retorna (stats, parser); con keep_sequence=True, parser.sequence()
+    devuelve la secuencia concatenada.
+    """
+    parser = FastaStreamParser(keep_sequence=keep_sequence)
+    decompressor = StreamDecompressor()
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            parser.feed(decompressor.feed(chunk))
+        parser.feed(decompressor.flush())
+    except CompressionError as e:
+        raise FastaFormatError(str(e)) from e
+    return parser.close(), parser
@@ -0,0 +1,405 @@
+"""
+Ejecución de un AnalysisJob y persistencia de sus resultados: clasificación
+de genes, agregados (identidad/cobertura promedio) y nivel de riesgo.
+
+execute_job() es bloqueante; submit_job() lo delega a un pool de hilos para
+las vistas que no deben esperar el análisis (API JSON).
+El pool reparte los hilos entre usuarios (services.scheduler): reparto
+justo, límite por usuario, los jobs más cortos primero (expected_cost) y
+los de prioridad clínica delante de todos.
+
+Cada ejecución toma el job de forma atómica (PENDING → RUNNING), marca un
+latido periódico desde un hilo propio (heartbeat_at, ver services.reaper) y
+corre con un presupuesto de tiempo de reloj y de CPU (services.budget) que
+también atiende las cancelaciones pedidas por el usuario. Junto con el pool arranca
+un hilo que cada settings.RAM_JOB_REAP_SECONDS recupera los jobs
+abandonados (reap_stale_jobs).
+
+Los genes prioritarios (settings.RAM_PRIORITY_GENES, services.priority) se
+buscan primero: si alguno supera los umbrales de riesgo alto, el job queda
+HIGH con su alerta (alert_at, alert_genes) y esos genes guardados mientras
+sigue la búsqueda del resto del panel.
+
+Al terminar, el resultado se incorpora a la matriz de presencia entre
+muestras (services.surveillance).
+"""
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Avg, F
+from django.utils import timezone
+
+from analisis.constants import HIGH_IDENTITY, HIGH_COVERAGE
+from analisis.models import AnalysisJob, DetectedGene, ResistanceGene
+from .budget import JobBudget, JobCancelled
+from .scheduler import FairScheduler
+from .view_cache import invalidate
+
+HEARTBEAT_SECONDS = 15
+
+
+def classify_identity(ident):
+    """Clasificación visual por identidad."""
+    if ident >= 90:
+        return "Alta resistencia"
+    if ident >= 60:
+        return "Resistencia moderada"
+    if ident >= 30:
+        return "Baja resistencia"
+    return "Sin resistencia"
+
+
+def risk_level_for(hits, identity_avg):
+    """
+    hits: iterable de (identidad, cobertura).
+    HIGH si algún gen supera HIGH_IDENTITY y HIGH_COVERAGE (anomalía);
+    si no, según la identidad promedio.
+    """
+    if any(ident >= HIGH_IDENTITY and cov >= HIGH_COVERAGE for ident, cov in hits):
+        return "HIGH"
+    if identity_avg >= 60:
+        return "MEDIUM"
+    if identity_avg >= 30:
+        return "LOW"
+    return "NONE"
+
+
+def save_gene_results(job, gene_results):
+    """
+    Guarda las tuplas (gene_name, matches, ident, cov, source, abx_class,
+    contig, start, end) devueltas por el analizador como DetectedGene del job.
+    """
+    return DetectedGene.objects.bulk_create([
+        DetectedGene(
+            job=job,
+            gene_name=gene_name,
+            source=source,
+            antibiotic_class=abx_class,
+            matches=matches,
+            identity=ident,
+            coverage=cov,
+            classification=classify_identity(ident),
+            contig=contig,
+            start=start,
+            end=end,
+        )
+        for gene_name, matches, ident, cov, source, abx_class, contig, start, end in gene_results
+    ])
+
+
+def save_mutation_results(job, mutations):
+    """Guarda las mutaciones puntuales resistentes (MutationPanel.scan) como DetectedGene."""
+    return DetectedGene.objects.bulk_create([
+        DetectedGene(
+            job=job,
+            kind="MUTATION",
+            gene_name=m["gene"],
+            mutation=m["mutation"],
+            source=m["source"],
+            antibiotic_class=m["class"],
+            matches=1,
+            identity=m["identity"],
+            coverage=m["coverage"],
+            classification=classify_identity(m["identity"]),
+            contig=m.get("contig", ""),
+            start=m["start"],
+            end=m["end"],
+        )
+        for m in mutations if m["resistant"]
+    ])
+
+
+def save_read_results(job, results):
+    """Guarda los resultados del modo lecturas (coverage = amplitud de cobertura)."""
+    return DetectedGene.objects.bulk_create([
+        DetectedGene(
+            job=job,
+            gene_name=r["gene"],
+            source=r["source"],
+            antibiotic_class=r["class"],
+            matches=r["reads"],
+            identity=r["identity"],
+            coverage=r["breadth"],
+            mean_depth=r["mean_depth"],
+            classification=classify_identity(r["identity"]),
+        )
+        for r in results
+    ])
+
+
+def refresh_job_aggregates(job):
+    """Recalcula identidad/cobertura promedio y riesgo a partir de los genes guardados."""
+    genes = job.detected_genes.all()
+    agg = genes.aggregate(identity=Avg("identity"), coverage=Avg("coverage"))
+    job.identity_pct = round(agg["identity"] or 0, 2)
+    job.coverage_pct = round(agg["coverage"] or 0, 2)
+    job.risk_level = risk_level_for(genes.values_list("identity", "coverage"), job.identity_pct)
+    job.save(update_fields=["identity_pct", "coverage_pct", "risk_level"])
+    return job
+
+
+def _claim(job_id):
+    """PENDING → RUNNING de forma atómica: solo un worker ejecuta cada job."""
+    now = timezone.now()
+    return AnalysisJob.objects.filter(pk=job_id, status="PENDING", cancel_requested=False).update(
+        status="RUNNING", started_at=now, heartbeat_at=now, attempts=F("attempts") + 1,
+        alert_at=None, alert_genes=[],
+    )
+
+
+def cancel_job(job):
+    """
+    Pide cancelar el job. PENDING pasa directo a CANCELLED; RUNNING queda
+    marcado (cancel_requested) y execute_job lo detiene en su próximo punto
+    de control. Retorna el estado resultante.
+    """
+    jobs = AnalysisJob.objects.filter(pk=job.pk)
+    if jobs.filter(status="PENDING").update(status="CANCELLED", cancel_requested=True,
+                                            raw_summary="Análisis cancelado por el usuario"):
+        status = "CANCELLED"
+        if _scheduler is not None:
+            _scheduler.discard(job.pk)
+    elif jobs.filter(status="RUNNING").update(cancel_requested=True):
+        status = "RUNNING"
+    else:
+        status = jobs.values_list("status", flat=True).first()
+    invalidate(job.sequence.owner_id)
+    return status
+
+
+def _owned(job):
+    """
+    El job mientras siga siendo de esta ejecución: si el reaper lo reencoló
+    (otro intento) o lo cerró, esta ejecución ya no escribe su estado.
+    """
+    return AnalysisJob.objects.filter(pk=job.pk, status="RUNNING", attempts=job.attempts)
+
+
+def job_budget(job):
+    """Presupuesto del job (o el de settings) con consulta de cancelación."""
+    def poll():
+        # Cancelado por el usuario o ya no es de esta ejecución: detenerse
+        return not _owned(job).filter(cancel_requested=False).exists()
+
+    return JobBudget(wall_seconds=job.wall_budget_s or settings.RAM_JOB_WALL_SECONDS,
+                     cpu_seconds=job.cpu_budget_s or settings.RAM_JOB_CPU_SECONDS, poll=poll)
+
+
+@contextmanager
+def heartbeat(job, interval=HEARTBEAT_SECONDS):
+    """
+    Marca el latido del job cada `interval` segundos mientras dura el bloque,
+    desde un hilo propio: no depende de que el análisis llegue a un punto de
+    control (un lote largo del pool no lo deja sin latido ante el reaper).
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                _owned(job).update(heartbeat_at=timezone.now())
+        finally:
+            close_old_connections()
+
+    thread = threading.Thread(target=beat, name=f"ram-heartbeat-{job.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def raise_alert(job, gene_results):
+    """
+    Alerta temprana: guarda los genes prioritarios críticos (tuplas de
+    save_gene_results) y marca el job HIGH sin esperar al resto del panel.
+    """
+    with transaction.atomic():
+        if not _owned(job).exists():
+            return
+        # Reemplaza lo que haya dejado un intento anterior
+        job.detected_genes.all().delete()
+        save_gene_results(job, gene_results)
+        job.risk_level, job.alert_at = "HIGH", timezone.now()
+        job.alert_genes = sorted({row[0] for row in gene_results})
+        _owned(job).update(risk_level=job.risk_level, alert_at=job.alert_at, alert_genes=job.alert_genes)
+    invalidate(job.sequence.owner_id)
+
+
+def execute_job(job_id):
+    """
+    Ejecuta el análisis del job según su modo (REAL: ensamblado, READS:
+    lecturas) y guarda resultados. Los errores y presupuestos agotados quedan
+    en el job (ERROR); una cancelación, como CANCELLED. Si el job ya no está
+    PENDING (cancelado, o tomado por otro worker) no hace nada.
+    """
+    from .analyzers import analyze_realistic, analyze_reads
+    from .progress import ProgressReporter
+    from .resources import PeakRSS
+    from .stats_cache import stats_for
+    from .surveillance import record_job
+
+    claimed = _claim(job_id)
+    job = AnalysisJob.objects.select_related("sequence").get(pk=job_id)
+    if not claimed:
+        return job
+    seq = job.sequence
+    # update() no dispara señales: invalidar la caché de vistas aquí
+    invalidate(seq.owner_id)
+
+    try:
+        budget = job_budget(job)
+        genes = list(ResistanceGene.objects.all())
+        reporter = ProgressReporter(job.pk, genes_total=len(genes), bp_total=seq.length_bp or 0,
+                                    contigs_total=seq.record_count or 0)
+
+        def on_batch(contigs, bases, hits, genes_pass):
+            # Genes buscados: los de pasadas terminadas más la parte recorrida de la actual
+            done, current = genes_pass
+            state = reporter.state
+            if state["bp_total"]:
+                share = min(bases / state["bp_total"], 1.0)
+            else:
+                share = contigs / state["contigs_total"] if state["contigs_total"] else 0.0
+            for hit in hits:
+                reporter.update(hit=hit["gene"])
+            reporter.update(contigs_done=contigs, bp_scanned=bases, genes_screened=done + int(current * share))
+
+        with heartbeat(job), PeakRSS() as peak:
+            if job.mode == "READS":
+                total_reads, summary, results = analyze_reads(seq.fasta_file.path, genes=genes,
+                                                              workers=settings.RAM_READS_WORKERS,
+                                                              progress=lambda n: reporter.update(reads=n),
+                                                              checkpoint=budget)
+            else:
+                stats = stats_for(seq)
+
+                def on_alert(critical):
+                    raise_alert(job, critical)
+                    for row in critical:
+                        reporter.update(hit=row[0])
+
+                length, _, _, summary, gene_results, mutations = analyze_realistic(
+                    seq.fasta_file.path, genes=genes, progress=on_batch, workers=settings.RAM_CONTIG_WORKERS,
+                    gc_pct=stats.gc_pct if stats else None, search_mode=job.search_mode,
+                    checkpoint=budget, backend=job.backend,
+                    priority=settings.RAM_PRIORITY_GENES, on_alert=on_alert,
+                    sha256=(seq.sha256 or None) if settings.RAM_ALIGNMENT_MEMO else None
+                )
+        if job.mode == "READS":
+            seq.record_count = total_reads
+            seq_fields = ["record_count"]
+        else:
+            # Largo total de todos los contigs (no solo del primer registro)
+            seq.length_bp = length
+            seq_fields = ["length_bp"]
+
+        reporter.flush(genes_screened=len(genes))
+
+        with transaction.atomic():
+            if not _owned(job).exists():
+                return job
+            # Guardar genes y evaluar riesgo antes de marcar DONE (en la misma
+            # transacción): quien observa el estado (SSE, API) ve el resultado completo
+            seq.save(update_fields=seq_fields)
+            # Incluye los genes de la alerta temprana, que se guardan de nuevo con el resto
+            job.detected_genes.all().delete()
+            if job.mode == "READS":
+                save_read_results(job, results)
+            else:
+                save_gene_results(job, gene_results)
+                save_mutation_results(job, mutations)
+            refresh_job_aggregates(job)
+
+            job.raw_summary = summary
+            job.panel_versions = {str(g.pk): g.version for g in genes}
+            job.progress = reporter.state
+            job.peak_rss_kb = peak.kb
+            job.status = "DONE"
+            job.save()
+
+    except JobCancelled as e:
+        _finish(job, "CANCELLED", str(e))
+    except Exception as e:
+        # Incluye BudgetExceeded (presupuesto de tiempo o CPU agotado)
+        _finish(job, "ERROR", str(e) or type(e).__name__)
+    else:
+        if job.status == "DONE":
+            record_job(job)
+    return job
+
+
+def _finish(job, status, summary):
+    job.status, job.raw_summary = status, summary
+    if _owned(job).update(status=status, raw_summary=summary):
+        invalidate(job.sequence.owner_id)
+
+
+_scheduler = None
+
+
+def scheduler():
+    """El planificador del pool de análisis de este proceso (arranca también el reaper)."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FairScheduler(settings.RAM_JOB_WORKERS, user_limit=settings.RAM_JOB_USER_LIMIT,
+                                   aging_seconds=settings.RAM_JOB_AGING_SECONDS, thread_name_prefix="ram-job")
+        if settings.RAM_JOB_REAP_SECONDS > 0:
+            threading.Thread(target=_reap_loop, args=(settings.RAM_JOB_REAP_SECONDS,),
+                             name="ram-job-reaper", daemon=True).start()
+    return _scheduler
+
+
+def _reap_loop(interval):
+    """
+    Al arrancar y luego cada `interval` segundos recupera los jobs abandonados
+    y encola los PENDING que no están en la cola de este proceso (services.reaper).
+    """
+    from .reaper import reap_stale_jobs, resubmit_pending
+
+    while True:
+        close_old_connections()
+        try:
+            reap_stale_jobs()
+            resubmit_pending(queued=_scheduler.queued())
+        except Exception:
+            # Se reintenta en la próxima vuelta
+            traceback.print_exc()
+        finally:
+            close_old_connections()
+        time.sleep(interval)
+
+
+def expected_cost(job, panel_size=None):
+    """Costo esperado del análisis: largo de la secuencia (o del archivo) × genes del panel."""
+    seq = job.sequence
+    length = seq.length_bp
+    if not length:
+        try:
+            length = seq.fasta_file.size
+        except OSError:
+            length = 0
+    if panel_size is None:
+        panel_size = ResistanceGene.objects.count()
+    return max(length, 1) * max(panel_size, 1)
+
+
+def _run_in_worker(job_id):
+    # Cada hilo del pool usa su propia conexión a la base de datos
+    close_old_connections()
+    try:
+        return execute_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def submit_job(job_id):
+    """Encola el job en el pool de análisis y retorna el Future."""
+    job = AnalysisJob.objects.select_related("sequence").get(pk=job_id)
+    return scheduler().submit(job.sequence.owner_id, expected_cost(job), _run_in_worker, job_id,
+                              clinical=job.clinical_priority, key=job_id)
@@ -0,0 +1,231 @@
+"""
+Generador de carga para un servidor local de la plataforma.
+
+Cada usuario sintético es un hilo con su propia sesión HTTP (cookies y
+token CSRF): inicia sesión y repite el recorrido subir secuencia → ejecutar
+análisis → dashboard → historial → exportar CSV. Se mide cada petición
+(sin seguir redirecciones: se cronometra solo el endpoint) y se resume por
+endpoint: throughput, latencias p50/p95/p99 y tasa de errores.
+
+El análisis corre en segundo plano: tras encolarlo se consulta su estado
+(API, ?wait=) hasta que termina, y "analysis_job" mide de la cola al final;
+un job que termina en ERROR (p. ej. "database is locked" al guardar sus
+resultados) cuenta como error. Una subida o ejecución que no redirige (el
+formulario vuelve a mostrarse con errores) también es un error.
+
+Solo usa la biblioteca estándar (urllib) y NumPy; no depende de Django.
+"""
+import http.cookiejar
+import json
+import random
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ENDPOINTS = ("login", "upload_sequence", "run_analysis", "analysis_job", "dashboard", "historial",
+             "export_historial_csv")
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+SEQ_LOCATION = re.compile(r"/seq/(\d+)/")
+JOB_LOCATION = re.compile(r"/resultados/(\d+)/")
+JOB_POLL_SECONDS = 30     # espera larga de la API por consulta
+JOB_TIMEOUT = 600
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def synthetic_fasta(length=20000, contigs=1, inserts=(), seed=None):
+    """FASTA aleatorio de `length` bases en `contigs` registros, con las secuencias `inserts` incrustadas."""
+    rng = random.Random(seed)
+    per_contig = max(length // contigs, 1)
+    lines = []
+    for i in range(contigs):
+        seq = "".join(rng.choice("ACGT") for _ in range(per_contig))
+        for gene in inserts:
+            if len(gene) < per_contig and rng.random() < 0.5:
+                pos = rng.randrange(per_contig - len(gene))
+                seq = seq[:pos] + gene + seq[pos + len(gene):]
+        lines.append(f">loadtest_contig_{i + 1}")
+        lines.extend(seq[j:j + 80] for j in range(0, len(seq), 80))
+    return ("\n".join(lines) + "\n").encode()
+
+
+class LoadClient:
+    """Sesión HTTP de un usuario sintético; registra (endpoint, segundos, error o None)."""
+
+    def __init__(self, base_url, timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect())
+        self.samples = []
+
+    def _csrf(self):
+        return next((c.value for c in self.cookies if c.name == "csrftoken"), "")
+
+    def request(self, endpoint, path, data=None, headers=None, redirect=False):
+        """
+        Ejecuta y cronometra una petición. Retorna (status, headers, cuerpo) o
+        None si falló. redirect: solo una redirección cuenta como éxito.
+        """
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        started = time.perf_counter()
+        error, result = None, None
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                result = (resp.status, resp.headers, resp.read())
+        except urllib.error.HTTPError as e:
+            if 300 <= e.code < 400:
+                result = (e.code, e.headers, e.read())
+            else:
+                error = f"HTTP {e.code}"
+                body = e.read()
+                if b"database is locked" in body:
+                    error += " (database is locked)"
+        except (urllib.error.URLError, OSError) as e:
+            error = type(getattr(e, "reason", e)).__name__
+        if redirect and result is not None and not 300 <= result[0] < 400:
+            error, result = f"HTTP {result[0]} sin redirección", None
+        self.samples.append((endpoint, time.perf_counter() - started, error))
+        return result
+
+    def get(self, endpoint, path, redirect=False):
+        return self.request(endpoint, path, redirect=redirect)
+
+    def post_form(self, endpoint, path, fields):
+        data = urllib.parse.urlencode({**fields, "csrfmiddlewaretoken": self._csrf()}).encode()
+        return self.request(endpoint, path, data, {
+            "Content-Type": "application/x-www-form-urlencoded", "Referer": self.base_url + path,
+        })
+
+    def post_file(self, endpoint, path, fields, file_field, filename, content):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in {**fields, "csrfmiddlewaretoken": self._csrf()}.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode() + content + b"\r\n"
+        )
+        parts.append(f"--{boundary}--\r\n".encode())
+        return self.request(endpoint, path, b"".join(parts), {
+            "Content-Type": f"multipart/form-data; boundary={boundary}", "Referer": self.base_url + path,
+        }, redirect=True)
+
+    # ---------- recorrido ----------
+
+    def login(self, username, password):
+        page = self.get("login", "/accounts/login/")
+        if page is None:
+            return False
+        resp = self.post_form("login", "/accounts/login/", {"username": username, "password": password})
+        # Un login correcto redirige; con credenciales inválidas se vuelve a mostrar el formulario
+        return resp is not None and resp[0] in (301, 302)
+
+    def wait_job(self, job_id, timeout=JOB_TIMEOUT):
+        """Consulta el job hasta que termina; registra "analysis_job" (ERROR cuenta como error)."""
+        started = time.perf_counter()
+        status, summary = None, ""
+        while time.perf_counter() - started < timeout:
+            req = urllib.request.Request(f"{self.base_url}/api/v1/jobs/{job_id}/?wait={JOB_POLL_SECONDS}")
+            try:
+                with self.opener.open(req, timeout=self.timeout) as resp:
+                    status = json.loads(resp.read())["status"]
+            except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+                status = type(getattr(e, "reason", e)).__name__
+                break
+            if status not in ("PENDING", "RUNNING"):
+                break
+        error = None
+        if status == "ERROR":
+            error = "job ERROR"
+            try:
+                with self.opener.open(f"{self.base_url}/resultados/{job_id}/", timeout=self.timeout) as resp:
+                    summary = resp.read()
+            except (urllib.error.URLError, OSError):
+                pass
+            if b"database is locked" in summary:
+                error += " (database is locked)"
+        elif status in ("PENDING", "RUNNING"):
+            error = "job sin terminar"
+        elif status not in ("DONE", "CANCELLED"):
+            error = status
+        self.samples.append(("analysis_job", time.perf_counter() - started, error))
+
+    def iteration(self, fasta, name):
+        self.get("upload_sequence", "/upload/")  # obtiene/renueva el token CSRF
+        resp = self.post_file("upload_sequence", "/upload/", {"name": name}, "fasta_file", f"{name}.fa", fasta)
+        match = SEQ_LOCATION.search(resp[1].get("Location", "")) if resp else None
+        if match:
+            resp = self.get("run_analysis", f"/run/{match.group(1)}/", redirect=True)
+            job = JOB_LOCATION.search(resp[1].get("Location", "")) if resp else None
+            if job:
+                self.wait_job(int(job.group(1)))
+        self.get("dashboard", "/")
+        self.get("historial", "/historial/")
+        self.get("export_historial_csv", "/historial/export.csv")
+
+
+def run_load_test(base_url, credentials, iterations=3, fasta=None, think_time=0.0, timeout=120):
+    """
+    Ejecuta un usuario por hilo. credentials: [(usuario, contraseña), ...].
+    Retorna (segundos totales, muestras [(endpoint, segundos, error)]).
+    """
+    fasta = fasta or synthetic_fasta()
+
+    def user_session(idx, username, password):
+        client = LoadClient(base_url, timeout=timeout)
+        if client.login(username, password):
+            for it in range(iterations):
+                client.iteration(fasta, f"loadtest_{idx}_{it}")
+                if think_time:
+                    time.sleep(think_time)
+        else:
+            client.samples.append(("login", 0.0, "login rechazado"))
+        return client.samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(credentials)) as pool:
+        futures = [pool.submit(user_session, i, u, p) for i, (u, p) in enumerate(credentials)]
+        samples = [s for f in futures for s in f.result()]
+    return time.perf_counter() - started, samples
+
+
+def summarize(elapsed, samples):
+    """Resumen por endpoint (y total): peticiones, req/s, p50/p95/p99 en ms, % de errores y su detalle."""
+    grouped = defaultdict(list)
+    for endpoint, seconds, error in samples:
+        grouped[endpoint].append((seconds, error))
+    grouped["TOTAL"] = [(s, e) for _, s, e in samples]
+
+    rows = []
+    for endpoint in [*ENDPOINTS, "TOTAL"]:
+        items = grouped.get(endpoint)
+        if not items:
+            continue
+        latencies = np.array([s for s, _ in items]) * 1000
+        errors = defaultdict(int)
+        for _, e in items:
+            if e:
+                errors[e] += 1
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        rows.append({
+            "endpoint": endpoint,
+            "requests": len(items),
+            "throughput": round(len(items) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(float(p50), 1),
+            "p95_ms": round(float(p95), 1),
+            "p99_ms": round(float(p99), 1),
+            "error_pct": round(sum(errors.values()) / len(items) * 100, 2),
+            "errors": dict(errors),
+        })
+    return rows
@@ -0,0 +1,138 @@
+"""
+Memoización persistente de búsquedas de genes (AlignmentMemo).
+
+Distintos usuarios suben las mismas cepas de referencia, y re-analizar una
+secuencia repetía todas las búsquedas. screen_contigs_memo() guarda el
+resultado crudo de cada gen en cada secuencia (identidad, cobertura,
+coordenadas y número de registro del FASTA, sin umbrales), con clave:
+
+- huella SHA-256 del archivo (Sequence.sha256),
+- id y versión del ResistanceGene (un gen modificado se vuelve a buscar),
+- huella de los parámetros de puntuación del backend (params_key).
+
+La búsqueda es la de siempre (Backend.search, representante primero): los
+genes con resultado guardado no se vuelven a buscar y los umbrales y la
+elección del mejor alelo por clúster se aplican igual que sin memo, así un
+cambio de umbrales no repite ninguna búsqueda. Solo se guardan los genes
+buscados en todos los registros; un alelo que la poda por clúster omitió en
+algún contig se vuelve a evaluar en el próximo análisis.
+
+La huella no incluye los encabezados del FASTA, así que lo guardado no lleva
+nombres de contigs (son de quien subió el archivo primero): cada hit los
+toma del archivo analizado por su número de registro.
+
+La tabla se limita a settings.RAM_MEMO_MAX_MB: al superarlo se borran las
+entradas usadas hace más tiempo (LRU) hasta bajar a EVICT_TO del máximo.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from analisis.models import AlignmentMemo
+from .contigs import screen_contigs
+from .engine import DEFAULT_BACKEND, create_backend, load_reference
+
+MEMO_VERSION = 3     # subirlo invalida la tabla si cambia el formato de los hits
+EVICT_TO = 0.9
+ROW_OVERHEAD = 100   # bytes aproximados de cada fila además de sus hits
+BATCH_SIZE = 500
+# Se vuelven a tomar del gen actual al leer la memo
+GENE_FIELDS = ("gene", "source", "class")
+# No se guardan: del gen actual y del archivo analizado
+UNSTORED_FIELDS = GENE_FIELDS + ("contig",)
+
+
+def params_key(detector):
+    """Huella corta del backend y sus parámetros de puntuación."""
+    payload = json.dumps({"backend": detector.name, "memo": MEMO_VERSION, **detector.params()}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def lookup(sha256, params, genes):
+    """
+    Resultados guardados de `genes` (ResistanceGene) en su versión actual:
+    ({pk del gen: hits}, pks de las filas usadas).
+    """
+    versions = {g.pk: g.version for g in genes}
+    ids = list(versions)
+    found, used = {}, []
+    for i in range(0, len(ids), BATCH_SIZE):
+        rows = (AlignmentMemo.objects.filter(sha256=sha256, params=params, gene_id__in=ids[i:i + BATCH_SIZE])
+                .values_list("pk", "gene_id", "gene_version", "hits"))
+        for pk, gene_id, version, hits in rows:
+            if versions[gene_id] == version:
+                found[gene_id] = hits
+                used.append(pk)
+    return found, used
+
+
+def store(sha256, params, genes, hits_by_gene, used=()):
+    """Guarda los hits crudos de `genes` (también los sin coincidencias), marca el uso y desaloja."""
+    now = timezone.now()
+    rows = []
+    for gene in genes:
+        hits = [{k: v for k, v in h.items() if k not in UNSTORED_FIELDS}
+                for h in hits_by_gene.get(gene.gene_name, [])]
+        rows.append(AlignmentMemo(sha256=sha256, params=params, gene_id=gene.pk, gene_version=gene.version,
+                                  hits=hits, size=len(json.dumps(hits)) + ROW_OVERHEAD, last_used_at=now))
+
+    with transaction.atomic():
+        for i in range(0, len(used), BATCH_SIZE):
+            AlignmentMemo.objects.filter(pk__in=used[i:i + BATCH_SIZE]).update(last_used_at=now)
+        # Otro job pudo guardar el mismo par mientras tanto
+        AlignmentMemo.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        evict()
+
+
+def evict(max_bytes=None):
+    """
+    Si la tabla supera `max_bytes` (RAM_MEMO_MAX_MB), borra las entradas
+    usadas hace más tiempo hasta bajar a EVICT_TO del máximo. Retorna las
+    filas borradas.
+    """
+    if max_bytes is None:
+        max_bytes = settings.RAM_MEMO_MAX_MB * 1024 * 1024
+    total = AlignmentMemo.objects.aggregate(total=Sum("size"))["total"] or 0
+    if total <= max_bytes:
+        return 0
+    excess = total - int(max_bytes * EVICT_TO)
+    doomed, freed = [], 0
+    for pk, size in AlignmentMemo.objects.order_by("last_used_at", "pk").values_list("pk", "size").iterator():
+        doomed.append(pk)
+        freed += size
+        if freed >= excess:
+            break
+    for i in range(0, len(doomed), BATCH_SIZE):
+        AlignmentMemo.objects.filter(pk__in=doomed[i:i + BATCH_SIZE]).delete()
+    return len(doomed)
+
+
+def screen_contigs_memo(source, genes, sha256, mutation_panel=None, workers=None, progress=None, checkpoint=None,
+                        backend=DEFAULT_BACKEND, **backend_options):
+    """
+    Como contigs.screen_contigs (búsqueda en nucleótidos) para `genes`
+    (ResistanceGene) en el archivo de huella `sha256`, reutilizando la memo.
+    El resultado trae además memo_hits: genes cuyo resultado ya estaba guardado.
+    """
+    genes = list(genes)
+    detector = create_backend(backend, load_reference(genes), **backend_options)
+    params = params_key(detector)
+    cached, used = lookup(sha256, params, genes)
+
+    # Hits guardados por registro del FASTA, con los datos del gen actual
+    known = {}
+    for gene in genes:
+        if gene.pk in cached:
+            ref = {"gene": gene.gene_name, "source": gene.source, "class": gene.antibiotic_class}
+            known[gene.gene_name] = {hit["record"]: {**{k: v for k, v in hit.items() if k != "record"}, **ref}
+                                     for hit in cached[gene.pk]}
+
+    result = screen_contigs(source, genes, mutation_panel=mutation_panel, workers=workers, progress=progress,
+                            checkpoint=checkpoint, backend=backend, known=known, **backend_options)
+    screened = result.pop("screened")
+    store(sha256, params, [g for g in genes if g.gene_name in screened], screened, used)
+    return {**result, "memo_hits": len(cached)}
@@ -0,0 +1,185 @@
+"""
+Panel de mutaciones puntuales (SNPs de resistencia, p. ej. gyrA S83L).
+
+Cada gen diana se ubica una sola vez en la secuencia (votación de semillas
+exactas por diagonal, en ambas hebras); luego todas las posiciones del panel
+se revisan a la vez traduciendo los codones con NumPy e indexando la tabla
+de alelos resistentes. Revisar cientos de SNPs cuesta lo mismo que ubicar
+cada gen diana.
+
+Para no leer un codón de una región ajena, el gen se ubica solo con al menos
+MIN_SEED_VOTES semillas en la misma diagonal, y un alelo cuenta como
+resistente solo si la ventana de ±LOCAL_WINDOW bases alrededor del codón
+tiene al menos MIN_LOCAL_IDENTITY % de identidad con la referencia.
+
+No depende de Django: lo usan la plataforma y la app Streamlit.
+"""
+from collections import Counter
+
+import numpy as np
+
+# Código genético estándar en orden TCAG (T=0, C=1, A=2, G=3)
+_CODE = "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG"
+CODON_TABLE = np.frombuffer(_CODE.encode("ascii"), dtype=np.uint8)
+
+BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for _i, _b in enumerate(b"TCAG"):
+    BASE_CODES[_b] = _i
+    BASE_CODES[ord(chr(_b).lower())] = _i
+
+_COMPLEMENT = str.maketrans("ACGTNacgtn", "TGCANtgcan")
+
+SEED_K = 16
+MIN_SEED_VOTES = 2
+LOCAL_WINDOW = 30          # bases a cada lado del codón
+MIN_LOCAL_IDENTITY = 90.0  # % en esa ventana (el propio SNP cuenta como diferencia)
+
+# Panel de demostración (secuencias simuladas de la región QRDR)
+DEMO_MUTATION_PANEL = [
+    {
+        "gene_name": "gyrA",
+        "source": "CARD",
+        "antibiotic_class": "Fluoroquinolones",
+        "first_codon": 64,
+        "sequence": "CTGAAATCGGCGCGTGTGGTGGGCGACGTGATTGGCAAATATCATCCGCATGGCGACTCGGCGGTGTATGACACCATTGTGCGTATGGCGCAGCCGTTTTCGCTGCGTTATATGCTGGTGGACGGCCAGGGCAACTTTGGC",
+        "mutations": [(83, "S", "LFW"), (87, "D", "NGYH")],
+    },
+    {
+        "gene_name": "parC",
+        "source": "CARD",
+        "antibiotic_class": "Fluoroquinolones",
+        "first_codon": 61,
+        "sequence": "CTGAACAAAGCGCATAAAGTGGTGGGCGAAGTGCTGGGCAAATATCATCCGCATGGCGACTCGGCGTGCTATGAAGCGATGGTGCTGATGGCGCAGCCGTTTTCGTATCGTTATCCGCTGGTGGACGGCCAGGGCAACTGGGGC",
+        "mutations": [(80, "S", "IR"), (84, "E", "KGV")],
+    },
+]
+
+
+def reverse_complement(seq: str) -> str:
+    return seq.translate(_COMPLEMENT)[::-1]
+
+
+def encode(seq: str) -> np.ndarray:
+    """Secuencia → códigos 0..3 (TCAG); cualquier otra base → 4."""
+    return BASE_CODES[np.frombuffer(seq.encode("ascii"), dtype=np.uint8)]
+
+
+def translate(codes: np.ndarray) -> np.ndarray:
+    """Traduce codones (marco 0) a bytes ASCII de aminoácidos; 'X' si hay ambigüedad."""
+    n = len(codes) // 3
+    triplets = codes[:n * 3].reshape(n, 3).astype(np.intp)
+    idx = triplets[:, 0] * 16 + triplets[:, 1] * 4 + triplets[:, 2]
+    aa = CODON_TABLE[np.minimum(idx, 63)]
+    return np.where((triplets > 3).any(axis=1), ord("X"), aa).astype(np.uint8)
+
+
+def locate(query: str, ref: str, k: int = SEED_K, min_votes: int = MIN_SEED_VOTES):
+    """
+    Ubica `ref` en `query` por votación de semillas exactas de largo k.
+    Tolera SNPs (basta con que algunas semillas coincidan).
+    Retorna (inicio, hebra) o None si ninguna diagonal reúne `min_votes`
+    semillas (o todas, si `ref` tiene menos).
+    """
+    votes = Counter()
+    offsets = range(0, max(len(ref) - k, 0) + 1, k)
+    for strand, probe in (("+", ref), ("-", reverse_complement(ref))):
+        for offset in offsets:
+            pos = query.find(probe[offset:offset + k])
+            while pos != -1:
+                votes[(pos - offset, strand)] += 1
+                pos = query.find(probe[offset:offset + k], pos + 1)
+    if not votes:
+        return None
+    best, count = votes.most_common(1)[0]
+    return best if count >= min(min_votes, len(offsets)) else None
+
+
+class MutationPanel:
+    """
+    Panel precompilado: por cada gen diana guarda su secuencia codificada y
+    los arreglos de posiciones y alelos resistentes de sus mutaciones.
+
+    targets: lista de dicts como DEMO_MUTATION_PANEL; cada mutación es
+    (posición del codón, aminoácido de referencia, alelos resistentes).
+    """
+
+    def __init__(self, targets):
+        self.targets = []
+        for t in targets:
+            muts = list(t["mutations"])
+            positions = np.array([m[0] for m in muts], dtype=np.intp)
+            resistant = np.zeros((len(muts), 256), dtype=bool)
+            for i, (_, _, alleles) in enumerate(muts):
+                resistant[i, np.frombuffer(alleles.upper().encode("ascii"), dtype=np.uint8)] = True
+            self.targets.append({
+                **t,
+                "sequence": t["sequence"].upper(),
+                "codes": encode(t["sequence"].upper()),
+                "positions": positions,
+                "ref_aa": [m[1] for m in muts],
+                "resistant": resistant,
+            })
+
+    def __len__(self):
+        return sum(len(t["positions"]) for t in self.targets)
+
+    def scan(self, query: str):
+        """
+        Revisa todas las posiciones del panel en `query` (mayúsculas).
+        Retorna una lista de dicts por posición evaluada: gen, posición,
+        alelo de referencia y encontrado, si es resistente (alelo del panel e
+        identidad local suficiente) y la ubicación.
+        """
+        results = []
+        for t in self.targets:
+            ref = t["sequence"]
+            hit = locate(query, ref)
+            if hit is None:
+                continue
+            start, strand = hit
+            lo, hi = max(start, 0), min(start + len(ref), len(query))
+            region = query[lo:hi]
+            if strand == "-":
+                region = reverse_complement(region)
+            # Alinear la región con la referencia (puede estar truncada en un borde)
+            ref_from = (lo - start) if strand == "+" else (start + len(ref) - hi)
+            region_codes = encode(region)
+            ref_codes = t["codes"][ref_from:ref_from + len(region_codes)]
+            same = region_codes == ref_codes
+            identity = float(same.mean() * 100) if len(region_codes) else 0.0
+            coverage = len(region_codes) / len(ref) * 100
+
+            # Traducción en el marco de la referencia y búsqueda vectorizada
+            frame_shift = (-ref_from) % 3
+            aa = translate(region_codes[frame_shift:])
+            codon_idx = t["positions"] - t["first_codon"] - (ref_from + frame_shift) // 3
+            present = (codon_idx >= 0) & (codon_idx < len(aa))
+            found = np.full(len(codon_idx), ord("-"), dtype=np.uint8)
+            found[present] = aa[codon_idx[present]]
+            # Identidad en la ventana de cada codón (sumas acumuladas de coincidencias)
+            matches = np.concatenate(([0], np.cumsum(same)))
+            codon_at = codon_idx * 3 + frame_shift
+            lo_w = np.clip(codon_at - LOCAL_WINDOW, 0, len(same))
+            hi_w = np.clip(codon_at + 3 + LOCAL_WINDOW, 0, len(same))
+            local = (matches[hi_w] - matches[lo_w]) / np.maximum(hi_w - lo_w, 1) * 100
+            resistant = t["resistant"][np.arange(len(found)), found] & present & (local >= MIN_LOCAL_IDENTITY)
+
+            for i in range(len(found)):
+                if not present[i]:
+                    continue
+                results.append({
+                    "gene": t["gene_name"],
+                    "position": int(t["positions"][i]),
+                    "ref_aa": t["ref_aa"][i],
+                    "found_aa": chr(found[i]),
+                    "mutation": f"{t['ref_aa'][i]}{t['positions'][i]}{chr(found[i])}",
+                    "resistant": bool(resistant[i]),
+                    "identity": round(identity, 2),
+                    "coverage": round(coverage, 2),
+                    "start": lo,
+                    "end": hi,
+                    "strand": strand,
+                    "source": t.get("source"),
+                    "class": t.get("antibiotic_class"),
+                })
+        return results
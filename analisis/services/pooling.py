@@ -0,0 +1,65 @@
+"""
+Pool de procesos de los analizadores (contigs por lotes, lecturas por bloques).
+
+run_pooled() envía las tareas con como máximo `in_flight` en vuelo (memoria
+acotada) y entrega los resultados en el orden de envío. Mientras espera
+despierta cada POLL_SECONDS y llama a checkpoint(0.0): una cancelación o el
+presupuesto de reloj se atienden aunque un lote tarde minutos, no solo
+cuando termina. Si checkpoint o merge lanzan una excepción, el pool se
+cierra sin esperar las tareas en ejecución ni en cola.
+
+Los procesos no se crean con fork: el servidor tiene varios hilos (pool de
+jobs, reaper, latidos) y un hijo bifurcado podría heredar un lock tomado.
+Se usa forkserver (spawn donde no existe), con el módulo de la tarea
+precargado en el servidor para no importarlo en cada proceso.
+
+No depende de Django.
+"""
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+POLL_SECONDS = 1.0
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _context(preload):
+    context = multiprocessing.get_context(START_METHOD)
+    if START_METHOD == "forkserver":
+        # Solo tiene efecto antes de que arranque el servidor (primer pool del proceso)
+        context.set_forkserver_preload(preload)
+    return context
+
+
+def run_pooled(fn, tasks, merge, workers, initializer=None, initargs=(), in_flight=None, checkpoint=None,
+               poll_seconds=POLL_SECONDS):
+    """
+    Ejecuta fn(*args, **kwargs) por cada (args, kwargs) de `tasks` en un pool
+    de `workers` procesos y pasa cada resultado a merge() en orden.
+    in_flight: tareas enviadas a la vez (por defecto 2 por proceso).
+    checkpoint(worker_cpu): callback opcional mientras se espera.
+    """
+    in_flight = in_flight or workers * 2
+    # Sin `with`: su salida esperaría a las tareas en ejecución aun tras una cancelación
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=_context([fn.__module__]),
+                               initializer=initializer, initargs=initargs)
+    pending = []
+
+    def drain(limit):
+        while len(pending) > limit:
+            if pending[0].done():
+                merge(pending.pop(0).result())
+                continue
+            # Solo las que siguen corriendo: las ya terminadas devolverían enseguida
+            wait([f for f in pending if not f.done()], timeout=poll_seconds, return_when=FIRST_COMPLETED)
+            if checkpoint:
+                checkpoint(0.0)
+
+    try:
+        for args, kwargs in tasks:
+            pending.append(pool.submit(fn, *args, **kwargs))
+            drain(in_flight - 1)
+        drain(0)
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
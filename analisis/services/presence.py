@@ -0,0 +1,262 @@
+"""
+Matriz dispersa muestra × gen para vigilancia (presencia e identidad).
+
+Cada muestra (secuencia analizada) es una fila con los genes detectados en
+su último análisis y la identidad de cada uno. La matriz se guarda en
+formato CSR con arreglos NumPy (indptr, índices de gen, identidades) más
+columnas por muestra (id, fecha en días, dueño) y se persiste como .npz
+comprimido.
+
+Las actualizaciones son incrementales: update() agrega la fila nueva a un
+búfer y marca como borrada la anterior de esa muestra; los búferes se
+incorporan a los arreglos en la próxima consulta y las filas borradas se
+compactan cuando superan COMPACT_RATIO. Las consultas (co-ocurrencia, serie
+temporal, perfiles más parecidos) son operaciones vectorizadas sobre los
+arreglos, sin recorrer muestras en Python.
+
+No depende de Django.
+"""
+import os
+import tempfile
+from datetime import date, timedelta
+
+import numpy as np
+
+COMPACT_RATIO = 0.25
+EPOCH = date(1970, 1, 1)
+BUCKETS = ("day", "week", "month", "year")
+
+
+def day_number(d):
+    return (d - EPOCH).days
+
+
+class PresenceMatrix:
+    def __init__(self):
+        self.genes = []
+        self._gene_index = {}
+        self.samples = np.empty(0, dtype=np.int64)
+        self.days = np.empty(0, dtype=np.int32)
+        self.owners = np.empty(0, dtype=np.int64)
+        self.alive = np.empty(0, dtype=bool)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.empty(0, dtype=np.int32)
+        self.identity = np.empty(0, dtype=np.float32)
+        self._row_of = {}      # id de muestra → fila viva
+        self._pending = []     # filas nuevas aún no incorporadas
+        self._pending_dead = []  # posiciones en _pending ya reemplazadas o quitadas
+        self._entry_rows = None
+
+    def __len__(self):
+        return len(self._row_of)
+
+    # ---------- actualización ----------
+
+    def _gene(self, name):
+        if name not in self._gene_index:
+            self._gene_index[name] = len(self.genes)
+            self.genes.append(name)
+        return self._gene_index[name]
+
+    def update(self, sample, day, owner, hits):
+        """
+        Reemplaza la fila de `sample` (id de la muestra). day: fecha (date o
+        número de día); hits: {gen: identidad %}.
+        """
+        if isinstance(day, date):
+            day = day_number(day)
+        self.remove(sample)
+        genes = np.array([self._gene(g) for g in hits], dtype=np.int32)
+        order = np.argsort(genes)
+        values = np.array(list(hits.values()), dtype=np.float32)
+        self._pending.append((sample, day, owner, genes[order], values[order]))
+        self._row_of[sample] = len(self.samples) + len(self._pending) - 1
+
+    def remove(self, sample):
+        """Quita la muestra (si estaba)."""
+        row = self._row_of.pop(sample, None)
+        if row is None:
+            return
+        if row < len(self.samples):
+            self.alive[row] = False
+        else:
+            self._pending_dead.append(row - len(self.samples))
+
+    def _flush(self):
+        """Incorpora las filas del búfer a los arreglos CSR."""
+        if not self._pending:
+            return
+        samples, days, owners, genes, values = zip(*self._pending)
+        alive = np.ones(len(samples), dtype=bool)
+        alive[self._pending_dead] = False
+        self._pending, self._pending_dead = [], []
+        lengths = np.array([len(g) for g in genes], dtype=np.int64)
+        self.samples = np.concatenate([self.samples, np.array(samples, dtype=np.int64)])
+        self.days = np.concatenate([self.days, np.array(days, dtype=np.int32)])
+        self.owners = np.concatenate([self.owners, np.array(owners, dtype=np.int64)])
+        self.alive = np.concatenate([self.alive, alive])
+        self.indptr = np.concatenate([self.indptr, self.indptr[-1] + np.cumsum(lengths)])
+        self.indices = np.concatenate([self.indices, *genes])
+        self.identity = np.concatenate([self.identity, *values])
+        self._entry_rows = None
+        if (~self.alive).sum() > COMPACT_RATIO * len(self.alive):
+            self._compact()
+
+    def _compact(self):
+        """Elimina las filas borradas."""
+        keep = np.flatnonzero(self.alive)
+        lengths = np.diff(self.indptr)[keep]
+        entries = np.repeat(self.alive, np.diff(self.indptr))
+        self.samples, self.days, self.owners = self.samples[keep], self.days[keep], self.owners[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        self.indices, self.identity = self.indices[entries], self.identity[entries]
+        self._row_of = {int(s): i for i, s in enumerate(self.samples)}
+        self._entry_rows = None
+
+    def _ready(self):
+        self._flush()
+        if self._entry_rows is None:
+            # Fila de cada entrada (índice inverso de indptr)
+            self._entry_rows = np.repeat(np.arange(len(self.samples)), np.diff(self.indptr))
+
+    def _rows_mask(self, owner=None):
+        mask = self.alive.copy()
+        if owner is not None:
+            mask &= self.owners == owner
+        return mask
+
+    # ---------- consultas ----------
+
+    def profile(self, sample):
+        """{gen: identidad} de la muestra (None si no está)."""
+        self._ready()
+        row = self._row_of.get(sample)
+        if row is None:
+            return None
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        return {self.genes[g]: round(float(v), 2) for g, v in zip(self.indices[lo:hi], self.identity[lo:hi])}
+
+    def co_occurrence(self, gene, owner=None, limit=20):
+        """
+        Genes que aparecen junto a `gene`: [{gene, samples, jaccard}] por
+        muestras compartidas, y el total de muestras con `gene`.
+        """
+        self._ready()
+        g = self._gene_index.get(gene)
+        if g is None:
+            return 0, []
+        rows_ok = self._rows_mask(owner)
+        with_gene = np.zeros(len(self.samples), dtype=bool)
+        with_gene[self._entry_rows[self.indices == g]] = True
+        with_gene &= rows_ok
+        n_gene = int(with_gene.sum())
+        live = rows_ok[self._entry_rows]
+        together = np.bincount(self.indices[with_gene[self._entry_rows]], minlength=len(self.genes))
+        totals = np.bincount(self.indices[live], minlength=len(self.genes))
+        together[g] = 0
+        top = np.argsort(-together, kind="stable")[:limit]
+        return n_gene, [
+            {"gene": self.genes[i], "samples": int(together[i]),
+             "jaccard": round(float(together[i] / (n_gene + totals[i] - together[i])), 4)}
+            for i in top if together[i]
+        ]
+
+    def time_series(self, gene, bucket="month", owner=None):
+        """
+        Prevalencia de `gene` por período: [{period, samples, with_gene}]
+        (muestras analizadas y muestras con el gen, por fecha de la muestra).
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Período no válido: {bucket} (opciones: {', '.join(BUCKETS)})")
+        self._ready()
+        rows_ok = self._rows_mask(owner)
+        with_gene = np.zeros(len(self.samples), dtype=bool)
+        g = self._gene_index.get(gene)
+        if g is not None:
+            with_gene[self._entry_rows[self.indices == g]] = True
+        with_gene &= rows_ok
+        keys = self._period_keys(self.days[rows_ok], bucket)
+        periods, totals = np.unique(keys, return_counts=True)
+        hits = np.unique(self._period_keys(self.days[with_gene], bucket), return_counts=True)
+        hit_count = dict(zip(hits[0].tolist(), hits[1].tolist()))
+        return [{"period": self._period_label(int(p), bucket), "samples": int(n), "with_gene": hit_count.get(int(p), 0)}
+                for p, n in zip(periods, totals)]
+
+    @staticmethod
+    def _period_keys(days, bucket):
+        if bucket == "day":
+            return days.astype(np.int64)
+        if bucket == "week":
+            return (days.astype(np.int64) + 3) // 7  # semanas que empiezan en lunes
+        months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        return months if bucket == "month" else months // 12
+
+    @staticmethod
+    def _period_label(key, bucket):
+        if bucket == "day":
+            return (EPOCH + timedelta(days=key)).isoformat()
+        if bucket == "week":
+            return (EPOCH + timedelta(days=key * 7 - 3)).isoformat()
+        if bucket == "month":
+            return f"{1970 + key // 12:04d}-{key % 12 + 1:02d}"
+        return f"{1970 + key:04d}"
+
+    def nearest(self, sample, k=10, owner=None):
+        """
+        Muestras con el perfil de genes más parecido (Jaccard sobre
+        presencia): [{sample, jaccard, shared}], sin la muestra consultada.
+        """
+        self._ready()
+        row = self._row_of.get(sample)
+        if row is None:
+            return []
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        target = self.indices[lo:hi]
+        if not len(target):
+            return []
+        rows_ok = self._rows_mask(owner)
+        rows_ok[row] = False
+        in_target = np.zeros(len(self.genes), dtype=bool)
+        in_target[target] = True
+        shared_entries = in_target[self.indices] & rows_ok[self._entry_rows]
+        shared = np.bincount(self._entry_rows[shared_entries], minlength=len(self.samples))
+        union = np.diff(self.indptr) + len(target) - shared
+        jaccard = np.where(rows_ok & (shared > 0), shared / np.maximum(union, 1), 0.0)
+        candidates = np.flatnonzero(jaccard)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-jaccard[candidates], k)[:k]]
+        candidates = candidates[np.lexsort((self.samples[candidates], -jaccard[candidates]))]
+        return [{"sample": int(self.samples[i]), "jaccard": round(float(jaccard[i]), 4), "shared": int(shared[i])}
+                for i in candidates]
+
+    # ---------- persistencia ----------
+
+    def save(self, path):
+        """Guarda la matriz (compactada) en un .npz; escritura atómica."""
+        self._flush()
+        if not self.alive.all():
+            self._compact()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(suffix=".npz", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, genes=np.array(self.genes, dtype=str), samples=self.samples, days=self.days,
+                                    owners=self.owners, indptr=self.indptr, indices=self.indices,
+                                    identity=self.identity)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        matrix = cls()
+        with np.load(path) as data:
+            matrix.genes = data["genes"].tolist()
+            matrix.samples, matrix.days, matrix.owners = data["samples"], data["days"], data["owners"]
+            matrix.indptr, matrix.indices, matrix.identity = data["indptr"], data["indices"], data["identity"]
+        matrix._gene_index = {g: i for i, g in enumerate(matrix.genes)}
+        matrix.alive = np.ones(len(matrix.samples), dtype=bool)
+        matrix._row_of = {int(s): i for i, s in enumerate(matrix.samples)}
+        return matrix
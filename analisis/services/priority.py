@@ -0,0 +1,46 @@
+"""
+Panel de genes prioritarios (carril rápido de alertas).
+
+Los genes de importancia clínica (carbapenemasas, mcr...) se buscan antes
+que el resto del panel; si alguno supera HIGH_IDENTITY y HIGH_COVERAGE la
+alerta se emite en ese momento, sin esperar al análisis completo.
+
+Cada entrada del panel es una familia: "blaNDM" abarca blaNDM-1, blaNDM5...;
+"mcr-1" abarca mcr-1.1 pero no mcr-10.
+
+No depende de Django.
+"""
+from analisis.constants import HIGH_COVERAGE, HIGH_IDENTITY
+
+DEFAULT_PRIORITY_GENES = ("blaNDM", "blaKPC", "mcr-1")
+
+
+def parse_panel(text):
+    """Panel a partir de un texto separado por comas o espacios."""
+    return tuple(g for g in text.replace(",", " ").split() if g)
+
+
+def is_priority(gene_name, panel):
+    """True si `gene_name` pertenece a alguna familia del panel."""
+    for family in panel:
+        if gene_name == family:
+            return True
+        if gene_name.startswith(family):
+            following = gene_name[len(family)]
+            # Tras un número solo sigue un separador (mcr-1.1, no mcr-10)
+            if not following.isalnum() or (family[-1].isalpha() and following.isdigit()):
+                return True
+    return False
+
+
+def split_panel(genes, panel, name=lambda g: g.gene_name):
+    """(genes prioritarios, resto) en el orden de `genes`."""
+    first, rest = [], []
+    for gene in genes:
+        (first if is_priority(name(gene), panel) else rest).append(gene)
+    return first, rest
+
+
+def is_critical(hit):
+    """Hit (identidad y cobertura en %) que por sí solo vuelve HIGH el riesgo."""
+    return hit["identity"] >= HIGH_IDENTITY and hit["coverage"] >= HIGH_COVERAGE
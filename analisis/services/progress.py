@@ -0,0 +1,44 @@
+"""
+Progreso de un AnalysisJob en ejecución.
+
+El analizador informa cada gen evaluado; ProgressReporter agrupa esas
+actualizaciones y las escribe en AnalysisJob.progress como máximo cada
+MIN_INTERVAL segundos, para que el endpoint SSE las transmita sin cargar la
+base de datos con una escritura por gen.
+"""
+import time
+
+from analisis.models import AnalysisJob
+
+MIN_INTERVAL = 0.5
+
+
+class ProgressReporter:
+    def __init__(self, job_id, genes_total=0, bp_total=0, contigs_total=0):
+        self.job_id = job_id
+        self.state = {
+            "genes_screened": 0,
+            "genes_total": genes_total,
+            "contigs_done": 0,
+            "contigs_total": contigs_total,
+            "bp_scanned": 0,
+            "bp_total": bp_total,
+            "reads": 0,
+            "hits": [],
+        }
+        self._last_write = 0.0
+
+    def update(self, hit=None, force=False, **fields):
+        """Actualiza contadores (y agrega un hit parcial); escribe si pasó el intervalo."""
+        self.state.update(fields)
+        if hit and hit not in self.state["hits"]:
+            self.state["hits"].append(hit)
+            force = True  # Los hits se publican de inmediato
+        now = time.monotonic()
+        if force or now - self._last_write >= MIN_INTERVAL:
+            self._last_write = now
+            AnalysisJob.objects.filter(pk=self.job_id).update(progress=dict(self.state))
+
+    def flush(self, **fields):
+        """Escribe el estado ya, sin esperar el intervalo (p. ej. al terminar)."""
+        self.update(force=True, **fields)
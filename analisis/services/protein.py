@@ -0,0 +1,229 @@
+"""
+Búsqueda traducida (aminoácidos) en seis marcos de lectura.
+
+Las variantes sinónimas y los homólogos distantes quedan por debajo de los
+umbrales de identidad cuando se comparan nucleótidos. Aquí la query se
+traduce en sus seis marcos con NumPy (tabla de codones de mutations) y se
+busca en un índice de k-mers de aminoácidos de los genes de referencia
+traducidos. Cada k-mer compartido vota por (gen, diagonal); solo las
+diagonales con al menos MIN_SEEDS semillas se alinean (Smith-Waterman con
+BLOSUM62, PairwiseAligner) en una ventana alrededor de la diagonal, nunca la
+query completa.
+
+Los marcos se procesan en tramos de CHUNK_AA aminoácidos para acotar la
+memoria de las semillas en genomas grandes.
+
+Como en la búsqueda en nucleótidos (engine), de cada clúster de alelos (ver
+clustering) se reporta un solo hit: el aceptado de mayor identidad y
+cobertura (a igualdad, el representante).
+
+No depende de Django.
+"""
+import functools
+
+import numpy as np
+
+from .clustering import hierarchy
+from .mutations import encode, translate
+
+AA_K = 4
+MIN_SEEDS = 4        # semillas en la misma diagonal (descarta coincidencias al azar)
+PAD_AA = 30          # margen de la ventana de alineamiento (indels)
+CHUNK_AA = 100_000
+GAP_OPEN, GAP_EXTEND = -11, -1
+# Umbrales por defecto para la plataforma (fracción 0-1)
+MIN_IDENTITY = 0.40
+MIN_COVERAGE = 0.50
+
+AMINO_ACIDS = b"ACDEFGHIKLMNPQRSTVWY"
+_AA_CODES = np.full(256, -1, dtype=np.int64)
+for _i, _a in enumerate(AMINO_ACIDS):
+    _AA_CODES[_a] = _i
+# Complemento en códigos TCAG (T↔A, C↔G); 4 (ambigua) se mantiene
+_COMPLEMENT_CODES = np.array([2, 3, 0, 1, 4], dtype=np.uint8)
+
+
+
+@functools.cache
+def blosum62():
+    from Bio.Align import substitution_matrices
+    return substitution_matrices.load("BLOSUM62")
+
+
+def _aligner():
+    from Bio.Align import PairwiseAligner
+    return PairwiseAligner(mode="local", substitution_matrix=blosum62(),
+                           open_gap_score=GAP_OPEN, extend_gap_score=GAP_EXTEND)
+
+
+def six_frames(seq):
+    """
+    Genera (hebra, marco, aminoácidos como bytes uint8) para los seis marcos.
+    El marco es el desplazamiento (0-2) en la hebra correspondiente.
+    """
+    codes = encode(seq)
+    rc = _COMPLEMENT_CODES[codes][::-1]
+    for strand, strand_codes in (("+", codes), ("-", rc)):
+        for frame in range(3):
+            yield strand, frame, translate(strand_codes[frame:])
+
+
+def kmer_codes(aa, k=AA_K):
+    """Códigos de los k-mers de aminoácidos y su posición (se omiten los que tienen X o *)."""
+    codes = _AA_CODES[aa]
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    invalid = np.concatenate([[0], np.cumsum(codes < 0)])
+    ok = invalid[k:] - invalid[:-k] == 0
+    values = np.zeros(n, dtype=np.int64)
+    for j in range(k):
+        values = values * len(AMINO_ACIDS) + np.maximum(codes[j:j + n], 0)
+    positions = np.flatnonzero(ok)
+    return values[positions], positions
+
+
+class ProteinIndex:
+    """
+    Índice de k-mers de aminoácidos de los genes de referencia (RefGene u
+    objetos con gene_name, sequence, source y antibiotic_class), traducidos
+    en el marco 0 y sin el codón de término final.
+    """
+
+    def __init__(self, genes, k=AA_K):
+        self.k = k
+        self.genes = list(genes)
+        self.proteins = []
+        codes, gene_ids, positions = [], [], []
+        for i, gene in enumerate(self.genes):
+            aa = translate(encode(gene.sequence.upper()))
+            if len(aa) and aa[-1] == ord("*"):
+                aa = aa[:-1]
+            self.proteins.append(aa.tobytes().decode("ascii"))
+            c, p = kmer_codes(aa, k)
+            codes.append(c)
+            positions.append(p)
+            gene_ids.append(np.full(len(c), i, dtype=np.int64))
+        order = np.argsort(np.concatenate(codes or [np.empty(0, np.int64)]), kind="stable")
+        self._codes = np.concatenate(codes or [np.empty(0, np.int64)])[order]
+        self._gene = np.concatenate(gene_ids or [np.empty(0, np.int64)])[order]
+        self._pos = np.concatenate(positions or [np.empty(0, np.int64)])[order]
+        self.max_len = max((len(p) for p in self.proteins), default=0)
+        self.groups = hierarchy(range(len(self.genes)), lambda i: getattr(self.genes[i], "cluster", None),
+                                lambda i: getattr(self.genes[i], "representative", True))
+
+    def __len__(self):
+        return len(self.genes)
+
+    # ---------- semillas ----------
+
+    def _seeds(self, q_codes, q_pos):
+        """Pares (gen, diagonal) de cada k-mer compartido con la query."""
+        left = np.searchsorted(self._codes, q_codes, "left")
+        counts = np.searchsorted(self._codes, q_codes, "right") - left
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        starts = np.repeat(left - (np.cumsum(counts) - counts), counts)
+        ref_idx = np.arange(total) + starts
+        return self._gene[ref_idx], np.repeat(q_pos, counts) - self._pos[ref_idx]
+
+    def candidates(self, aa):
+        """
+        Diagonales con al menos MIN_SEEDS semillas en un marco traducido.
+        Retorna {gen: (semillas, diagonal)} con la mejor diagonal de cada gen.
+        """
+        codes, positions = kmer_codes(aa, self.k)
+        best = {}
+        span = len(aa)
+        modulus = span + 2 * self.max_len + 1
+        for lo in range(0, max(span, 1), CHUNK_AA):
+            hi = lo + CHUNK_AA
+            # Diagonales que empiezan en [lo, hi): sus semillas caen antes de hi + max_len
+            sel = (positions >= lo) & (positions < hi + self.max_len)
+            genes, diagonals = self._seeds(codes[sel], positions[sel])
+            # El primer tramo incluye diagonales negativas (gen truncado al inicio)
+            keep = (diagonals >= (lo if lo else -self.max_len)) & (diagonals < hi)
+            genes, diagonals = genes[keep], diagonals[keep]
+            if not len(genes):
+                continue
+            keys = genes * modulus + (diagonals + self.max_len)
+            uniq, votes = np.unique(keys, return_counts=True)
+            for key, n in zip(uniq[votes >= MIN_SEEDS], votes[votes >= MIN_SEEDS]):
+                gene, diagonal = divmod(int(key), modulus)
+                diagonal -= self.max_len
+                if n > best.get(gene, (0, 0))[0]:
+                    best[gene] = (int(n), diagonal)
+        return best
+
+    # ---------- búsqueda ----------
+
+    def search(self, seq, min_identity=0.0, min_coverage=0.0, stats=None, progress=None):
+        """
+        Busca los genes del índice en los seis marcos de `seq` (mayúsculas).
+        Retorna el mejor hit por clúster: dicts con gene, source, class, matches
+        (semillas), identity y coverage (0-1, a nivel de proteína), start/end
+        (base 0, hebra directa), strand, frame y score.
+        stats: dict opcional donde se acumula "alignments".
+        progress(): callback opcional tras cada alineamiento y cada marco
+        (p. ej. el punto de control del job); si lanza una excepción la
+        búsqueda se detiene ahí.
+        """
+        hits = {}
+        alignments = 0
+        aligner = _aligner()
+        for strand, frame, aa in six_frames(seq):
+            query = aa.tobytes().decode("ascii")
+            for gene_id, (votes, diagonal) in self.candidates(aa).items():
+                ref = self.proteins[gene_id]
+                lo = max(diagonal - PAD_AA, 0)
+                hi = min(diagonal + len(ref) + PAD_AA, len(query))
+                alignments += 1
+                result = aligner.align(query[lo:hi], ref)
+                if progress:
+                    progress()
+                if result.score <= 0:
+                    continue
+                hit = self._hit(result[0], gene_id, lo, strand, frame, len(seq), votes)
+                if hit["score"] > hits.get(gene_id, {"score": float("-inf")})["score"]:
+                    hits[gene_id] = hit
+            if progress:
+                progress()
+        if stats is not None:
+            stats["alignments"] = stats.get("alignments", 0) + alignments
+        accepted = {i: h for i, h in hits.items() if h["identity"] >= min_identity and h["coverage"] >= min_coverage}
+        results = []
+        for rep, members in self.groups:
+            best = None
+            for gene_id in (rep, *members):
+                hit = accepted.get(gene_id)
+                if hit and (best is None or (hit["identity"], hit["coverage"]) > (best["identity"], best["coverage"])):
+                    best = hit
+            if best is not None:
+                results.append(best)
+        return results
+
+    def _hit(self, alignment, gene_id, offset, strand, frame, seq_len, votes):
+        counts = alignment.counts()
+        columns = counts.aligned + counts.gaps
+        (q_start, *_, q_end), (r_start, *_, r_end) = alignment.coordinates
+        q_start, q_end = offset + int(q_start), offset + int(q_end)
+        # Aminoácidos → nucleótidos de la hebra traducida → hebra directa
+        nt_start, nt_end = frame + 3 * q_start, frame + 3 * q_end
+        if strand == "-":
+            nt_start, nt_end = seq_len - nt_end, seq_len - nt_start
+        gene = self.genes[gene_id]
+        protein = self.proteins[gene_id]
+        return {
+            "gene": gene.gene_name,
+            "source": gene.source,
+            "class": gene.antibiotic_class,
+            "matches": votes,
+            "identity": counts.identities / columns if columns else 0.0,
+            "coverage": (int(r_end) - int(r_start)) / len(protein) if protein else 0.0,
+            "start": nt_start,
+            "end": nt_end,
+            "strand": strand,
+            "frame": f"{strand}{frame + 1}",
+            "score": alignment.score,
+        }
@@ -0,0 +1,232 @@
+"""
+Modo lecturas: mapea lecturas cortas (FASTQ, opcionalmente comprimido) contra los
+genes de referencia sin ensamblar.
+
+Cada lectura se asigna a un gen votando por diagonal con un índice de k-mers;
+la profundidad por base se acumula en arreglos de diferencias NumPy (un +1 al
+inicio y un -1 al final de cada lectura), así la memoria depende del tamaño
+del panel y no del número de lecturas. Los bloques de lecturas se procesan en
+paralelo con un pool de procesos.
+
+No depende de Django.
+"""
+import io
+import os
+import time
+from collections import Counter
+
+import numpy as np
+
+from .compression import open_binary
+from .mutations import reverse_complement
+from .pooling import run_pooled
+
+DEFAULT_K = 21
+SEED_STRIDE = 8
+MIN_SEED_HITS = 2
+DEFAULT_CHUNK_READS = 20000
+
+
+class FastqFormatError(ValueError):
+    """El contenido no es un FASTQ válido."""
+
+
+def open_reads(source):
+    """
+    Abre un FASTQ en modo texto a partir de una ruta o un objeto binario;
+    gzip/bz2/xz se detectan por sus bytes mágicos y se descomprimen al vuelo.
+    """
+    return io.TextIOWrapper(open_binary(source), encoding="ascii", errors="replace")
+
+
+def iter_fastq(handle):
+    """Genera las secuencias (en mayúsculas) de un FASTQ de 4 líneas por registro."""
+    line_no = 0
+    while True:
+        header = handle.readline()
+        if not header:
+            return
+        if not header.strip():
+            line_no += 1
+            continue
+        seq = handle.readline()
+        plus = handle.readline()
+        qual = handle.readline()
+        line_no += 4
+        if not header.startswith("@") or not plus.startswith("+"):
+            raise FastqFormatError(f"Registro FASTQ mal formado cerca de la línea {line_no - 3}")
+        seq = seq.strip().upper()
+        if len(qual.strip()) != len(seq):
+            raise FastqFormatError(f"Línea {line_no}: la calidad no coincide con el largo de la secuencia")
+        yield seq
+
+
+def iter_chunks(reads, size):
+    chunk = []
+    for read in reads:
+        chunk.append(read)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class KmerIndex:
+    """k-mer → (índice del gen, posición). Los k-mers repetidos entre genes se descartan."""
+
+    def __init__(self, genes, k=DEFAULT_K):
+        self.k = k
+        self.names = list(genes)
+        self.lengths = [len(genes[n]) for n in self.names]
+        index, ambiguous = {}, set()
+        for gi, name in enumerate(self.names):
+            seq = genes[name].upper()
+            for pos in range(len(seq) - k + 1):
+                kmer = seq[pos:pos + k]
+                if kmer in index and index[kmer][0] != gi:
+                    ambiguous.add(kmer)
+                index.setdefault(kmer, (gi, pos))
+        for kmer in ambiguous:
+            del index[kmer]
+        self.index = index
+
+    def assign(self, read):
+        """
+        Retorna (gen, inicio en el gen, k-mers coincidentes, k-mers muestreados)
+        para la mejor diagonal de la lectura en cualquiera de las hebras, o None.
+        """
+        k, index = self.k, self.index
+        for strand_seq in (read, reverse_complement(read)):
+            offsets = range(0, len(strand_seq) - k + 1, SEED_STRIDE)
+            votes = Counter()
+            for off in offsets:
+                hit = index.get(strand_seq[off:off + k])
+                if hit is not None:
+                    votes[(hit[0], hit[1] - off)] += 1
+            if votes:
+                (gi, start), n = votes.most_common(1)[0]
+                if n >= MIN_SEED_HITS:
+                    return gi, start, n, len(offsets)
+        return None
+
+
+# ---------- trabajo por bloque (se ejecuta en los procesos del pool) ----------
+
+_worker_index = None
+
+
+def _init_worker(genes, k):
+    global _worker_index
+    _worker_index = KmerIndex(genes, k)
+
+
+def _map_chunk(reads, index=None):
+    """
+    Asigna un bloque de lecturas. Retorna, por gen, el arreglo de diferencias
+    de profundidad y los contadores (lecturas, k-mers coincidentes/muestreados),
+    más los segundos de CPU usados.
+    """
+    index = index or _worker_index
+    cpu_start = time.thread_time()
+    starts = [[] for _ in index.names]
+    ends = [[] for _ in index.names]
+    seed_hits = np.zeros(len(index.names), dtype=np.int64)
+    seed_total = np.zeros(len(index.names), dtype=np.int64)
+
+    for read in reads:
+        hit = index.assign(read)
+        if hit is None:
+            continue
+        gi, start, n, sampled = hit
+        length = index.lengths[gi]
+        lo, hi = max(start, 0), min(start + len(read), length)
+        if lo >= hi:
+            continue
+        starts[gi].append(lo)
+        ends[gi].append(hi)
+        seed_hits[gi] += n
+        seed_total[gi] += sampled
+
+    diffs = {}
+    for gi, length in enumerate(index.lengths):
+        if starts[gi]:
+            diff = np.zeros(length + 1, dtype=np.int32)
+            np.add.at(diff, np.asarray(starts[gi]), 1)
+            np.add.at(diff, np.asarray(ends[gi]), -1)
+            diffs[gi] = (diff, len(starts[gi]))
+    return diffs, seed_hits, seed_total, len(reads), time.thread_time() - cpu_start
+
+
+def map_reads(source, genes, k=DEFAULT_K, chunk_reads=DEFAULT_CHUNK_READS, workers=None, progress=None,
+              checkpoint=None):
+    """
+    Mapea las lecturas de `source` (ruta u objeto binario FASTQ, comprimido o no)
+    contra `genes` ({nombre: secuencia}).
+
+    workers: procesos del pool (None → CPUs disponibles; 1 → sin pool).
+    progress(lecturas procesadas): callback opcional.
+    checkpoint(worker_cpu=0.0): callback opcional tras cada bloque y, con
+    pool, cada segundo mientras espera uno (p. ej. budget.JobBudget); si lanza
+    una excepción se descartan los bloques en cola y no se espera a los que
+    están en ejecución.
+
+    Retorna (total de lecturas, lista de dicts por gen con lecturas asignadas,
+    amplitud de cobertura %, profundidad media e identidad estimada %).
+    """
+    workers = workers or os.cpu_count() or 1
+    names = list(genes)
+    diffs = [np.zeros(len(genes[n]) + 1, dtype=np.int64) for n in names]
+    assigned = np.zeros(len(names), dtype=np.int64)
+    seed_hits = np.zeros(len(names), dtype=np.int64)
+    seed_total = np.zeros(len(names), dtype=np.int64)
+    total_reads = 0
+
+    def merge(result, pooled=False):
+        nonlocal total_reads
+        chunk_diffs, hits, sampled, n_reads, cpu = result
+        for gi, (diff, n) in chunk_diffs.items():
+            diffs[gi] += diff
+            assigned[gi] += n
+        seed_hits[:] += hits
+        seed_total[:] += sampled
+        total_reads += n_reads
+        if progress:
+            progress(total_reads)
+        if checkpoint:
+            # Sin pool la CPU ya corre en el hilo que mide el checkpoint
+            checkpoint(cpu if pooled else 0.0)
+
+    handle = open_reads(source)
+    try:
+        chunks = iter_chunks(iter_fastq(handle), chunk_reads)
+        if workers == 1:
+            index = KmerIndex(genes, k)
+            for chunk in chunks:
+                merge(_map_chunk(chunk, index))
+        else:
+            run_pooled(_map_chunk, (((chunk,), {}) for chunk in chunks), lambda result: merge(result, pooled=True),
+                       workers, initializer=_init_worker, initargs=(genes, k), checkpoint=checkpoint)
+    finally:
+        # Los objetos recibidos (p. ej. la subida de Streamlit) no se cierran
+        if isinstance(source, (str, os.PathLike)):
+            handle.close()
+        else:
+            handle.detach()
+
+    results = []
+    for gi, name in enumerate(names):
+        if not assigned[gi]:
+            continue
+        depth = np.cumsum(diffs[gi])[:-1]
+        kmer_identity = seed_hits[gi] / seed_total[gi] if seed_total[gi] else 0.0
+        results.append({
+            "gene": name,
+            "reads": int(assigned[gi]),
+            "breadth": round(float((depth > 0).mean() * 100), 2),
+            "mean_depth": round(float(depth.mean()), 2),
+            # Identidad por nucleótido estimada a partir de la fracción de k-mers compartidos
+            "identity": round(float(kmer_identity ** (1 / k)) * 100, 2),
+        })
+    results.sort(key=lambda r: (r["breadth"], r["mean_depth"]), reverse=True)
+    return total_reads, results
@@ -0,0 +1,97 @@
+"""
+Recuperación de jobs abandonados.
+
+Si el proceso que ejecutaba un análisis muere (timeout del worker, reinicio
+del servidor), el job queda en RUNNING para siempre y su lugar en el pool se
+pierde sin aviso. execute_job marca un latido (heartbeat_at) desde un hilo
+propio mientras corre; un job RUNNING sin latido durante `stale_seconds` se considera
+abandonado y se reencola (hasta `max_attempts` intentos) o se marca ERROR.
+Si el usuario había pedido cancelarlo, queda CANCELLED.
+
+Los jobs PENDING también se pierden al reiniciar (el pool es en memoria):
+resubmit_pending() encola en este proceso los que llevan más de
+settings.RAM_JOB_RESUBMIT_SECONDS esperando y no están en su cola. Con
+include_pending, reap_stale_jobs() además los reencola tras `stale_seconds`.
+
+El pool de análisis (jobs.scheduler) corre ambos al arrancar y cada
+settings.RAM_JOB_REAP_SECONDS. Si se desactiva (0), usar el comando desde
+cron, p. ej.:
+
+    */5 * * * * cd /ruta/al/proyecto && python manage.py reap_jobs
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from analisis.models import AnalysisJob
+from .jobs import submit_job
+from .view_cache import invalidate
+
+
+def stale_jobs(stale_seconds=None, include_pending=False):
+    """Jobs RUNNING sin latido (y, opcionalmente, PENDING) desde hace stale_seconds."""
+    stale_seconds = settings.RAM_JOB_STALE_SECONDS if stale_seconds is None else stale_seconds
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+    stale = Q(status="RUNNING", last_seen__lt=cutoff)
+    if include_pending:
+        stale |= Q(status="PENDING", created_at__lt=cutoff)
+    return (AnalysisJob.objects
+            .alias(last_seen=Coalesce("heartbeat_at", "started_at", "created_at"))
+            .filter(stale))
+
+
+def reap_job(job, max_attempts=None, requeue=True):
+    """
+    Cierra o reencola un job abandonado. La actualización es condicional
+    (mismo estado y mismo intento): si el worker revivió, o otro reaper ya lo
+    tomó, no se toca. Retorna el estado resultante o None.
+    """
+    max_attempts = settings.RAM_JOB_MAX_ATTEMPTS if max_attempts is None else max_attempts
+    same = AnalysisJob.objects.filter(pk=job.pk, status=job.status, attempts=job.attempts)
+    if job.cancel_requested:
+        status, summary = "CANCELLED", "Análisis cancelado por el usuario"
+    elif requeue and job.attempts < max_attempts:
+        status, summary = "PENDING", None
+    else:
+        status, summary = "ERROR", f"El análisis se interrumpió sin terminar ({job.attempts} intento(s))"
+    if not same.update(status=status, raw_summary=summary, progress={},
+                       heartbeat_at=None if status == "PENDING" else F("heartbeat_at")):
+        return None
+    invalidate(job.sequence.owner_id)
+    return status
+
+
+def reap_stale_jobs(stale_seconds=None, max_attempts=None, requeue=True, include_pending=False):
+    """
+    Recorre los jobs abandonados. Retorna ({estado: cantidad}, futures de los
+    reencolados en el pool de este proceso).
+    """
+    counts, futures = {}, []
+    for job in stale_jobs(stale_seconds, include_pending).select_related("sequence"):
+        status = reap_job(job, max_attempts, requeue)
+        if status is None:
+            continue
+        counts[status] = counts.get(status, 0) + 1
+        if status == "PENDING":
+            futures.append(submit_job(job.pk))
+    return counts, futures
+
+
+def resubmit_pending(grace_seconds=None, queued=()):
+    """
+    Encola los jobs PENDING creados hace más de `grace_seconds` que no están
+    en `queued` (claves de la cola de este proceso), p. ej. los que esperaban
+    en el pool cuando el servidor se reinició. Si otro proceso también los
+    tiene en cola, solo uno los ejecuta (jobs._claim). Retorna los futures.
+    """
+    grace_seconds = settings.RAM_JOB_RESUBMIT_SECONDS if grace_seconds is None else grace_seconds
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    orphans = (AnalysisJob.objects
+               .filter(status="PENDING", cancel_requested=False, created_at__lt=cutoff)
+               .exclude(pk__in=list(queued))
+               .order_by("created_at")
+               .values_list("pk", flat=True))
+    return [submit_job(pk) for pk in orphans]
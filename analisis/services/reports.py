@@ -1,9 +1,11 @@
 from django.template.loader import get_template
 from django.http import HttpResponse
-from xhtml2pdf import pisa
 import io
 
 def generar_pdf(template_src, context_dict={}):
+    # xhtml2pdf tarda ~1 s en importarse: se carga al generar el primer PDF
+    # (o antes, en segundo plano, ver services.warmup)
+    from xhtml2pdf import pisa
     template = get_template(template_src)
     html = template.render(context_dict)
     result = io.BytesIO()
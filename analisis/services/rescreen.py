@@ -0,0 +1,134 @@
+"""
+Re-screening incremental del archivo de secuencias.
+
+Cuando se agregan o modifican genes en ResistanceGene, solo esos genes se
+buscan en las secuencias ya analizadas y sus coincidencias se fusionan en el
+último AnalysisJob de cada secuencia. El costo es proporcional al delta del
+panel, no al panel completo.
+
+Como se reporta un hit por clúster de alelos (services.clustering), el delta
+se amplía a los clústeres completos de sus genes: se vuelve a elegir el mejor
+alelo de cada clúster entre los viejos y los nuevos, en vez de sumar un
+segundo hit junto al que ya tenía.
+
+Corre fuera de las peticiones: `manage.py load_ram_data --rescreen` lo lanza
+tras cargar el panel, y para los cambios hechos por otras vías (admin,
+scripts) se programa `manage.py rescreen_archive` con cron, p. ej. cada hora:
+
+    0 * * * * cd /ruta/al/proyecto && python manage.py rescreen_archive
+
+Sin genes nuevos o modificados no hace ninguna búsqueda.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from analisis.models import AnalysisJob, ResistanceGene, Sequence
+from .analyzers import analyze_reads
+from .contigs import screen_contigs
+from .jobs import save_gene_results, save_read_results, refresh_job_aggregates
+from .surveillance import record_job
+
+
+def pending_genes(job, genes):
+    """
+    Genes nuevos o modificados respecto a los analizados en `job`.
+    Los jobs anteriores al control de versiones usan su fecha de creación.
+    """
+    screened = job.panel_versions or {}
+    if not screened:
+        return [g for g in genes if g.updated_at > job.created_at]
+    return [g for g in genes if screened.get(str(g.pk)) != g.version]
+
+
+def with_clusters(genes):
+    """`genes` más los demás alelos de sus clústeres (ResistanceGene.representative)."""
+    clusters = {g.representative_id for g in genes if g.representative_id is not None}
+    names = {g.gene_name for g in genes}
+    others = ResistanceGene.objects.filter(representative_id__in=clusters).exclude(gene_name__in=names)
+    return list(genes) + list(others.order_by("pk"))
+
+
+def rescreen_job(job, genes):
+    """
+    Busca `genes` y el resto de sus clústeres en la secuencia del job y
+    fusiona las coincidencias: reemplaza los resultados previos de esos genes
+    y recalcula agregados. Retorna el número de genes detectados.
+    """
+    delta, genes = genes, with_clusters(genes)
+    path = job.sequence.fasta_file.path
+    if job.mode == "READS":
+        _, _, results = analyze_reads(path, genes=genes, workers=settings.RAM_READS_WORKERS)
+    else:
+        results = screen_contigs(path, genes, workers=settings.RAM_CONTIG_WORKERS,
+                                 search_mode=job.search_mode, backend=job.backend)["hits"]
+    names = [g.gene_name for g in genes]
+
+    with transaction.atomic():
+        job.detected_genes.filter(kind="GENE", gene_name__in=names).delete()
+        if job.mode == "READS":
+            save_read_results(job, results)
+        else:
+            save_gene_results(job, [
+                (r["gene"], r["matches"], r["identity"], r["coverage"], r["source"], r["class"],
+                 r["contig"], r["start"], r["end"])
+                for r in results
+            ])
+        versions = dict(job.panel_versions or {})
+        versions.update({str(g.pk): g.version for g in genes})
+        job.panel_versions = versions
+        job.raw_summary = (job.raw_summary or "") + (
+            f"\nRe-screening incremental {timezone.localtime():%Y-%m-%d %H:%M}: "
+            f"{len(delta)} gen(es) nuevo(s)/modificado(s), {len(results)} coincidencia(s)"
+        )
+        job.save(update_fields=["panel_versions", "raw_summary"])
+        refresh_job_aggregates(job)
+    record_job(job)
+    return len(results)
+
+
+def latest_jobs(batch_size=100):
+    """Último job DONE de cada secuencia, en lotes de `batch_size` secuencias."""
+    seq_ids = Sequence.objects.order_by("pk").values_list("pk", flat=True)
+    for offset in range(0, seq_ids.count(), batch_size):
+        batch = list(seq_ids[offset:offset + batch_size])
+        seen = set()
+        jobs = (AnalysisJob.objects
+                .filter(sequence_id__in=batch, status="DONE")
+                .select_related("sequence")
+                .order_by("sequence_id", "-created_at"))
+        latest = []
+        for job in jobs:
+            if job.sequence_id not in seen:
+                seen.add(job.sequence_id)
+                latest.append(job)
+        yield latest
+
+
+def rescreen_archive(batch_size=100, log=None):
+    """
+    Recorre el archivo por lotes y re-analiza cada secuencia solo contra
+    los genes que no estaban en su último análisis.
+    Retorna un resumen {jobs, genes, hits}.
+    """
+    genes = list(ResistanceGene.objects.all())
+    summary = {"jobs": 0, "genes": 0, "hits": 0}
+
+    for batch in latest_jobs(batch_size):
+        for job in batch:
+            delta = pending_genes(job, genes)
+            if not delta:
+                continue
+            try:
+                hits = rescreen_job(job, delta)
+            except (OSError, StopIteration) as e:
+                # Archivo ausente o sin registros: se omite y se sigue con el lote
+                if log:
+                    log(f"Job {job.pk}: omitido ({e or 'FASTA vacío'})")
+                continue
+            summary["jobs"] += 1
+            summary["genes"] += len(delta)
+            summary["hits"] += hits
+        if log:
+            log(f"Lote procesado: {summary['jobs']} job(s) actualizados hasta ahora")
+    return summary
@@ -0,0 +1,98 @@
+"""
+Medición del uso de memoria (RSS) de un análisis.
+
+PeakRSS muestrea en un hilo el RSS actual del proceso mientras dura el bloque
+`with` y guarda el máximo; ru_maxrss no sirve por job porque es el pico de
+toda la vida del proceso. Los procesos de los pools (contigs, lecturas) se
+suman al muestrear: son descendientes del proceso que ejecuta el job, creados
+desde cualquiera de sus hilos (los jobs corren en hilos ram-job).
+
+No depende de Django.
+"""
+import os
+import resource
+import threading
+
+SAMPLE_INTERVAL = 0.2
+
+
+def _rss_kb(pid="self"):
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid):
+    """Hijos directos de `pid`, creados desde cualquiera de sus hilos."""
+    children = []
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return children
+    for tid in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children") as fh:
+                children.extend(int(c) for c in fh.read().split())
+        except OSError:
+            continue
+    return children
+
+
+def _descendants(pid):
+    """Todos los descendientes de `pid` (hijos, nietos...)."""
+    found, pending = set(), [pid]
+    while pending:
+        for child in _children(pending.pop()):
+            if child not in found:
+                found.add(child)
+                pending.append(child)
+    return found
+
+
+def current_rss_kb():
+    """RSS actual del proceso y sus hijos en KB (Linux); en otros sistemas, el pico del proceso."""
+    if not os.path.exists("/proc/self/status"):
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if os.uname().sysname == "Darwin" else peak
+    pid = os.getpid()
+    return _rss_kb() + sum(_rss_kb(child) for child in _descendants(pid))
+
+
+class PeakRSS:
+    """
+    with PeakRSS() as peak:
+        ...
+    peak.kb  → RSS máximo observado (KB)
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.kb = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        self.kb = max(self.kb, current_rss_kb())
+        return self.kb
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="peak-rss", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        return False
@@ -0,0 +1,193 @@
+"""
+Planificador de jobs con reparto justo entre usuarios.
+
+Reemplaza la cola FIFO del pool de análisis: un usuario que envía un lote de
+500 muestras no deja esperando el aislamiento urgente de otro. En cada hueco
+libre se elige la tarea pendiente con menor clave:
+
+1. Prioridad clínica: pasa delante de todo (en orden de llegada) y no cuenta
+   para el límite por usuario.
+2. Reparto justo: el usuario con menos tareas en ejecución y, a igualdad, con
+   menos costo ya despachado. Quien recién llega (o vuelve tras estar
+   inactivo) empieza con el menor costo de los usuarios activos: no acumula
+   crédito por el tiempo sin enviar nada.
+3. Trabajo más corto primero: costo esperado (p. ej. largo × genes del
+   panel), reducido a medida que la tarea espera (aging_seconds) para que
+   las grandes no queden postergadas indefinidamente.
+
+Con contención, ningún usuario ocupa más de `user_limit` hilos a la vez
+(salvo prioridad clínica). El límite no deja hilos ociosos: si ningún otro
+usuario tiene tareas que puedan empezar, quien llegó a su límite toma los
+hilos libres. Por eso el límite es blando: una tarea ya empezada no se
+interrumpe, y quien llega después espera a que se libere un hilo (lo
+recibe antes que las tareas topadas, pero no antes de que alguna termine). snapshot() da la profundidad de la cola y los tiempos de espera
+de las últimas WAIT_WINDOW tareas despachadas.
+
+No depende de Django.
+"""
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+
+AGING_SECONDS = 600    # tras esperar este tiempo, una tarea cuenta como la mitad de su costo
+WAIT_WINDOW = 500
+
+
+class _Task:
+    __slots__ = ("key", "owner", "cost", "clinical", "fn", "args", "future", "enqueued", "order")
+
+    def __init__(self, key, owner, cost, clinical, fn, args, order):
+        self.key, self.owner, self.cost, self.clinical = key, owner, cost, clinical
+        self.fn, self.args, self.order = fn, args, order
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+def _percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class FairScheduler:
+    """Pool de `workers` hilos que ejecuta las tareas según el reparto justo."""
+
+    def __init__(self, workers, user_limit=None, aging_seconds=AGING_SECONDS, thread_name_prefix="scheduler"):
+        self.workers = max(1, workers)
+        self.user_limit = max(1, user_limit or self.workers)
+        self.aging_seconds = aging_seconds
+        self.thread_name_prefix = thread_name_prefix
+        self._cond = threading.Condition()
+        self._pending = defaultdict(list)     # usuario → tareas en cola
+        self._running = defaultdict(int)      # usuario → tareas en ejecución
+        self._served = {}                     # usuario → costo despachado mientras estuvo activo
+        self._waits = deque(maxlen=WAIT_WINDOW)
+        self._dispatched = 0
+        self._threads = []
+        self._order = itertools.count()
+
+    # ---------- envío ----------
+
+    def submit(self, owner, cost, fn, *args, clinical=False, key=None):
+        """Encola fn(*args) del usuario `owner` con su costo esperado. Retorna el Future."""
+        with self._cond:
+            if owner not in self._served:
+                active = [self._served[o] for o in self._served if self._pending.get(o) or self._running[o]]
+                self._served[owner] = min(active, default=0)
+            task = _Task(key, owner, max(cost, 0), clinical, fn, args, next(self._order))
+            self._pending[owner].append(task)
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, daemon=True,
+                                          name=f"{self.thread_name_prefix}_{len(self._threads)}")
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+        return task.future
+
+    def queued(self):
+        """Claves de las tareas en cola (aún sin empezar)."""
+        with self._cond:
+            return {task.key for tasks in self._pending.values() for task in tasks}
+
+    def discard(self, key):
+        """Quita de la cola la tarea `key` (si aún no empezó). Retorna True si estaba en cola."""
+        with self._cond:
+            for owner, tasks in self._pending.items():
+                for task in tasks:
+                    if task.key == key:
+                        tasks.remove(task)
+                        task.future.cancel()
+                        self._forget_idle(owner)
+                        return True
+        return False
+
+    # ---------- orden ----------
+
+    def _priority(self, task, now):
+        if task.clinical:
+            return (0, task.order)
+        aged = task.cost / (1 + (now - task.enqueued) / self.aging_seconds) if self.aging_seconds else task.cost
+        return (1, self._running[task.owner], self._served[task.owner], aged, task.order)
+
+    def _pick(self):
+        """La próxima tarea a ejecutar (None si no hay pendientes)."""
+        now = time.monotonic()
+        best, best_key = None, None
+        borrowed, borrowed_key = None, None
+        for owner, tasks in self._pending.items():
+            capped = self._running[owner] >= self.user_limit
+            for task in tasks:
+                key = self._priority(task, now)
+                if capped and not task.clinical:
+                    # Solo si nadie más puede usar el hilo (el límite no deja hilos ociosos)
+                    if borrowed_key is None or key < borrowed_key:
+                        borrowed, borrowed_key = task, key
+                elif best_key is None or key < best_key:
+                    best, best_key = task, key
+        return best if best is not None else borrowed
+
+    def _forget_idle(self, owner):
+        if not self._pending.get(owner) and not self._running[owner]:
+            self._pending.pop(owner, None)
+            self._running.pop(owner, None)
+            self._served.pop(owner, None)
+
+    # ---------- ejecución ----------
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while (task := self._pick()) is None:
+                    self._cond.wait()
+                self._pending[task.owner].remove(task)
+                self._running[task.owner] += 1
+                self._served[task.owner] += task.cost
+                self._waits.append(time.monotonic() - task.enqueued)
+                self._dispatched += 1
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        result = task.fn(*task.args)
+                    except Exception as e:
+                        task.future.set_exception(e)
+                    else:
+                        task.future.set_result(result)
+            finally:
+                with self._cond:
+                    self._running[task.owner] -= 1
+                    self._forget_idle(task.owner)
+                    # Un hueco del usuario puede habilitar una tarea suya que estaba topada
+                    self._cond.notify_all()
+
+    # ---------- métricas ----------
+
+    def snapshot(self):
+        """Profundidad de la cola por usuario y tiempos de espera recientes (segundos)."""
+        now = time.monotonic()
+        with self._cond:
+            users = {
+                owner: {
+                    "pending": len(self._pending.get(owner, ())),
+                    "running": self._running[owner],
+                    "oldest_wait_s": round(max((now - t.enqueued for t in self._pending.get(owner, ())),
+                                               default=0.0), 3),
+                }
+                for owner in set(self._pending) | set(self._running)
+            }
+            waits = sorted(self._waits)
+            clinical = sum(t.clinical for tasks in self._pending.values() for t in tasks)
+            dispatched = self._dispatched
+        wait = {"samples": len(waits)}
+        if waits:
+            wait.update(mean=round(sum(waits) / len(waits), 3), p50=round(_percentile(waits, 50), 3),
+                        p95=round(_percentile(waits, 95), 3), max=round(waits[-1], 3))
+        return {
+            "workers": self.workers,
+            "user_limit": self.user_limit,
+            "pending": sum(u["pending"] for u in users.values()),
+            "running": sum(u["running"] for u in users.values()),
+            "clinical_pending": clinical,
+            "dispatched": dispatched,
+            "users": users,
+            "wait_s": wait,
+        }
@@ -0,0 +1,143 @@
+"""
+Estadísticas de secuencia en una sola pasada, vectorizadas con NumPy.
+
+SequenceStatsAccumulator recibe los residuos (mayúsculas, sin saltos de
+línea) a medida que se leen y los procesa por bloques de BLOCK_BYTES:
+conteo por base (GC, N y códigos ambiguos), perfil de GC y GC-skew por
+ventanas y espectro de k-mers. FastaStreamParser lo alimenta durante la
+subida, así las estadísticas salen de la misma lectura que valida el archivo.
+
+Los k-mers no cruzan registros (new_record) ni incluyen bases distintas de
+ACGT. Las ventanas recorren la secuencia concatenada; si resultan más de
+MAX_WINDOWS se agrupan para que el perfil guardado tenga un tamaño acotado.
+
+No depende de Django.
+"""
+import numpy as np
+
+DEFAULT_WINDOW = 1000
+DEFAULT_K = 4
+MAX_WINDOWS = 2000
+BLOCK_BYTES = 256 * 1024
+BASES = "ACGT"
+
+# Código de 2 bits por base; -1 para todo lo que no sea ACGT
+_CODES = np.full(256, -1, dtype=np.int64)
+for _i, _b in enumerate(BASES.encode()):
+    _CODES[_b] = _i
+_G, _C, _N = ord("G"), ord("C"), ord("N")
+
+
+class SequenceStatsAccumulator:
+    def __init__(self, window=DEFAULT_WINDOW, k=DEFAULT_K):
+        self.window = window
+        self.k = k
+        self.length = 0
+        self.counts = np.zeros(256, dtype=np.int64)
+        self.kmers = np.zeros(4 ** k, dtype=np.int64)
+        self._windows = []            # bloques de filas (G, C, ACGT) por ventana
+        self._buffer = bytearray()
+        self._carry = np.empty(0, dtype=np.int64)  # últimos k-1 códigos del registro en curso
+
+    # ---------- entrada ----------
+
+    def feed(self, residues: bytes):
+        self._buffer += residues
+        if len(self._buffer) >= BLOCK_BYTES:
+            self._process()
+
+    def new_record(self):
+        """Marca el inicio de otro registro: los k-mers no se cuentan a través del borde."""
+        self._process()
+        self._carry = self._carry[:0]
+
+    # ---------- resultados ----------
+
+    def summary(self) -> dict:
+        """Conteos globales (sin perfiles)."""
+        self._process()
+        acgt = {b: int(self.counts[ord(b)]) for b in BASES}
+        n_count = int(self.counts[_N])
+        return {
+            "length": self.length,
+            "gc_pct": round((acgt["G"] + acgt["C"]) / self.length * 100, 2) if self.length else 0.0,
+            "n_count": n_count,
+            "ambiguous_count": self.length - sum(acgt.values()) - n_count,
+            "base_counts": acgt,
+        }
+
+    def result(self) -> dict:
+        """Conteos, perfiles por ventana (GC %, GC-skew) y espectro de k-mers."""
+        stats = self.summary()
+        windows = np.concatenate(self._windows, axis=1) if self._windows else np.zeros((3, 0))
+        factor = max(1, -(-windows.shape[1] // MAX_WINDOWS))
+        if factor > 1:
+            pad = (-windows.shape[1]) % factor
+            windows = np.pad(windows, ((0, 0), (0, pad))).reshape(3, -1, factor).sum(axis=2)
+        g, c, acgt = windows
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gc = np.where(acgt > 0, (g + c) / acgt * 100, np.nan)
+            skew = np.where(g + c > 0, (g - c) / (g + c), np.nan)
+        stats.update({
+            "window_size": self.window * factor,
+            "gc_profile": _rounded(gc, 2),
+            "gc_skew": _rounded(skew, 4),
+            "kmer_k": self.k,
+            "kmer_counts": self.kmers.tolist(),
+        })
+        return stats
+
+    # ---------- internos ----------
+
+    def _process(self):
+        if not self._buffer:
+            return
+        arr = np.frombuffer(bytes(self._buffer), dtype=np.uint8)
+        self._buffer.clear()
+        self.counts += np.bincount(arr, minlength=256)
+        self._add_windows(arr)
+        self._add_kmers(_CODES[arr])
+        self.length += len(arr)
+
+    def _add_windows(self, arr):
+        pos = np.arange(self.length, self.length + len(arr)) // self.window
+        first = pos[0]
+        pos -= first
+        n = int(pos[-1]) + 1
+        rows = np.vstack([
+            np.bincount(pos, weights=arr == _G, minlength=n),
+            np.bincount(pos, weights=arr == _C, minlength=n),
+            np.bincount(pos, weights=_CODES[arr] >= 0, minlength=n),
+        ])
+        if self.length % self.window:
+            # La primera ventana continúa la última del bloque anterior
+            self._windows[-1][:, -1] += rows[:, 0]
+            rows = rows[:, 1:]
+        if rows.shape[1]:
+            self._windows.append(rows)
+
+    def _add_kmers(self, codes):
+        k = self.k
+        codes = np.concatenate([self._carry, codes])
+        self._carry = codes[-(k - 1):] if k > 1 else codes[:0]
+        n = len(codes) - k + 1
+        if n <= 0:
+            return
+        invalid = np.concatenate([[0], np.cumsum(codes < 0)])
+        ok = invalid[k:] - invalid[:-k] == 0
+        values = np.zeros(n, dtype=np.int64)
+        for j in range(k):
+            values = values * 4 + np.where(codes[j:j + n] >= 0, codes[j:j + n], 0)
+        self.kmers += np.bincount(values[ok], minlength=len(self.kmers))
+
+
+def _rounded(values, digits):
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def top_kmers(kmer_counts, k, n=10):
+    """Los n k-mers más frecuentes como [(k-mer, conteo), ...]."""
+    counts = np.asarray(kmer_counts)
+    order = np.argsort(counts)[::-1][:n]
+    return [("".join(BASES[(int(i) >> (2 * (k - 1 - j))) & 3] for j in range(k)), int(counts[i]))
+            for i in order if counts[i]]
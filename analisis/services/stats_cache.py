@@ -0,0 +1,41 @@
+"""
+Caché de estadísticas de secuencia (SequenceStats) por huella SHA-256.
+
+Las estadísticas se calculan durante la subida (FastaStreamParser) y se
+guardan aquí; las vistas y el análisis las leen sin volver a recorrer la
+secuencia. Las subidas anteriores se miden una vez, al pedirlas.
+"""
+from analisis.models import SequenceStats
+from .fasta_stream import parse_fasta_stream, FastaFormatError
+
+PROFILE_FIELDS = ("length", "gc_pct", "n_count", "ambiguous_count", "base_counts", "window_size",
+                  "gc_profile", "gc_skew", "kmer_k", "kmer_counts")
+
+
+def store_profile(sha256, profile):
+    """Guarda el resultado de SequenceStatsAccumulator (si la huella ya existe, lo reutiliza)."""
+    stats, _ = SequenceStats.objects.get_or_create(
+        sha256=sha256, defaults={f: profile[f] for f in PROFILE_FIELDS}
+    )
+    return stats
+
+
+def stats_for(seq):
+    """SequenceStats de la secuencia (None si no es un FASTA legible)."""
+    if seq.data_type != "ASSEMBLY":
+        return None
+    if seq.sha256:
+        cached = SequenceStats.objects.filter(sha256=seq.sha256).first()
+        if cached is not None:
+            return cached
+    try:
+        with seq.fasta_file.open("rb") as fh:
+            stats, _ = parse_fasta_stream(fh)
+    except (FastaFormatError, OSError):
+        return None
+    # Completar los campos de subidas anteriores a la medición en la subida
+    seq.length_bp, seq.gc_pct, seq.n_count = stats["length"], stats["gc_pct"], stats["n_count"]
+    seq.record_count, seq.sha256 = stats["records"], stats["sha256"]
+    seq.fai = seq.fai or stats["fai"]
+    seq.save(update_fields=["length_bp", "gc_pct", "n_count", "record_count", "sha256", "fai"])
+    return store_profile(stats["sha256"], stats["profile"])
@@ -0,0 +1,215 @@
+"""
+Vigilancia entre muestras: matriz de presencia de genes (services.presence)
+mantenida al día con los análisis terminados.
+
+La matriz vive en memoria (una por proceso) y se guarda en
+settings.RAM_PRESENCE_PATH. Cada job que termina (execute_job, re-screening)
+reemplaza la fila de su secuencia con el resultado de ese análisis, si es el
+último job DONE de la secuencia (re-analizar un job anterior no pisa el
+resultado más nuevo); borrar una secuencia quita su fila. Las escrituras a
+disco se agrupan: como mucho una cada RAM_PRESENCE_SAVE_SECONDS, y al salir
+del proceso.
+
+Varios procesos comparten el archivo: cada uno recuerda sus filas sin
+guardar y, al guardar, bajo un bloqueo del archivo (RAM_PRESENCE_PATH +
+".lock"), relee la versión que otro haya guardado mientras tanto y vuelve a
+aplicar las suyas encima, así ninguno pisa las filas de los demás. Si el
+archivo cambió, las consultas también parten de la versión nueva.
+
+Si el archivo no existe se reconstruye desde la base de datos (último job
+DONE de cada secuencia); `manage.py rebuild_presence` fuerza la
+reconstrucción.
+
+Cada muestra es una secuencia (id de Sequence), fechada el día en que se
+subió; las mutaciones puntuales entran como "gen mutación" (p. ej. "gyrA S83L").
+"""
+import atexit
+import fcntl
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from analisis.models import AnalysisJob, DetectedGene, Sequence
+from .presence import PresenceMatrix
+
+BATCH_SIZE = 500
+
+_lock = threading.RLock()
+_matrix = None
+_mtime = None          # mtime del archivo cargado o guardado por este proceso
+_changes = {}          # muestra → (día, dueño, perfil), o None si se quitó; sin guardar
+_last_save = 0.0
+
+
+def feature_name(kind, gene_name, mutation):
+    return f"{gene_name} {mutation}" if kind == "MUTATION" else gene_name
+
+
+def _profile(rows):
+    """{gen: identidad máxima} a partir de (kind, gene_name, mutation, identity)."""
+    profile = {}
+    for kind, gene_name, mutation, identity in rows:
+        name = feature_name(kind, gene_name, mutation)
+        profile[name] = max(profile.get(name, 0.0), identity or 0.0)
+    return profile
+
+
+def _sample_day(sequence_created_at):
+    return timezone.localtime(sequence_created_at).date()
+
+
+def build_matrix():
+    """Matriz con el último job DONE de cada secuencia, leída por lotes."""
+    latest = (AnalysisJob.objects.filter(sequence=OuterRef("pk"), status="DONE")
+              .order_by("-created_at").values("pk")[:1])
+    samples = list(Sequence.objects.annotate(job_id=Subquery(latest)).filter(job_id__isnull=False)
+                   .order_by("pk").values_list("pk", "owner_id", "created_at", "job_id"))
+    matrix = PresenceMatrix()
+    for offset in range(0, len(samples), BATCH_SIZE):
+        batch = samples[offset:offset + BATCH_SIZE]
+        rows = defaultdict(list)
+        for job_id, *row in (DetectedGene.objects.filter(job_id__in=[s[3] for s in batch])
+                             .values_list("job_id", "kind", "gene_name", "mutation", "identity")):
+            rows[job_id].append(row)
+        for seq_id, owner_id, created_at, job_id in batch:
+            matrix.update(seq_id, _sample_day(created_at), owner_id, _profile(rows[job_id]))
+    return matrix
+
+
+def _file_mtime():
+    try:
+        return os.stat(settings.RAM_PRESENCE_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _file_lock():
+    """Bloqueo exclusivo entre procesos sobre el archivo de la matriz."""
+    with open(settings.RAM_PRESENCE_PATH + ".lock", "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _apply(matrix, changes):
+    for sample, row in changes.items():
+        if row is None:
+            matrix.remove(sample)
+        else:
+            matrix.update(sample, *row)
+
+
+def _load(mtime):
+    """La versión guardada del archivo con los cambios sin guardar de este proceso encima."""
+    global _matrix, _mtime
+    _matrix, _mtime = PresenceMatrix.load(settings.RAM_PRESENCE_PATH), mtime
+    _apply(_matrix, _changes)
+
+
+def _save(merge=True):
+    """Guarda la matriz; con merge, sobre la versión que otro proceso haya guardado."""
+    global _mtime, _last_save
+    with _file_lock():
+        mtime = _file_mtime()
+        if merge and mtime is not None and mtime != _mtime:
+            # Otro proceso guardó desde nuestra última lectura: partir de su versión
+            _load(mtime)
+        _matrix.save(settings.RAM_PRESENCE_PATH)
+        _mtime = _file_mtime()
+    _changes.clear()
+    _last_save = time.monotonic()
+
+
+def _current():
+    """La matriz del proceso (cargada, recargada o reconstruida según el archivo)."""
+    global _matrix
+    mtime = _file_mtime()
+    if _matrix is None or (mtime is not None and mtime != _mtime):
+        if mtime is None:
+            _matrix = build_matrix()
+            _save()
+        else:
+            _load(mtime)
+    return _matrix
+
+
+def _changed(sample, row):
+    _changes[sample] = row
+    if time.monotonic() - _last_save >= settings.RAM_PRESENCE_SAVE_SECONDS:
+        _save()
+
+
+def rebuild():
+    """Reconstruye la matriz desde la base de datos y la guarda. Retorna el número de muestras."""
+    global _matrix
+    with _lock:
+        _matrix = build_matrix()
+        # La base de datos ya incluye los cambios sin guardar: reemplaza el archivo
+        _save(merge=False)
+        return len(_matrix)
+
+
+def is_latest(job):
+    """Si `job` es el último job DONE de su secuencia (el que representa la muestra)."""
+    latest = (AnalysisJob.objects.filter(sequence_id=job.sequence_id, status="DONE")
+              .order_by("-created_at").values_list("pk", flat=True).first())
+    return latest == job.pk
+
+
+def record_job(job):
+    """
+    Reemplaza la fila de la secuencia del job con sus resultados (job DONE),
+    salvo que la secuencia tenga un job DONE más nuevo.
+    """
+    if not is_latest(job):
+        return
+    seq = job.sequence
+    rows = job.detected_genes.values_list("kind", "gene_name", "mutation", "identity")
+    row = (_sample_day(seq.created_at), seq.owner_id, _profile(rows))
+    with _lock:
+        _current().update(seq.pk, *row)
+        _changed(seq.pk, row)
+
+
+def forget_sequence(sequence_id):
+    """Quita la secuencia de la matriz (si ya estaba cargada o guardada)."""
+    with _lock:
+        if _matrix is None and _file_mtime() is None:
+            return
+        _current().remove(sequence_id)
+        _changed(sequence_id, None)
+
+
+@atexit.register
+def flush():
+    """Guarda los cambios pendientes."""
+    with _lock:
+        if _matrix is not None and _changes:
+            _save()
+
+
+# ---------- consultas (owner=None: todas las muestras) ----------
+
+def co_occurrence(gene, owner=None, limit=20):
+    with _lock:
+        return _current().co_occurrence(gene, owner=owner, limit=limit)
+
+
+def time_series(gene, bucket="month", owner=None):
+    with _lock:
+        return _current().time_series(gene, bucket=bucket, owner=owner)
+
+
+def nearest(sequence_id, k=10, owner=None):
+    with _lock:
+        matrix = _current()
+        return matrix.profile(sequence_id), matrix.nearest(sequence_id, k=k, owner=owner)
@@ -0,0 +1,68 @@
+"""
+Caché de vistas por usuario con claves versionadas.
+
+Cada usuario tiene una versión en la caché; las claves de sus vistas
+(dashboard, historial, resultados) la incluyen. Invalidar es reemplazarla:
+las entradas anteriores dejan de leerse y expiran solas (TIMEOUT de
+CACHES), sin tener que conocer ni borrar cada clave. Hay además una versión
+global para las vistas que mezclan usuarios (historial de staff con
+owner_scope=all).
+
+La versión es un token aleatorio y no un contador: si expira o la caché la
+desaloja, la nueva no coincide con ninguna anterior y las entradas viejas
+no vuelven a leerse.
+
+Las versiones se renuevan desde analisis.signals cuando se guarda un job (al
+crearse, iniciar y terminar) o se agrega/elimina una secuencia.
+"""
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+GLOBAL_SCOPE = "all"
+
+
+def _version_key(scope):
+    return f"ram:version:{scope}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def version(scope):
+    """Versión actual de `scope` (id de usuario o GLOBAL_SCOPE)."""
+    key = _version_key(scope)
+    current = cache.get(key)
+    if current is None:
+        current = _new_version()
+        # Otro proceso pudo crearla mientras tanto: gana la primera
+        cache.add(key, current)
+        current = cache.get(key, current)
+    return current
+
+
+def invalidate(user_id):
+    """Invalida las vistas en caché del usuario y las globales."""
+    for scope in (user_id, GLOBAL_SCOPE):
+        cache.set(_version_key(scope), _new_version())
+
+
+def cache_key(scope, name, *parts):
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+    return f"ram:{scope}:v{version(scope)}:{name}:{digest}"
+
+
+def cached(scope, name, compute, *parts, timeout=DEFAULT_TIMEOUT):
+    """
+    Resultado de compute() guardado bajo (scope, versión, name, parts), por
+    `timeout` segundos (por defecto el TIMEOUT de CACHES).
+    """
+    key = cache_key(scope, name, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,53 @@
+"""
+Carga diferida y precalentamiento de dependencias pesadas.
+
+xhtml2pdf, pandas, matplotlib y pairwise2 tardan cientos de milisegundos en
+importarse y no se necesitan para servir la primera página. Los módulos que
+los usan los importan recién al usarlos (o a través de lazy_module), y
+prewarm() los importa en un hilo de fondo apenas arranca el proceso, así la
+primera petición que los necesita ya los encuentra cargados.
+
+No depende de Django.
+"""
+import importlib
+import threading
+
+
+class LazyModule:
+    """Proxy de un módulo que se importa en el primer acceso a un atributo."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+def _load_all(targets):
+    for target in targets:
+        name, _, function = target.partition(":")
+        try:
+            module = importlib.import_module(name)
+            if function:
+                getattr(module, function)()
+        except ImportError:
+            # Dependencia opcional ausente: se informará al usarla
+            pass
+
+
+def prewarm(targets):
+    """
+    Carga `targets` en un hilo de fondo (daemon) y lo retorna. Cada target es
+    un módulo ("xhtml2pdf.pisa") o "módulo:función" para los que se cargan
+    con una función propia (p. ej. alignment.load_pairwise2).
+    """
+    thread = threading.Thread(target=_load_all, args=(tuple(targets),), name="ram-prewarm", daemon=True)
+    thread.start()
+    return thread
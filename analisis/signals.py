@@ -0,0 +1,34 @@
+"""
+Invalidación de la caché de vistas (services.view_cache) al cambiar jobs o
+secuencias, y baja de las secuencias borradas en la matriz de vigilancia.
+
+La invalidación espera al commit: dentro de una transacción, otra petición
+que recalculara la vista antes del commit guardaría el estado viejo bajo la
+versión nueva.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AnalysisJob, Sequence
+from .services.view_cache import invalidate
+
+
+@receiver([post_save, post_delete], sender=AnalysisJob)
+def job_changed(sender, instance, **kwargs):
+    # Los avances (ProgressReporter) usan update() y no disparan la señal;
+    # sí la creación, el inicio, los agregados y el estado final
+    owner_id = instance.sequence.owner_id
+    transaction.on_commit(lambda: invalidate(owner_id))
+
+
+@receiver([post_save, post_delete], sender=Sequence)
+def sequence_changed(sender, instance, **kwargs):
+    owner_id = instance.owner_id
+    transaction.on_commit(lambda: invalidate(owner_id))
+
+
+@receiver(post_delete, sender=Sequence)
+def sequence_deleted(sender, instance, **kwargs):
+    from .services.surveillance import forget_sequence
+    forget_sequence(instance.pk)
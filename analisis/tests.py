@@ -1,3 +1,1012 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import importlib.util
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from analisis.models import AlignmentMemo, AnalysisJob, DetectedGene, ResistanceGene, Sequence
+from analisis.services import surveillance
+from analisis.services.alignment import MAX_SPAN_FACTOR, align_and_score, iter_windows
+from analisis.services.analyzers import analyze_realistic
+from analisis.services.budget import BudgetExceeded, JobBudget, JobCancelled
+from analisis.services.compression import (
+    CompressionError, StreamDecompressor, open_binary, strip_compression_suffix,
+)
+from analisis.services.contigs import screen_contigs
+from analisis.services.engine import create_backend, load_reference
+from analisis.services.fasta_index import FastaIndex, build_index, fetch_regions
+from analisis.services.fasta_stream import FastaFormatError, FastaStreamParser, parse_fasta_stream
+from analisis.services.jobs import heartbeat, raise_alert, save_gene_results
+from analisis.services.loadtest import run_load_test, summarize, synthetic_fasta
+from analisis.services.memo import screen_contigs_memo
+from analisis.services.mutations import CODON_TABLE, DEMO_MUTATION_PANEL, MutationPanel, reverse_complement
+from analisis.services.pooling import run_pooled
+from analisis.services.presence import PresenceMatrix
+from analisis.services.priority import is_priority, parse_panel, split_panel
+from analisis.services.progress import ProgressReporter
+from analisis.services.protein import ProteinIndex
+from analisis.services.reads import FastqFormatError, map_reads
+from analisis.services.reaper import reap_stale_jobs, resubmit_pending
+from analisis.services.rescreen import pending_genes, rescreen_job
+from analisis.services.resources import PeakRSS, current_rss_kb
+from analisis.services.scheduler import FairScheduler
+from analisis.services.seqstats import SequenceStatsAccumulator, top_kmers
+
+# Presupuestos de importación en frío (ms, suma de los imports de primer nivel
+# según `python -X importtime`). Las dependencias pesadas (xhtml2pdf, pandas,
+# matplotlib, pairwise2) se cargan al usarlas o en segundo plano (services.warmup)
+DJANGO_IMPORT_BUDGET_MS = 1000
+APP_RAM_IMPORT_BUDGET_MS = 3000
+
+
+def import_time_ms(code, **env):
+    """Tiempo total de importación (ms) de `code` en un intérprete nuevo."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120,
+        env={**os.environ, "RAM_PREWARM": "0", **env},
+    )
+    if result.returncode != 0:
+        raise AssertionError(result.stderr[-2000:])
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # Solo los imports de primer nivel: los anidados ya están en su cumulative
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000
+
+
+class ImportTimeBudgetTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # El precalentamiento de este proceso competiría por CPU con la medición
+        for thread in threading.enumerate():
+            if thread.name == "ram-prewarm":
+                thread.join()
+
+    def test_django_entry_point(self):
+        ms = import_time_ms("import django; django.setup(); import analisis.urls, plataforma_bioinfo.urls",
+                            DJANGO_SETTINGS_MODULE="plataforma_bioinfo.settings")
+        self.assertLess(ms, DJANGO_IMPORT_BUDGET_MS, f"Importar la app Django tomó {ms:.0f} ms")
+
+    def test_heavy_modules_are_lazy(self):
+        code = ("import sys, django; django.setup(); import analisis.urls; "
+                "print(','.join(m for m in ('xhtml2pdf', 'pandas', 'matplotlib', 'Bio.pairwise2') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=settings.BASE_DIR, capture_output=True, text=True,
+                                timeout=120, env={**os.environ, "RAM_PREWARM": "0",
+                                                  "DJANGO_SETTINGS_MODULE": "plataforma_bioinfo.settings"})
+        self.assertEqual(result.stdout.strip(), "", result.stderr[-2000:])
+
+    @unittest.skipIf(importlib.util.find_spec("streamlit") is None, "streamlit no está instalado")
+    def test_app_ram_entry_point(self):
+        self.assertTrue(Path(settings.BASE_DIR, "app_ram.py").exists())
+        ms = import_time_ms("import app_ram")
+        self.assertLess(ms, APP_RAM_IMPORT_BUDGET_MS, f"Importar app_ram tomó {ms:.0f} ms")
+
+
+class SeedBackendClusterTests(SimpleTestCase):
+    """Clústeres al 90 % con los backends de semilla exacta (kmer, aho)."""
+
+    def test_member_with_divergent_seed_is_found(self):
+        rng = random.Random(7)
+        rep = "".join(rng.choice("ACGT") for _ in range(300))
+        # 98 % idéntico al representante, con las 6 sustituciones dentro de la semilla
+        member = list(rep)
+        for i in (2, 7, 12, 17, 22, 27):
+            member[i] = "A" if rep[i] != "A" else "C"
+        member = "".join(member)
+        flank = "".join(rng.choice("ACGT") for _ in range(200))
+        genes = load_reference({"rep": rep, "member": member}, clusters={"rep": "rep", "member": "rep"})
+        for backend in ("kmer", "aho"):
+            stats = {}
+            hits = create_backend(backend, genes).search(flank + member + flank, stats=stats)
+            self.assertEqual([h["gene"] for h in hits], ["member"], backend)
+        self.assertEqual(stats["searches"], 1)  # aho: una pasada
+
+
+class AlignmentMemoTests(TestCase):
+    """La memo (services.memo) da los mismos hits que la búsqueda directa, con los contigs del archivo actual."""
+
+    def test_same_hits_and_contigs_of_current_file(self):
+        rng = random.Random(5)
+        random_seq = lambda n: "".join(rng.choice("ACGT") for _ in range(n))
+        rep, other = random_seq(600), random_seq(500)
+        member = list(rep)
+        for i in range(50, 600, 60):
+            member[i] = "A" if rep[i] != "A" else "C"
+        rep_gene = ResistanceGene.objects.create(gene_name="rep", sequence=rep, source="CARD")
+        ResistanceGene.objects.create(gene_name="member", sequence="".join(member), source="CARD",
+                                      representative=rep_gene)
+        ResistanceGene.objects.create(gene_name="other", sequence=other, source="CARD")
+        ResistanceGene.objects.filter(pk=rep_gene.pk).update(representative=rep_gene)
+        genes = list(ResistanceGene.objects.all())
+        records = [random_seq(2000) + "".join(member) + random_seq(500), random_seq(3000), random_seq(1000) + other]
+        folder = tempfile.mkdtemp()
+
+        def fasta(name, prefix):
+            path = os.path.join(folder, name)
+            with open(path, "w") as f:
+                f.writelines(f">{prefix}_{i}\n{seq}\n" for i, seq in enumerate(records))
+            return path
+
+        # Mismo contenido (misma huella) subido por dos usuarios con otros encabezados
+        first, second = fasta("a.fa", "ajeno"), fasta("b.fa", "propio")
+        for backend in ("kmer", "banded"):
+            AlignmentMemo.objects.all().delete()
+            direct = screen_contigs(first, genes, workers=1, backend=backend)
+            memo = screen_contigs_memo(first, genes, "huella", workers=1, backend=backend)
+            self.assertEqual(memo["hits"], direct["hits"], backend)
+            self.assertEqual(memo["searches"], direct["searches"], backend)
+            reused = screen_contigs_memo(second, genes, "huella", workers=1, backend=backend)
+            self.assertEqual([(h["gene"], h["contig"]) for h in reused["hits"]],
+                             [("member", "propio_0"), ("other", "propio_2")], backend)
+            stored = [hit for hits in AlignmentMemo.objects.values_list("hits", flat=True) for hit in hits]
+            self.assertFalse(any("contig" in hit for hit in stored), backend)
+
+
+def make_job(owner, status="DONE", name="muestra", **fields):
+    """Secuencia de `owner` con un job en `status`."""
+    seq = Sequence.objects.create(owner=owner, name=name, fasta_file=f"fasta/{name}.fasta")
+    return AnalysisJob.objects.create(sequence=seq, mode="REAL", status=status, **fields)
+
+
+class Stop(Exception):
+    pass
+
+
+class JobControlTests(TestCase):
+    """Presupuestos, cancelación y recuperación de jobs (budget, pooling, reaper)."""
+
+    def test_budget_limits_and_cancel(self):
+        budget = JobBudget(wall_seconds=0.01)
+        time.sleep(0.05)
+        with self.assertRaises(BudgetExceeded):
+            budget()
+        with self.assertRaises(BudgetExceeded):
+            JobBudget(cpu_seconds=1)(worker_cpu=2.0)
+        with self.assertRaises(JobCancelled):
+            JobBudget(poll=lambda: True)()
+
+    def test_pool_checkpoint_runs_while_a_batch_is_running(self):
+        calls = []
+
+        def checkpoint(cpu=0.0):
+            calls.append(cpu)
+            raise Stop
+
+        started = time.monotonic()
+        with self.assertRaises(Stop):
+            run_pooled(time.sleep, [((30,), {})], lambda result: None, workers=1, checkpoint=checkpoint,
+                       poll_seconds=0.1)
+        # Ni la espera del lote ni el cierre del pool esperan los 30 s
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual(calls, [0.0])
+
+    def test_reaper_requeues_then_fails_stale_jobs(self):
+        owner = User.objects.create(username="lab")
+        stale = timezone.now() - timedelta(hours=1)
+        retry = make_job(owner, "RUNNING", "a", heartbeat_at=stale, attempts=1)
+        exhausted = make_job(owner, "RUNNING", "b", heartbeat_at=stale, attempts=2)
+        cancelled = make_job(owner, "RUNNING", "c", heartbeat_at=stale, attempts=1, cancel_requested=True)
+        alive = make_job(owner, "RUNNING", "d", heartbeat_at=timezone.now(), attempts=1)
+        with mock.patch("analisis.services.reaper.submit_job") as submit:
+            counts, _ = reap_stale_jobs(stale_seconds=600, max_attempts=2)
+        self.assertEqual(counts, {"PENDING": 1, "ERROR": 1, "CANCELLED": 1})
+        submit.assert_called_once_with(retry.pk)
+        statuses = dict(AnalysisJob.objects.values_list("pk", "status"))
+        self.assertEqual([statuses[j.pk] for j in (retry, exhausted, cancelled, alive)],
+                         ["PENDING", "ERROR", "CANCELLED", "RUNNING"])
+
+
+class HeartbeatTests(TransactionTestCase):
+    def test_heartbeat_does_not_depend_on_checkpoints(self):
+        job = make_job(User.objects.create(username="lab"), "RUNNING", attempts=1)
+        with heartbeat(job, interval=0.05):
+            # Un lote largo: ningún punto de control mientras tanto
+            time.sleep(0.5)
+        job.refresh_from_db()
+        self.assertIsNotNone(job.heartbeat_at)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ApiUploadTests(TestCase):
+    """POST /api/v1/jobs/: cuerpo crudo copiado a disco por bloques y subidas multipart."""
+
+    def setUp(self):
+        User.objects.create_user("lims", password="clave")
+        token = base64.b64encode(b"lims:clave").decode()
+        self.auth = {"HTTP_AUTHORIZATION": f"Basic {token}"}
+        patcher = mock.patch("analisis.api.submit_job")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fasta(self, bp):
+        return (">contig_1\n" + "ACGT" * (bp // 4) + "\n").encode()
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1000)
+    def test_raw_body_larger_than_memory_limit(self):
+        response = self.client.post("/api/v1/jobs/?name=genoma", self.fasta(50_000),
+                                    content_type="application/octet-stream", **self.auth)
+        self.assertEqual(response.status_code, 202, response.content)
+        seq = Sequence.objects.get()
+        self.assertEqual((seq.name, seq.length_bp), ("genoma", 50_000))
+
+    @override_settings(RAM_API_UPLOAD_MAX_MB=1)
+    def test_raw_body_over_limit_is_json_413(self):
+        response = self.client.post("/api/v1/jobs/", self.fasta(2 * 1024 * 1024),
+                                    content_type="application/octet-stream", **self.auth)
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("error", response.json())
+        self.assertFalse(Sequence.objects.exists())
+
+    def test_form_name_only_for_a_single_file(self):
+        upload = lambda name: SimpleUploadedFile(name, self.fasta(400))
+        self.client.post("/api/v1/jobs/", {"file": upload("uno.fasta"), "name": "Paciente 7"}, **self.auth)
+        self.client.post("/api/v1/jobs/", {"file": [upload("a.fasta"), upload("b.fasta")], "name": "Lote"},
+                         **self.auth)
+        self.assertEqual(sorted(Sequence.objects.values_list("name", flat=True)),
+                         ["Paciente 7", "a.fasta", "b.fasta"])
+
+    def test_multipart_files_are_validated_while_streaming(self):
+        good = SimpleUploadedFile("bueno.fasta.gz", gzip.compress(self.fasta(400)))
+        bad = SimpleUploadedFile("malo.fasta", b">r1\nACGT\nACGT-XYZ\n")
+        response = self.client.post("/api/v1/jobs/", {"file": [good, bad]}, **self.auth)
+        self.assertEqual(response.status_code, 202, response.content)
+        body = response.json()
+        self.assertEqual([job["sequence"]["name"] for job in body["jobs"]], ["bueno.fasta.gz"])
+        self.assertEqual(len(body["errors"]), 1)
+        self.assertIn("Línea 3", str(body["errors"][0]))
+        seq = Sequence.objects.get()
+        self.assertEqual((seq.length_bp, len(seq.sha256)), (400, 64))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), RAM_CONTIG_WORKERS=1,
+                   RAM_PRESENCE_PATH=os.path.join(tempfile.mkdtemp(), "presence.npz"))
+class RescreenTests(TestCase):
+    """Re-screening incremental (services.rescreen) con clústeres de alelos."""
+
+    def test_new_allele_replaces_the_cluster_hit(self):
+        rng = random.Random(11)
+        random_seq = lambda n: "".join(rng.choice("ACGT") for _ in range(n))
+        allele = random_seq(600)
+        rep = list(allele)
+        for i in range(40, 600, 100):
+            rep[i] = "A" if allele[i] != "A" else "C"
+        rep_gene = ResistanceGene.objects.create(gene_name="rep", sequence="".join(rep), source="CARD")
+        ResistanceGene.objects.filter(pk=rep_gene.pk).update(representative=rep_gene)
+        job = make_job(User.objects.create(username="lab"), panel_versions={str(rep_gene.pk): 1})
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, "fasta"), exist_ok=True)
+        with open(job.sequence.fasta_file.path, "w") as f:
+            f.write(f">contig_1\n{random_seq(1000)}{allele}{random_seq(1000)}\n")
+        save_gene_results(job, [("rep", 594, 99.0, 100.0, "CARD", "", "contig_1", 1000, 1600)])
+
+        # Un alelo nuevo del mismo clúster, más parecido a la muestra
+        ResistanceGene.objects.create(gene_name="allele", sequence=allele, source="CARD", representative=rep_gene)
+        delta = pending_genes(job, list(ResistanceGene.objects.all()))
+        self.assertEqual([g.gene_name for g in delta], ["allele"])
+        rescreen_job(job, delta)
+        self.assertEqual(list(job.detected_genes.values_list("gene_name", "identity")), [("allele", 100.0)])
+        self.assertEqual(set(job.panel_versions), {str(g.pk) for g in ResistanceGene.objects.all()})
+
+
+class HistorialCacheTests(TestCase):
+    """Historial paginado en caché (view_cache) e invalidación al confirmar la transacción."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_cache_is_invalidated_on_commit(self):
+        user = User.objects.create_user("ana", password="clave")
+        for i in range(12):
+            make_job(user, name=f"m{i}")
+        self.client.force_login(user)
+        page = lambda n=1: self.client.get(reverse("historial"), {"page": n}).context["page_obj"]
+        self.assertEqual((page(2).paginator.count, len(page(2))), (12, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(user, name="nuevo")
+            # Sin commit todavía: la caché sigue vigente
+            self.assertEqual(page().paginator.count, 12)
+        self.assertEqual(page().paginator.count, 13)
+        self.assertEqual(page()[0].sequence.name, "nuevo")
+
+
+class MutationPanelTests(SimpleTestCase):
+    """SNPs de resistencia (services.mutations): solo en el gen diana, no en regiones ajenas."""
+
+    def setUp(self):
+        self.rng = random.Random(3)
+        self.panel = MutationPanel(DEMO_MUTATION_PANEL[:1])
+        self.gyra = DEMO_MUTATION_PANEL[0]["sequence"]
+
+    def random_seq(self, n):
+        return "".join(self.rng.choice("ACGT") for _ in range(n))
+
+    def with_s83l(self, seq):
+        # Codón 83 de gyrA (el panel empieza en el 64): TCG → TTG
+        return seq[:57] + "TTG" + seq[60:]
+
+    def resistant(self, contig):
+        return [m["mutation"] for m in self.panel.scan(contig) if m["resistant"]]
+
+    def test_resistant_allele_in_target(self):
+        contig = self.random_seq(500) + reverse_complement(self.with_s83l(self.gyra)) + self.random_seq(500)
+        self.assertEqual(self.resistant(contig), ["S83L"])
+
+    def test_off_target_contig(self):
+        # Una semilla suelta del gen con el codón resistente en su marco: no se ubica
+        one_seed = self.with_s83l(self.gyra[:16] + self.random_seq(len(self.gyra) - 16))
+        self.assertEqual(self.panel.scan(self.random_seq(300) + one_seed + self.random_seq(300)), [])
+        # Dos semillas vecinas anclan el gen, pero la ventana del codón no se parece a gyrA
+        two_seeds = self.with_s83l(self.gyra[:32] + self.random_seq(len(self.gyra) - 32))
+        self.assertEqual(self.resistant(self.random_seq(300) + two_seeds + self.random_seq(300)), [])
+
+
+class SeekLog(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.seeks = []
+
+    def seek(self, pos, whence=0):
+        self.seeks.append(pos)
+        return super().seek(pos, whence)
+
+
+class FastaIndexTests(SimpleTestCase):
+    """Tramos por índice .fai (services.fasta_index), también en gzip."""
+
+    def setUp(self):
+        rng = random.Random(9)
+        self.records = {name: "".join(rng.choice("ACGT") for _ in range(n)) for name, n in (("c1", 500), ("c2", 700))}
+        self.data = "".join(
+            f">{name} muestra\n" + "".join(seq[i:i + 60] + "\n" for i in range(0, len(seq), 60))
+            for name, seq in self.records.items()
+        ).encode()
+        # Orden de los hits en pantalla, no el del archivo
+        self.regions = [("c2", 600, 650), ("c1", 10, 20), (None, 0, 5), ("c2", 5, 15), ("c1", 490, 600)]
+        self.expected = [self.records[name or "c1"][start:end] for name, start, end in self.regions]
+
+    def test_slices_in_requested_order_read_forward(self):
+        source = SeekLog(self.data)
+        index = build_index(source)
+        self.assertEqual(index.names, ["c1", "c2"])
+        source.seeks.clear()
+        self.assertEqual(fetch_regions(source, index, self.regions), self.expected)
+        # Tras rebobinar (open_binary), los seeks solo avanzan
+        reads = source.seeks[2:]
+        self.assertEqual(reads, sorted(reads))
+
+    def test_gzip_and_unindexed_fallback(self):
+        folder = tempfile.mkdtemp()
+        path = os.path.join(folder, "genoma.fa.gz")
+        with gzip.open(path, "wb") as f:
+            f.write(self.data)
+        index = build_index(path)
+        self.assertEqual(fetch_regions(path, index, self.regions), self.expected)
+        self.assertEqual(fetch_regions(path, None, self.regions), self.expected)
+        self.assertEqual(FastaIndex.from_fai(index.to_fai()).records, index.records)
+
+
+class PriorityProgressTests(SimpleTestCase):
+    """Avance de las dos pasadas de analyze_realistic (genes prioritarios y resto del panel)."""
+
+    def test_both_passes_report_progress(self):
+        rng = random.Random(13)
+        random_seq = lambda n: "".join(rng.choice("ACGT") for _ in range(n))
+        genes = load_reference({"blaNDM-1": random_seq(300), "tetA": random_seq(300), "sul1": random_seq(300)})
+        path = os.path.join(tempfile.mkdtemp(), "genoma.fa")
+        with open(path, "w") as f:
+            f.write(f">c1\n{random_seq(400)}{genes[0].sequence}{random_seq(400)}\n>c2\n{random_seq(900)}\n")
+        calls, alerts = [], []
+        analyze_realistic(path, genes=genes, mutation_panel=MutationPanel([]), workers=1,
+                          progress=lambda contigs, bases, hits, genes_pass: calls.append((genes_pass, contigs)),
+                          priority=("blaNDM",), on_alert=alerts.append)
+        self.assertEqual(calls, [((0, 1), 2), ((1, 2), 2)])
+        self.assertEqual([row[0] for row in alerts[0]], ["blaNDM-1"])
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("tiempo de espera agotado")
+        time.sleep(0.01)
+
+
+class FairSchedulerTests(SimpleTestCase):
+    """Reparto justo con límite blando por usuario (services.scheduler)."""
+
+    def test_capped_user_borrows_until_another_user_arrives(self):
+        sched = FairScheduler(2, user_limit=1, aging_seconds=0)
+        started, gates = [], {name: threading.Event() for name in ("a1", "a2", "a3", "b1")}
+
+        def task(name):
+            started.append(name)
+            gates[name].wait(5)
+
+        try:
+            for name in ("a1", "a2", "a3"):
+                sched.submit("a", 1, task, name, key=name)
+            # Nadie más espera: "a" usa los dos hilos pese a su límite
+            wait_for(lambda: len(started) == 2)
+            sched.submit("b", 1, task, "b1", key="b1")
+            time.sleep(0.1)
+            self.assertEqual(sched.snapshot()["users"]["b"], {"pending": 1, "running": 0, "oldest_wait_s": mock.ANY})
+            self.assertEqual(sched.queued(), {"a3", "b1"})
+            # El primer hilo que se libera es para "b", no para la tarea topada de "a"
+            gates["a1"].set()
+            wait_for(lambda: len(started) == 3)
+            self.assertEqual(started, ["a1", "a2", "b1"])
+        finally:
+            for gate in gates.values():
+                gate.set()
+
+
+class ResubmitPendingTests(TestCase):
+    """PENDING de antes de un reinicio (services.reaper.resubmit_pending)."""
+
+    def test_old_pending_jobs_missing_from_the_queue_are_resubmitted(self):
+        owner = User.objects.create(username="lab")
+        old = timezone.now() - timedelta(minutes=5)
+        orphan = make_job(owner, "PENDING", "a")
+        queued = make_job(owner, "PENDING", "b")
+        make_job(owner, "PENDING", "c", cancel_requested=True)
+        AnalysisJob.objects.update(created_at=old)
+        make_job(owner, "PENDING", "d")  # recién creado: su envío está en curso
+        with mock.patch("analisis.services.reaper.submit_job") as submit:
+            resubmit_pending(grace_seconds=30, queued={queued.pk})
+        submit.assert_called_once_with(orphan.pk)
+
+
+class PooledScreeningTests(SimpleTestCase):
+    """El pool de procesos (forkserver) da los mismos resultados que el análisis en serie."""
+
+    def test_pooled_contigs_match_serial(self):
+        rng = random.Random(17)
+        random_seq = lambda n: "".join(rng.choice("ACGT") for _ in range(n))
+        panel = {"tetA": random_seq(400), "sul1": random_seq(400)}
+        records = [random_seq(300) + panel["tetA"] + random_seq(300), random_seq(900),
+                   random_seq(200) + panel["sul1"] + random_seq(200), random_seq(700)]
+        path = os.path.join(tempfile.mkdtemp(), "genoma.fa")
+        with open(path, "w") as f:
+            f.writelines(f">c{i}\n{seq}\n" for i, seq in enumerate(records))
+        genes = load_reference(panel)
+        serial = screen_contigs(path, genes, workers=1, batch_bp=1000)
+        pooled = screen_contigs(path, genes, workers=2, batch_bp=1000)
+        self.assertEqual(pooled["hits"], serial["hits"])
+        self.assertEqual([h["contig"] for h in pooled["hits"]], ["c0", "c2"])
+        self.assertEqual((pooled["contigs"], pooled["length"]), (4, sum(map(len, records))))
+
+
+class HistoryExportTests(TestCase):
+    """El historial y sus exportaciones aplican los mismos filtros (views._history_jobs)."""
+
+    def setUp(self):
+        # Las versiones de view_cache se renuevan al confirmar, y estas pruebas no confirman
+        cache.clear()
+        user = User.objects.create_user("ana", password="clave")
+        make_job(user, "DONE", "alfa")
+        make_job(user, "ERROR", "alfa_2")
+        make_job(user, "DONE", "beta")
+        make_job(User.objects.create_user("otro"), "DONE", "alfa_ajena")
+        self.client.force_login(user)
+
+    def test_csv_export_uses_the_historial_filters(self):
+        params = {"q": "alfa", "status": "done"}
+        page = self.client.get(reverse("historial"), params).context["page_obj"]
+        self.assertEqual([j.sequence.name for j in page], ["alfa"])
+        response = self.client.get(reverse("export_historial_csv"), params)
+        rows = list(csv.reader(io.StringIO(response.content.decode())))[1:]
+        self.assertEqual([row[1] for row in rows], ["alfa"])
+
+    @unittest.skipIf(importlib.util.find_spec("pyarrow") is None, "pyarrow no está instalado")
+    def test_columnar_exports_use_the_historial_filters(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        alfa = AnalysisJob.objects.get(sequence__name="alfa")
+        save_gene_results(alfa, [("tetA", 1200, 99.5, 100.0, "CARD", "Tetracyclines", "c1", 10, 1210),
+                                 ("sul1", 840, 97.0, 95.0, "CARD", "Sulfonamides", "c2", 0, 798)])
+        params = {"q": "alfa", "status": "done"}
+
+        response = self.client.get(reverse("export_columnar", args=["hits", "parquet"]), params)
+        hits = pq.read_table(io.BytesIO(b"".join(response.streaming_content))).to_pydict()
+        self.assertEqual(sorted(hits["gene_name"]), ["sul1", "tetA"])
+        self.assertEqual(set(hits["job_id"]), {alfa.pk})
+
+        response = self.client.get(reverse("export_columnar", args=["jobs", "arrow"]), params)
+        jobs = pa.ipc.open_stream(b"".join(response.streaming_content)).read_all()
+        self.assertEqual((jobs.column("sequence_name").to_pylist(), jobs.column("status").to_pylist()),
+                         (["alfa"], ["DONE"]))
+
+    @unittest.skipIf(importlib.util.find_spec("pyarrow") is not None, "pyarrow está instalado")
+    def test_columnar_export_without_pyarrow_redirects(self):
+        response = self.client.get(reverse("export_columnar", args=["jobs", "parquet"]))
+        self.assertRedirects(response, reverse("historial"))
+
+
+class FastaStreamTests(SimpleTestCase):
+    """Validación y huella del FASTA por bloques (services.fasta_stream)."""
+
+    def test_fingerprint_ignores_line_width_chunking_and_compression(self):
+        rng = random.Random(21)
+        records = {"c1": "".join(rng.choice("ACGTN") for _ in range(1000)), "c2": "ACGT" * 50}
+        wrap = lambda width: "".join(
+            f">{name} muestra\n" + "".join(seq[i:i + width] + "\n" for i in range(0, len(seq), width))
+            for name, seq in records.items()
+        ).encode()
+        narrow = FastaStreamParser()
+        data = wrap(60)
+        for i in range(0, len(data), 7):
+            narrow.feed(data[i:i + 7])
+        expected = narrow.close()
+        stats, parser = parse_fasta_stream(io.BytesIO(gzip.compress(wrap(10_000).lower())), chunk_size=5)
+        for key in ("sha256", "length", "records", "gc_pct", "n_count"):
+            self.assertEqual(stats[key], expected[key], key)
+        self.assertEqual(parser.record_ids, ["c1", "c2"])
+        self.assertEqual(expected["length"], 1200)
+
+    def test_malformed_input_fails_on_the_offending_line(self):
+        with self.assertRaisesRegex(FastaFormatError, "Línea 1: se esperaba una cabecera"):
+            FastaStreamParser().feed(b"ACGT\n")
+        parser = FastaStreamParser()
+        with self.assertRaisesRegex(FastaFormatError, "Línea 3: carácter no válido 'J'"):
+            parser.feed(b">r1\nACGT\nACJT\n")
+        empty = FastaStreamParser()
+        empty.feed(b">vacio\n")
+        with self.assertRaisesRegex(FastaFormatError, "no contiene secuencia"):
+            empty.close()
+
+
+class ReadMappingTests(SimpleTestCase):
+    """Modo lecturas (services.reads): profundidad y amplitud por gen."""
+
+    def test_depth_and_breadth_from_gzipped_fastq(self):
+        rng = random.Random(23)
+        random_seq = lambda n: "".join(rng.choice("ACGT") for _ in range(n))
+        genes = {"tetA": random_seq(500), "sul1": random_seq(500)}
+        # Lecturas de 100 bp cada 10 bases sobre las primeras 300 de tetA (la mitad en la otra hebra)
+        reads = [genes["tetA"][i:i + 100] for i in range(0, 201, 10)]
+        reads = [r if i % 2 else reverse_complement(r) for i, r in enumerate(reads)] + [random_seq(100)] * 5
+        fastq = "".join(f"@r{i}\n{r}\n+\n{'I' * len(r)}\n" for i, r in enumerate(reads)).encode()
+        path = os.path.join(tempfile.mkdtemp(), "lecturas.fq.gz")
+        with gzip.open(path, "wb") as f:
+            f.write(fastq)
+
+        total, results = map_reads(path, genes, workers=1, chunk_reads=4)
+        self.assertEqual(total, 26)
+        self.assertEqual([r["gene"] for r in results], ["tetA"])
+        hit = results[0]
+        self.assertEqual((hit["reads"], hit["breadth"], hit["identity"]), (21, 60.0, 100.0))
+        self.assertEqual(hit["mean_depth"], round(21 * 100 / 500, 2))
+        self.assertEqual(map_reads(path, genes, workers=2, chunk_reads=4), (total, results))
+
+    def test_malformed_fastq(self):
+        with self.assertRaises(FastqFormatError):
+            map_reads(io.BytesIO(b"@r1\nACGT\n+\nII\n"), {"g": "ACGT" * 10}, workers=1)
+
+
+class CompressionTests(SimpleTestCase):
+    """Entrada comprimida (services.compression): formato por bytes mágicos y flujo."""
+
+    payload = b">c1\n" + b"ACGT" * 5000 + b"\n>c2\n" + b"TTGA" * 3000 + b"\n"
+
+    def test_stream_decompressor_multi_member_in_small_chunks(self):
+        import bz2
+        import lzma
+        half = len(self.payload) // 2
+        for compress in (gzip.compress, bz2.compress, lzma.compress):
+            # Dos miembros concatenados (p. ej. `cat a.gz b.gz`) leídos de a 7 bytes
+            data = compress(self.payload[:half]) + compress(self.payload[half:])
+            dec = StreamDecompressor()
+            out = b"".join(dec.feed(data[i:i + 7]) for i in range(0, len(data), 7)) + dec.flush()
+            self.assertEqual(out, self.payload, compress.__module__)
+
+    def test_truncated_input(self):
+        dec = StreamDecompressor()
+        dec.feed(gzip.compress(self.payload)[:-20])
+        with self.assertRaises(CompressionError):
+            dec.flush()
+
+    def test_open_binary_detects_by_content(self):
+        folder = tempfile.mkdtemp()
+        for name, data in (("a.fa", self.payload), ("b.fa", gzip.compress(self.payload)),
+                           ("sin_extension", gzip.compress(self.payload))):
+            path = os.path.join(folder, name)
+            Path(path).write_bytes(data)
+            with open_binary(path) as fh:
+                self.assertEqual(fh.read(), self.payload)
+            with open_binary(io.BytesIO(data)) as fh:
+                self.assertEqual(fh.read(), self.payload)
+        self.assertEqual(strip_compression_suffix("genoma.FA.GZ"), "genoma.FA")
+        self.assertEqual(strip_compression_suffix("genoma.fa"), "genoma.fa")
+
+
+class MemoryBudgetAlignmentTests(SimpleTestCase):
+    """Alineamiento por ventanas (services.alignment) y pico de RSS (services.resources)."""
+
+    def test_windows_cover_query_with_reference_overlap(self):
+        windows = list(iter_windows(10_000, 200, memory_mb=0))
+        self.assertEqual(windows[0][0], 0)
+        self.assertEqual(windows[-1][1], 10_000)
+        for (lo, hi), (next_lo, _) in zip(windows, windows[1:]):
+            self.assertGreaterEqual(hi - next_lo, MAX_SPAN_FACTOR * 200)
+        self.assertEqual(list(iter_windows(10_000, 200, memory_mb=256)), [(0, 10_000)])
+
+    def test_windowed_alignment_matches_whole_query(self):
+        rng = random.Random(35)
+        random_seq = lambda n: "".join(rng.choice("ACGT") for _ in range(n))
+        ref = random_seq(200)
+        variant = ref[:90] + ("A" if ref[90] != "A" else "C") + ref[91:150] + ref[153:]
+        # Ventanas de 1200 bases: el gen queda a caballo entre la primera y la segunda
+        query = random_seq(1100) + variant + random_seq(3000)
+        whole = align_and_score(query, ref, memory_mb=256)
+        windowed = align_and_score(query, ref, memory_mb=0)
+        self.assertGreater(len(list(iter_windows(len(query), len(ref), memory_mb=0))), 1)
+        self.assertEqual(windowed, whole)
+        self.assertEqual((whole["start"], whole["end"]), (1100, 1100 + len(variant)))
+
+    def test_peak_rss_counts_workers_started_from_other_threads(self):
+        code = "import time; b = bytearray(150 * 1024 * 1024); b[::4096] = b'x' * len(b[::4096]); time.sleep(1.5)"
+        procs = []
+        with PeakRSS(interval=0.05) as peak:
+            baseline = current_rss_kb()
+            worker = threading.Thread(target=lambda: procs.append(subprocess.Popen([sys.executable, "-c", code])))
+            worker.start()
+            worker.join()
+            procs[0].wait()
+        self.assertGreater(peak.kb - baseline, 100 * 1024)
+
+
+class SequenceStatsTests(SimpleTestCase):
+    """Estadísticas en una pasada (services.seqstats) frente a un cálculo directo."""
+
+    def setUp(self):
+        rng = random.Random(36)
+        self.records = ["".join(rng.choice("ACGTACGTGCN" if r else "ACGTRY") for _ in range(n))
+                        for r, n in enumerate((1234, 2501))]
+
+    def feed(self, window, k):
+        acc = SequenceStatsAccumulator(window=window, k=k)
+        rng = random.Random(0)
+        for seq in self.records:
+            acc.new_record()
+            i = 0
+            while i < len(seq):
+                step = rng.randint(1, 90)
+                acc.feed(seq[i:i + step].encode())
+                i += step
+        return acc.result()
+
+    def test_matches_direct_count_across_blocks_and_records(self):
+        k, window = 3, 100
+        with mock.patch("analisis.services.seqstats.BLOCK_BYTES", 37):
+            stats = self.feed(window, k)
+        joined = "".join(self.records)
+        self.assertEqual(stats["length"], len(joined))
+        self.assertEqual(stats["base_counts"], {b: joined.count(b) for b in "ACGT"})
+        self.assertEqual(stats["n_count"], joined.count("N"))
+        self.assertEqual(stats["ambiguous_count"], joined.count("R") + joined.count("Y"))
+        self.assertEqual(stats["gc_pct"], round((joined.count("G") + joined.count("C")) / len(joined) * 100, 2))
+
+        expected_gc = []
+        for lo in range(0, len(joined), window):
+            chunk = joined[lo:lo + window]
+            acgt = sum(chunk.count(b) for b in "ACGT")
+            expected_gc.append(round((chunk.count("G") + chunk.count("C")) / acgt * 100, 2) if acgt else None)
+        self.assertEqual(stats["gc_profile"], expected_gc)
+
+        # Los k-mers no cruzan registros ni incluyen bases fuera de ACGT
+        expected = [0] * 4 ** k
+        for seq in self.records:
+            for i in range(len(seq) - k + 1):
+                kmer = seq[i:i + k]
+                if set(kmer) <= set("ACGT"):
+                    expected[int(kmer.translate(str.maketrans("ACGT", "0123")), 4)] += 1
+        self.assertEqual(stats["kmer_counts"], expected)
+        top = top_kmers(stats["kmer_counts"], k, n=1)[0]
+        self.assertEqual(top[1], max(expected))
+
+    def test_long_profiles_are_grouped(self):
+        with mock.patch("analisis.services.seqstats.MAX_WINDOWS", 4):
+            stats = self.feed(window=100, k=2)
+        self.assertEqual(stats["window_size"], 1000)
+        self.assertEqual(len(stats["gc_profile"]), 4)
+
+
+
+class _StubPlatform(BaseHTTPRequestHandler):
+    """Servidor mínimo con las rutas que recorre el generador de carga."""
+
+    uploads = []
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status=200, body=b"ok", location=None, content_type="text/html"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "csrftoken=token-de-prueba; Path=/")
+        if location:
+            self.send_header("Location", location)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path.startswith("/run/"):
+            self.reply(302, location=f"/resultados/{len(self.uploads)}/")
+        elif path.startswith("/api/v1/jobs/"):
+            status = "DONE" if path.endswith("/1/") else "ERROR"
+            self.reply(body=json.dumps({"status": status}).encode(), content_type="application/json")
+        elif path.startswith("/resultados/"):
+            self.reply(body=b"Error: database is locked")
+        else:
+            self.reply()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/accounts/login/":
+            if b"username=carga" in body:
+                self.reply(302, location="/")
+            else:
+                self.reply()
+            return
+        self.uploads.append(body)
+        # La segunda subida vuelve a mostrar el formulario (error de validación)
+        if len(self.uploads) == 2:
+            self.reply()
+        else:
+            self.reply(302, location=f"/seq/{len(self.uploads)}/")
+
+
+class LoadTestHarnessTests(SimpleTestCase):
+    """Generador de carga (services.loadtest): recorrido y clasificación de errores."""
+
+    def setUp(self):
+        _StubPlatform.uploads = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubPlatform)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def test_route_and_error_classification(self):
+        fasta = synthetic_fasta(length=3000, contigs=2, seed=37)
+        self.assertEqual(fasta.count(b">"), 2)
+        elapsed, samples = run_load_test(self.url, [("carga", "clave")], iterations=3, fasta=fasta)
+
+        self.assertEqual(len(_StubPlatform.uploads), 3)
+        self.assertIn(fasta, _StubPlatform.uploads[0])
+        rows = {row["endpoint"]: row for row in summarize(elapsed, samples)}
+        self.assertEqual(rows["upload_sequence"]["requests"], 6)  # GET del formulario y POST por iteración
+        self.assertEqual(rows["upload_sequence"]["errors"], {"HTTP 200 sin redirección": 1})
+        self.assertEqual(rows["run_analysis"]["requests"], 2)
+        self.assertEqual(rows["analysis_job"]["errors"], {"job ERROR (database is locked)": 1})
+        self.assertEqual(rows["analysis_job"]["error_pct"], 50.0)
+        self.assertEqual(rows["export_historial_csv"]["requests"], 3)
+        self.assertEqual(rows["TOTAL"]["requests"], len(samples))
+
+    def test_rejected_login(self):
+        _, samples = run_load_test(self.url, [("nadie", "x")], iterations=1)
+        self.assertEqual(samples[-1], ("login", 0.0, "login rechazado"))
+        self.assertEqual(_StubPlatform.uploads, [])
+
+
+class TranslatedSearchTests(SimpleTestCase):
+    """Búsqueda traducida en seis marcos (services.protein, search_mode="AA")."""
+
+    def setUp(self):
+        rng = random.Random(40)
+        self.random_seq = lambda n: "".join(rng.choice("ACGT") for _ in range(n))
+        self.codons = {}
+        for i, aa in enumerate(CODON_TABLE.tobytes().decode()):
+            self.codons.setdefault(aa, []).append("TCAG"[i // 16] + "TCAG"[i // 4 % 4] + "TCAG"[i % 4])
+        self.protein = "M" + "".join(rng.choice([a for a in self.codons if a not in "*M"]) for _ in range(119))
+        self.gene = "".join(self.codons[a][0] for a in self.protein) + "TAA"
+
+    def recode(self, protein):
+        """Otra secuencia de nucleótidos para la misma proteína (codones sinónimos)."""
+        return "".join((self.codons[a][1:] or self.codons[a])[0] for a in protein)
+
+    def test_synonymous_variant_on_reverse_strand(self):
+        recoded = self.recode(self.protein)
+        contig = self.random_seq(301) + reverse_complement(recoded) + self.random_seq(200)
+        path = os.path.join(tempfile.mkdtemp(), "genoma.fa")
+        with open(path, "w") as f:
+            f.write(f">c0\n{self.random_seq(500)}\n>c1\n{contig}\n")
+        genes = load_reference({"blaX": self.gene})
+
+        self.assertEqual(screen_contigs(path, genes, workers=1)["hits"], [])
+        hits = screen_contigs(path, genes, workers=1, search_mode="AA")["hits"]
+        self.assertEqual(len(hits), 1)
+        hit = hits[0]
+        self.assertEqual((hit["contig"], hit["identity"], hit["coverage"]), ("c1", 100.0, 100.0))
+        # Coordenadas en la hebra directa; el marco se cuenta desde el final del contig
+        self.assertEqual((hit["start"], hit["end"], hit["strand"]), (301, 301 + len(recoded), "-"))
+        self.assertEqual(hit["frame"], f"-{(len(contig) - 301 - len(recoded)) % 3 + 1}")
+
+    def test_one_hit_per_allele_cluster(self):
+        variant = self.protein[:60] + ("W" if self.protein[60] != "W" else "Y") + self.protein[61:]
+        alleles = [SimpleNamespace(gene_name=name, sequence=seq, source="CARD", antibiotic_class="",
+                                   cluster="blaX", representative=rep)
+                   for name, seq, rep in (("blaX-1", self.gene, True), ("blaX-2", self.recode(variant), False))]
+        index = ProteinIndex(alleles)
+        query = self.random_seq(150) + self.recode(variant) + self.random_seq(150)
+        hits = index.search(query, min_identity=0.4, min_coverage=0.5)
+        self.assertEqual([(h["gene"], h["identity"]) for h in hits], [("blaX-2", 1.0)])
+
+
+# Otro proceso de la plataforma: agrega una muestra al archivo guardado
+_OTHER_PROCESS = """
+import os, sys
+from analisis.services.presence import PresenceMatrix
+path = sys.argv[1]
+matrix = PresenceMatrix.load(path)
+matrix.update(999, 20000, 7, {"mcr-1": 100.0})
+matrix.save(path)
+mtime = os.stat(path).st_mtime_ns + 10 ** 9
+os.utime(path, ns=(mtime, mtime))
+"""
+
+
+class PresenceSharingTests(TestCase):
+    """Matriz de presencia compartida entre procesos (services.surveillance)."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "presence.npz")
+        overrides = override_settings(RAM_PRESENCE_PATH=self.path, RAM_PRESENCE_SAVE_SECONDS=3600)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # Estado del proceso como recién iniciado
+        patcher = mock.patch.multiple(surveillance, _matrix=None, _mtime=None, _changes={},
+                                      _last_save=time.monotonic())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user("vigia", password="clave")
+
+    def done_job(self, name, gene):
+        job = make_job(self.user, "DONE", name)
+        DetectedGene.objects.create(job=job, gene_name=gene, identity=98.5)
+        return job
+
+    def other_process(self):
+        subprocess.run([sys.executable, "-c", _OTHER_PROCESS, self.path], check=True,
+                       cwd=settings.BASE_DIR)
+
+    def test_unsaved_rows_merge_over_another_process_save(self):
+        first = self.done_job("a", "tetA")
+        surveillance.co_occurrence("tetA")  # sin archivo: se reconstruye desde la base y se guarda
+        second = self.done_job("b", "sul1")
+        surveillance.record_job(second)     # queda sin guardar (RAM_PRESENCE_SAVE_SECONDS)
+        self.other_process()
+        surveillance.flush()
+
+        saved = PresenceMatrix.load(self.path)
+        self.assertEqual(sorted(saved.samples.tolist()), sorted([first.sequence_id, second.sequence_id, 999]))
+        self.assertEqual(saved.profile(second.sequence_id), {"sul1": 98.5})
+
+    def test_queries_follow_the_file_and_only_the_latest_job_counts(self):
+        old = self.done_job("c", "tetA")
+        surveillance.co_occurrence("tetA")
+        self.other_process()
+        self.assertEqual(surveillance.co_occurrence("mcr-1")[0], 1)
+
+        newer = AnalysisJob.objects.create(sequence=old.sequence, mode="REAL", status="DONE")
+        AnalysisJob.objects.filter(pk=old.pk).update(created_at=newer.created_at - timedelta(hours=1))
+        DetectedGene.objects.create(job=newer, gene_name="blaKPC", identity=100.0)
+        self.assertFalse(surveillance.is_latest(old))
+        surveillance.record_job(newer)
+        surveillance.record_job(old)        # re-analizar el anterior no pisa la muestra
+        self.assertEqual(surveillance.nearest(old.sequence_id)[0], {"blaKPC": 100.0})
+
+
+class PriorityAlertTests(TestCase):
+    """Carril rápido de genes prioritarios (services.priority) y alerta temprana (jobs.raise_alert)."""
+
+    def test_gene_families(self):
+        panel = parse_panel("blaNDM, mcr-1  blaKPC")
+        self.assertEqual(panel, ("blaNDM", "mcr-1", "blaKPC"))
+        for name in ("blaNDM", "blaNDM-1", "blaNDM5", "mcr-1", "mcr-1.1", "blaKPC-2"):
+            self.assertTrue(is_priority(name, panel), name)
+        for name in ("blaNDMX", "mcr-10", "mcr-2", "blaOXA-48"):
+            self.assertFalse(is_priority(name, panel), name)
+        first, rest = split_panel(["tetA", "mcr-1.1", "sul1", "blaNDM-1"], panel, name=str)
+        self.assertEqual((first, rest), (["mcr-1.1", "blaNDM-1"], ["tetA", "sul1"]))
+
+    def test_only_critical_priority_hits_alert(self):
+        rng = random.Random(47)
+        random_seq = lambda n: "".join(rng.choice("ACGT") for _ in range(n))
+        genes = load_reference({"blaKPC-2": random_seq(300), "tetA": random_seq(300), "mcr-10": random_seq(300)})
+        kpc, tet, mcr = (g.sequence for g in genes)
+        path = os.path.join(tempfile.mkdtemp(), "genoma.fa")
+        with open(path, "w") as f:
+            # blaKPC-2 truncado al final del contig (70 % de cobertura); mcr-10 no es de la familia mcr-1
+            f.write(f">c1\n{random_seq(400)}{kpc[:210]}\n>c2\n{random_seq(300)}{tet}{mcr}{random_seq(300)}\n")
+        alerts = []
+        *_, gene_results, _ = analyze_realistic(path, genes=genes, mutation_panel=MutationPanel([]), workers=1,
+                                                priority=("blaKPC", "mcr-1"), on_alert=alerts.append)
+        self.assertEqual([(row[0], row[3]) for row in gene_results],
+                         [("blaKPC-2", 70.0), ("tetA", 100.0), ("mcr-10", 100.0)])
+        self.assertEqual(alerts, [])
+
+    def test_early_alert_is_written_while_running(self):
+        user = User.objects.create_user("clinica", password="clave")
+        job = make_job(user, "RUNNING", "urgente", attempts=1)
+        row = ("blaNDM-1", 813, 100.0, 100.0, "CARD", "Carbapenems", "contig_1", 10, 823)
+        raise_alert(job, [row])
+        raise_alert(job, [row])  # un reintento reemplaza los genes de la alerta anterior
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.risk_level, job.alert_genes), ("RUNNING", "HIGH", ["blaNDM-1"]))
+        self.assertIsNotNone(job.alert_at)
+        self.assertEqual(job.detected_genes.count(), 1)
+
+        # Reencolado por el reaper: esta ejecución ya no escribe
+        AnalysisJob.objects.filter(pk=job.pk).update(attempts=2)
+        raise_alert(job, [("blaKPC-2", 882, 100.0, 100.0, "CARD", "Carbapenems", "contig_2", 0, 882)])
+        job.refresh_from_db()
+        self.assertEqual(job.alert_genes, ["blaNDM-1"])
+        self.assertEqual(list(job.detected_genes.values_list("gene_name", flat=True)), ["blaNDM-1"])
+
+
+class JobEventsTests(TestCase):
+    """Avance en vivo: ProgressReporter agrupa escrituras y el stream SSE las emite."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("ana", password="clave")
+        self.job = make_job(self.user, "RUNNING", "en_curso")
+        self.client.force_login(self.user)
+
+    def test_reporter_batches_writes_but_publishes_hits(self):
+        reporter = ProgressReporter(self.job.pk, genes_total=10)
+        reporter.update(genes_screened=1)
+        reporter.update(genes_screened=2)   # dentro del intervalo: no se escribe
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.progress["genes_screened"], 1)
+        reporter.update(hit="blaNDM-1", genes_screened=3)
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.progress["genes_screened"], self.job.progress["hits"]), (3, ["blaNDM-1"]))
+
+    @mock.patch("analisis.views.SSE_POLL_SECONDS", 0)
+    def test_stream_emits_changes_then_done(self):
+        AnalysisJob.objects.filter(pk=self.job.pk).update(progress={"genes_screened": 4})
+        response = self.client.get(reverse("job_events", args=[self.job.pk]))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b"retry:"))
+        self.assertIn(b'"genes_screened": 4', next(stream))
+
+        AnalysisJob.objects.filter(pk=self.job.pk).update(status="DONE", progress={"genes_screened": 10})
+        rest = b"".join(stream)
+        self.assertEqual(rest.count(b"event: progress"), 1)
+        self.assertIn(b'event: done\ndata: {"status": "DONE"', rest)
+
+    def test_other_users_job_is_not_found(self):
+        self.client.force_login(User.objects.create_user("otro"))
+        self.assertEqual(self.client.get(reverse("job_events", args=[self.job.pk])).status_code, 404)
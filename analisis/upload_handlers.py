@@ -0,0 +1,58 @@
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+from .constants import FASTA_EXTENSIONS
+from .services.fasta_stream import FastaStreamParser, FastaFormatError
+from .services.compression import StreamDecompressor, CompressionError, strip_compression_suffix
+
+
+class FastaUploadHandler(FileUploadHandler):
+    """
+    Manejador de subida que valida y mide el FASTA mientras se recibe.
+
+    Se instala delante de los manejadores por defecto: inspecciona cada bloque
+    (descomprimiéndolo al vuelo si es gzip/bz2/xz) y lo deja pasar sin
+    copiarlo; en disco se guarda el archivo tal como se subió. El resultado queda en
+    request.fasta_uploads[campo] = {"stats": {...}} o {"error": "..."}.
+    Un archivo mal formado se descarta en el primer bloque inválido.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.parser = None
+        self.decompressor = None
+        if request is not None and not hasattr(request, "fasta_uploads"):
+            request.fasta_uploads = {}
+            request.fasta_upload_log = []
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        # La extensión la valida el formulario; aquí solo se analizan los FASTA
+        is_fasta = strip_compression_suffix(file_name).lower().endswith(FASTA_EXTENSIONS)
+        self.parser = FastaStreamParser() if is_fasta else None
+        self.decompressor = StreamDecompressor() if is_fasta else None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.parser is not None:
+            try:
+                self.parser.feed(self.decompressor.feed(raw_data))
+            except (FastaFormatError, CompressionError) as e:
+                self._record({"error": str(e)})
+                self.parser = None
+                raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.parser is not None:
+            try:
+                self.parser.feed(self.decompressor.flush())
+                self._record({"stats": self.parser.close()})
+            except (FastaFormatError, CompressionError) as e:
+                self._record({"error": str(e)})
+            self.parser = None
+        # Devuelve None: el archivo lo construye el siguiente manejador
+        return None
+
+    def _record(self, info):
+        if self.request is not None:
+            self.request.fasta_uploads[self.field_name] = info
+            self.request.fasta_upload_log.append((self.field_name, self.file_name, info))
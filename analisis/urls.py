@@ -1,16 +1,31 @@
 from django.urls import path
-from . import views
+from . import views, api
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('upload/', views.upload_sequence, name='upload'),
     path('seq/<int:pk>/', views.sequence_detail, name='sequence_detail'),
     path('run/<int:pk>/', views.run_analysis, name='run_analysis'),
+    path('jobs/<int:pk>/cancel/', views.cancel_job, name='cancel_job'),
     path('resultados/<int:pk>/', views.resultados, name='resultados'),
+    path('resultados/<int:pk>/eventos/', views.job_events, name='job_events'),
+    path('resultados/<int:pk>/hits.fasta', views.export_hits_fasta, name='export_hits_fasta'),
     # 🔽 NUEVO
     path('historial/', views.historial, name='historial'),
     path('historial/export.csv', views.export_historial_csv, name='export_historial_csv'),
+    path('historial/<str:what>.<str:fmt>', views.export_columnar, name='export_columnar'),
         # ✅ Exportar PDF
     path('exportar-pdf/<int:pk>/', views.exportar_pdf, name='exportar_pdf'),
 
+    # Vigilancia entre muestras (JSON)
+    path('vigilancia/coocurrencia/', views.vigilancia_coocurrencia, name='vigilancia_coocurrencia'),
+    path('vigilancia/serie/', views.vigilancia_serie, name='vigilancia_serie'),
+    path('vigilancia/similares/<int:pk>/', views.vigilancia_similares, name='vigilancia_similares'),
+
+    # API JSON (asíncrona)
+    path('api/v1/jobs/', api.jobs_collection, name='api_jobs'),
+    path('api/v1/jobs/<int:pk>/', api.job_status, name='api_job_status'),
+    path('api/v1/jobs/<int:pk>/hits/', api.job_hits, name='api_job_hits'),
+    path('api/v1/scheduler/', api.scheduler_metrics, name='api_scheduler'),
+
 ]
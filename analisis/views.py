@@ -5,21 +5,40 @@ from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.utils.dateparse import parse_date
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_POST
 from .forms import SequenceUploadForm
+from .upload_handlers import FastaUploadHandler
 from .models import Sequence, AnalysisJob, DetectedGene
 from django.db.models.functions import TruncDate
 from django.db.models import Count
-from .services.analyzers import analyze_realistic
 from .services.reports import generar_pdf
-from .constants import HIGH_IDENTITY, HIGH_COVERAGE
+from .services.jobs import cancel_job as request_cancel, submit_job
+from .services.fasta_index import FastaIndex, build_index, fetch_regions
+from .services.stats_cache import store_profile, stats_for
+from .services.seqstats import top_kmers
+from .services.view_cache import GLOBAL_SCOPE, cached
+from .services import surveillance
+from .services.columnar import FORMATS as COLUMNAR_FORMATS, ColumnarUnavailable, stream as columnar_stream
+from .services.exports import EXPORTS
+import asyncio
 import csv
+import itertools
+import json
+import time
 
 @login_required
 def dashboard(request):
+    # Versionado por usuario: se invalida al terminar un job o agregar una secuencia
+    context = cached(request.user.pk, "dashboard", lambda: _dashboard_context(request.user))
+    return render(request, "analisis/dashboard.html", context)
+
+def _dashboard_context(user):
     # Datos base
-    seqs = Sequence.objects.filter(owner=request.user)
-    jobs = AnalysisJob.objects.filter(sequence__owner=request.user)
+    seqs = Sequence.objects.filter(owner=user)
+    jobs = AnalysisJob.objects.filter(sequence__owner=user)
 
     # KPIs
     total_sequences = seqs.count()
@@ -79,16 +98,35 @@ def dashboard(request):
     context["genes_by_source"] = list(genes_by_source)
     context["cases_by_date"] = list(cases_by_date)
 
-    return render(request, "analisis/dashboard.html", context)
+    return context
 
+@csrf_exempt
 @login_required
 def upload_sequence(request):
+    # El manejador debe instalarse antes de que se lea request.POST,
+    # por eso la protección CSRF se aplica en la vista interna.
+    request.upload_handlers.insert(0, FastaUploadHandler(request))
+    return _upload_sequence(request)
+
+@csrf_protect
+def _upload_sequence(request):
     if request.method == "POST":
-        form = SequenceUploadForm(request.POST, request.FILES)
+        form = SequenceUploadForm(request.POST, request.FILES,
+                                  fasta_uploads=getattr(request, "fasta_uploads", None))
         if form.is_valid():
             seq = form.save(commit=False)
             seq.owner = request.user
+            stats = form.fasta_stats
+            if stats:
+                seq.length_bp = stats["length"]
+                seq.gc_pct = stats["gc_pct"]
+                seq.n_count = stats["n_count"]
+                seq.record_count = stats["records"]
+                seq.sha256 = stats["sha256"]
+                seq.fai = stats["fai"]
             seq.save()
+            if stats:
+                store_profile(stats["sha256"], stats["profile"])
             messages.success(request, "✅ Secuencia cargada correctamente.")
             return redirect("sequence_detail", pk=seq.pk)  # 👈 redirección tras subir
         else:
@@ -97,15 +135,52 @@ def upload_sequence(request):
         form = SequenceUploadForm()
     
     return render(request, "analisis/upload.html", {"form": form})
+PREVIEW_BP = 500
+HIT_FLANK_BP = 50
+HIT_PREVIEW_BP = 200
+
+def _sequence_index(seq):
+    """Índice .fai de la secuencia; las subidas anteriores al índice se indexan una vez."""
+    if seq.fai:
+        return FastaIndex.from_fai(seq.fai)
+    index = build_index(seq.fasta_file.path)
+    if index is not None:
+        seq.fai = index.to_fai()
+        seq.save(update_fields=["fai"])
+    return index
+
 @login_required
 def sequence_detail(request, pk):
     seq = get_object_or_404(Sequence, pk=pk, owner=request.user)
     jobs = seq.jobs.order_by('-created_at')
-
-    return render(request, "analisis/detalle.html", {
-        "seq": seq,
-        "jobs": jobs
-    })
+    context = {"seq": seq, "jobs": jobs, "backend_choices": AnalysisJob.BACKEND_CHOICES}
+
+    # Vista previa y contexto de los hits: un seek por tramo, sin leer el genoma
+    if seq.data_type == "ASSEMBLY":
+        stats = stats_for(seq)
+        if stats is not None:
+            context["stats"] = stats
+            context["top_kmers"] = top_kmers(stats.kmer_counts, stats.kmer_k)
+            context["profile"] = {"window": stats.window_size, "gc": stats.gc_profile, "skew": stats.gc_skew}
+        index = _sequence_index(seq)
+        last_done = jobs.filter(status="DONE").first()
+        hits = list(last_done.detected_genes.filter(start__isnull=False).order_by("contig", "start")) if last_done else []
+        regions = [(None, 0, PREVIEW_BP)]
+        for g in hits:
+            core_end = min(g.end, g.start + HIT_PREVIEW_BP)
+            contig = g.contig or None
+            regions += [(contig, g.start - HIT_FLANK_BP, g.start), (contig, g.start, core_end),
+                        (contig, core_end, core_end + HIT_FLANK_BP)]
+        slices = fetch_regions(seq.fasta_file.path, index, regions)
+        context["preview"] = slices[0]
+        context["hit_regions"] = [
+            {"gene": g, "left": slices[1 + 3 * i], "core": slices[2 + 3 * i], "right": slices[3 + 3 * i],
+             "truncated": g.end - g.start > HIT_PREVIEW_BP}
+            for i, g in enumerate(hits)
+        ]
+        context["last_done"] = last_done
+
+    return render(request, "analisis/detalle.html", context)
 
 @login_required
 def run_analysis(request, pk):
@@ -114,138 +189,241 @@ def run_analysis(request, pk):
     Basado en librerías de Biopython y patrones de genes RAM simulados.
     """
     seq = get_object_or_404(Sequence, pk=pk, owner=request.user)
-    job = AnalysisJob.objects.create(sequence=seq, mode="REAL", status="RUNNING")
+    mode = "READS" if seq.data_type == "READS" else "REAL"
+    # ?search=AA: búsqueda traducida (seis marcos) en lugar de nucleótidos
+    search_mode = request.GET.get("search", "NT").upper()
+    if search_mode not in dict(AnalysisJob.SEARCH_MODE_CHOICES):
+        search_mode = "NT"
+    # ?backend=...: backend del motor de detección (services.engine)
+    backend = request.GET.get("backend", "kmer")
+    if backend not in dict(AnalysisJob.BACKEND_CHOICES):
+        backend = "kmer"
+    # ?priority=clinical: delante de la cola del pool (services.scheduler)
+    clinical = (request.GET.get("priority") == "clinical"
+                and request.user.has_perm("analisis.clinical_priority"))
+    job = AnalysisJob.objects.create(sequence=seq, mode=mode, status="PENDING", search_mode=search_mode,
+                                     backend=backend, clinical_priority=clinical)
+
+    # El análisis corre en segundo plano; la página de resultados muestra
+    # el avance en vivo (job_events) y se recarga al terminar.
+    submit_job(job.pk)
+    messages.info(request, "🧬 Análisis en curso: el progreso se actualiza en vivo.")
+    return redirect("resultados", pk=job.pk)
+
+@login_required
+@require_POST
+def cancel_job(request, pk):
+    """
+    Cancela un análisis: si sigue en cola no llega a ejecutarse; si está en
+    curso se detiene en su próximo punto de control (services.budget).
+    """
+    job = get_object_or_404(AnalysisJob, pk=pk, sequence__owner=request.user)
+    status = request_cancel(job)
+    if status == "CANCELLED":
+        messages.info(request, "⏹ Análisis cancelado.")
+    elif status == "RUNNING":
+        messages.info(request, "⏹ Cancelación solicitada: el análisis se detendrá en unos segundos.")
+    else:
+        messages.warning(request, "El análisis ya había terminado.")
+    return redirect("sequence_detail", pk=job.sequence_id)
+
+SSE_POLL_SECONDS = 0.5
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_SECONDS = 30 * 60
+# Bajo WSGI cada conexión ocupa un hilo: se corta antes y el navegador
+# (EventSource) se reconecta solo tras SSE_RETRY_MS
+SSE_WSGI_MAX_SECONDS = 60
+SSE_RETRY_MS = 1000
+
+
+def _sse_events(state, last):
+    """Eventos SSE para `state` (None si el job ya no existe) → (eventos, payload, terminado)."""
+    if state is None:
+        return [], last, True
+    payload = json.dumps(state)
+    events = [] if payload == last else [f"event: progress\ndata: {payload}\n\n"]
+    done = state["status"] not in ("PENDING", "RUNNING")
+    if done:
+        events.append(f"event: done\ndata: {payload}\n\n")
+    return events, payload, done
 
-    try:
-        from .services.analyzers import analyze_realistic
-        length, identity, coverage, summary, gene_results = analyze_realistic(seq.fasta_file.path)
-
-        seq.length_bp = length
-        seq.save()
-
-        job.identity_pct = identity
-        job.coverage_pct = coverage
-        job.raw_summary = summary
-        job.status = "DONE"
-        job.save()
-
-        # Guardar genes y evaluar riesgo
-        from .models import DetectedGene
-        high_risk_found = False
-
-        for g in gene_results:
-            # g = (gene_name, matches, ident, cov, source, abx_class)
-            gene_name, matches, ident, cov, source, abx_class = g
-
-            # Clasificación por identidad (visual)
-            if ident >= 90:
-                level = "Alta resistencia"
-            elif ident >= 60:
-                level = "Resistencia moderada"
-            elif ident >= 30:
-                level = "Baja resistencia"
-            else:
-                level = "Sin resistencia"
-
-            # Reglas de alto riesgo (anomalía)
-            if ident >= HIGH_IDENTITY and cov >= HIGH_COVERAGE:
-                high_risk_found = True
-
-            DetectedGene.objects.create(
-                job=job,
-                gene_name=gene_name,
-                source=source,
-                antibiotic_class=abx_class,
-                matches=matches,
-                identity=ident,
-                coverage=cov,
-                classification=level
-            )
-
-        job.risk_level = "HIGH" if high_risk_found else ("MEDIUM" if identity>=60 else ("LOW" if identity>=30 else "NONE"))
-        job.save()
-
-        messages.success(request, f"✅ Análisis completado: {identity}% identidad, {coverage}% cobertura")
-        return redirect("resultados", pk=job.pk)
-    
-    except Exception as e:
-        # Manejo de errores
-        job.status = "ERROR"
-        job.raw_summary = str(e)
-        job.save()
-        messages.error(request, f"❌ Error en análisis: {e}")
-        return redirect("sequence_detail", pk=seq.pk)
+
+@login_required
+async def job_events(request, pk):
+    """
+    Server-Sent Events con el avance del job (genes evaluados, bp, hits
+    parciales). Emite 'progress' en cada cambio y 'done' al terminar.
+
+    Bajo ASGI (p. ej. `uvicorn plataforma_bioinfo.asgi:application`) el
+    stream es async: una página esperando no ocupa un hilo. Bajo WSGI
+    (runserver, wsgi.py) un iterador async se consumiría completo antes de
+    enviar nada, así que se usa un generador síncrono que se corta cada
+    SSE_WSGI_MAX_SECONDS y el navegador se reconecta.
+    """
+    user = await request.auser()
+    jobs = (AnalysisJob.objects.filter(pk=pk, sequence__owner=user)
+            .values("status", "progress", "risk_level", "alert_genes"))
+    if not await jobs.aexists():
+        return HttpResponse(status=404)
+
+    async def async_stream():
+        loop = asyncio.get_running_loop()
+        started = last_beat = loop.time()
+        last = None
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while loop.time() - started < SSE_MAX_SECONDS:
+            events, last, done = _sse_events(await jobs.afirst(), last)
+            for event in events:
+                yield event
+            if done:
+                return
+            if loop.time() - last_beat >= SSE_HEARTBEAT_SECONDS:
+                last_beat = loop.time()
+                yield ": ping\n\n"
+            await asyncio.sleep(SSE_POLL_SECONDS)
+
+    def sync_stream():
+        started = last_beat = time.monotonic()
+        last = None
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while time.monotonic() - started < SSE_WSGI_MAX_SECONDS:
+            events, last, done = _sse_events(jobs.first(), last)
+            yield from events
+            if done:
+                return
+            if time.monotonic() - last_beat >= SSE_HEARTBEAT_SECONDS:
+                last_beat = time.monotonic()
+                yield ": ping\n\n"
+            time.sleep(SSE_POLL_SECONDS)
+
+    stream = async_stream() if isinstance(request, ASGIRequest) else sync_stream()
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 @login_required
 def resultados(request, pk):
+    def load():
+        job = get_object_or_404(AnalysisJob.objects.select_related("sequence"), pk=pk, sequence__owner=request.user)
+        # La lista de genes se consulta una sola vez para toda la plantilla
+        return job, list(job.detected_genes.all())
+
+    job, genes = cached(request.user.pk, "resultados", load, pk)
+    return render(request, "analisis/resultados.html", {"job": job, "genes": genes})
+@login_required
+def export_hits_fasta(request, pk):
+    """Exporta en FASTA la región de cada gen/mutación detectado (lecturas: no aplica)."""
     job = get_object_or_404(AnalysisJob, pk=pk, sequence__owner=request.user)
-    return render(request, "analisis/resultados.html", {"job": job})
+    hits = list(job.detected_genes.filter(start__isnull=False).order_by("contig", "start"))
+    index = _sequence_index(job.sequence)
+    seqs = fetch_regions(job.sequence.fasta_file.path, index, [(g.contig or None, g.start, g.end) for g in hits])
+
+    response = HttpResponse(content_type="text/x-fasta")
+    response["Content-Disposition"] = f'attachment; filename="hits_job{job.pk}.fasta"'
+    for g, s in zip(hits, seqs):
+        label = f"{g.gene_name}_{g.mutation}" if g.mutation else g.gene_name
+        region = f"{g.contig}:{g.start + 1}-{g.end}" if g.contig else f"{g.start + 1}-{g.end}"
+        response.write(f">{label} job={job.pk} region={region} identidad={g.identity}\n")
+        for i in range(0, len(s), 60):
+            response.write(s[i:i + 60] + "\n")
+    return response
+
 @login_required
 def exportar_pdf(request, pk):
     job = get_object_or_404(AnalysisJob, pk=pk, sequence__owner=request.user)
     context = {"job": job}
     return generar_pdf("analisis/resultados_pdf.html", context)
-@login_required
-def historial(request):
+
+
+class _CachedPages:
     """
-    Lista de AnalysisJob con filtros:
-    - q: busca por nombre de secuencia
-    - status: PENDING/RUNNING/DONE/ERROR
-    - date_from, date_to: rango de fechas (YYYY-MM-DD)
-    - owner_scope: 'mine' (default) o 'all' (si is_staff)
-    Paginación: 10 por página
+    Queryset para Paginator con el total y cada página en caché (view_cache),
+    no el historial completo: count() y las rebanadas que pide la página.
     """
-    q = request.GET.get('q', '').strip()
-    status = request.GET.get('status', '').strip().upper()
-    date_from = request.GET.get('date_from', '').strip()
-    date_to = request.GET.get('date_to', '').strip()
-    owner_scope = request.GET.get('owner_scope', 'mine')
-    
-    # ⚙️ Nuevo: filtro por nivel de riesgo
-    risk = request.GET.get('risk', '').upper()
-    # Base queryset
+
+    def __init__(self, jobs, scope, name, *parts):
+        self.jobs, self.scope, self.name, self.parts = jobs, scope, name, parts
+
+    def count(self):
+        return cached(self.scope, f"{self.name}:count", self.jobs.count, *self.parts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        return cached(self.scope, f"{self.name}:page", lambda: list(self.jobs[index]),
+                      *self.parts, index.start, index.stop)
+
+
+def _history_jobs(request):
+    """
+    Jobs del historial con sus filtros, compartidos por la vista y las
+    exportaciones (CSV, Parquet/Arrow). Retorna (queryset, filtros).
+    """
+    filters = {
+        "q": request.GET.get('q', '').strip(),
+        "status": request.GET.get('status', '').strip().upper(),
+        "risk": request.GET.get('risk', '').strip().upper(),
+        "date_from": request.GET.get('date_from', '').strip(),
+        "date_to": request.GET.get('date_to', '').strip(),
+        "owner_scope": request.GET.get('owner_scope', 'mine'),
+    }
     jobs = AnalysisJob.objects.select_related('sequence').order_by('-created_at')
 
     # Alcance por rol
-    if request.user.is_staff and owner_scope == 'all':
+    if request.user.is_staff and filters["owner_scope"] == 'all':
         pass  # ve todo
     else:
         jobs = jobs.filter(sequence__owner=request.user)
 
     # Filtro por texto
+    q = filters["q"]
     if q:
         jobs = jobs.filter(Q(sequence__name__icontains=q) | Q(raw_summary__icontains=q))
 
-    # Filtro por estado
-    if status in {'PENDING', 'RUNNING', 'DONE', 'ERROR'}:
-        jobs = jobs.filter(status=status)
-        
-    # ⚙️ Nuevo: filtrar por riesgo si fue seleccionado
-    if risk in {'NONE', 'LOW', 'MEDIUM', 'HIGH'}:
-        jobs = jobs.filter(risk_level=risk)
-        
+    # Filtro por estado y por nivel de riesgo
+    if filters["status"] in {'PENDING', 'RUNNING', 'DONE', 'ERROR', 'CANCELLED'}:
+        jobs = jobs.filter(status=filters["status"])
+    if filters["risk"] in {'NONE', 'LOW', 'MEDIUM', 'HIGH'}:
+        jobs = jobs.filter(risk_level=filters["risk"])
+
     # Filtro por fechas
-    df = parse_date(date_from) if date_from else None
-    dt = parse_date(date_to) if date_to else None
+    df = parse_date(filters["date_from"]) if filters["date_from"] else None
+    dt = parse_date(filters["date_to"]) if filters["date_to"] else None
     if df:
         jobs = jobs.filter(created_at__date__gte=df)
     if dt:
         jobs = jobs.filter(created_at__date__lte=dt)
+    return jobs, filters
+
+
+@login_required
+def historial(request):
+    """
+    Lista de AnalysisJob con filtros:
+    - q: busca por nombre de secuencia
+    - status: PENDING/RUNNING/DONE/ERROR/CANCELLED
+    - risk: NONE/LOW/MEDIUM/HIGH
+    - date_from, date_to: rango de fechas (YYYY-MM-DD)
+    - owner_scope: 'mine' (default) o 'all' (si is_staff)
+    Paginación: 10 por página
+    """
+    jobs, filters = _history_jobs(request)
+
+    # Total y página pedida en caché (versión global si el staff ve todo)
+    scope = GLOBAL_SCOPE if request.user.is_staff and filters["owner_scope"] == 'all' else request.user.pk
+    jobs = _CachedPages(jobs.only(
+        "created_at", "status", "identity_pct", "coverage_pct", "risk_level", "sequence__name"
+    ), scope, "historial", filters["q"], filters["status"], filters["risk"], filters["date_from"],
+        filters["date_to"])
 
     # Paginación
     paginator = Paginator(jobs, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    return render(request, "analisis/historial.html", {
-        "page_obj": page_obj,
-        "q": q,
-        "status": status,
-        "date_from": date_from,
-        "date_to": date_to,
-        "owner_scope": owner_scope,
-        "risk": risk, # 🔽 Nuevo
-    })
+    return render(request, "analisis/historial.html", {"page_obj": page_obj, **filters})
 
 
 @login_required
@@ -253,30 +431,7 @@ def export_historial_csv(request):
     """
     Exporta a CSV aplicando los mismos filtros del historial.
     """
-    q = request.GET.get('q', '').strip()
-    status = request.GET.get('status', '').strip().upper()
-    date_from = request.GET.get('date_from', '').strip()
-    date_to = request.GET.get('date_to', '').strip()
-    owner_scope = request.GET.get('owner_scope', 'mine')
-
-    jobs = AnalysisJob.objects.select_related('sequence').order_by('-created_at')
-    if request.user.is_staff and owner_scope == 'all':
-        pass
-    else:
-        jobs = jobs.filter(sequence__owner=request.user)
-
-    if q:
-        jobs = jobs.filter(Q(sequence__name__icontains=q) | Q(raw_summary__icontains=q))
-
-    if status in {'PENDING', 'RUNNING', 'DONE', 'ERROR'}:
-        jobs = jobs.filter(status=status)
-
-    df = parse_date(date_from) if date_from else None
-    dt = parse_date(date_to) if date_to else None
-    if df:
-        jobs = jobs.filter(created_at__date__gte=df)
-    if dt:
-        jobs = jobs.filter(created_at__date__lte=dt)
+    jobs, _ = _history_jobs(request)
 
     # Generar CSV
     response = HttpResponse(content_type='text/csv')
@@ -296,3 +451,77 @@ def export_historial_csv(request):
 
     return response
 
+
+
+# ---------- Vigilancia entre muestras (services.surveillance) ----------
+# owner_scope=all (solo staff) consulta todas las muestras; si no, las propias
+
+MAX_NEIGHBORS = 100
+
+
+def _surveillance_owner(request):
+    if request.user.is_staff and request.GET.get('owner_scope') == 'all':
+        return None
+    return request.user.pk
+
+
+@login_required
+def vigilancia_coocurrencia(request):
+    """Genes que aparecen junto a ?gene= en las mismas muestras (con índice de Jaccard)."""
+    gene = request.GET.get('gene', '').strip()
+    if not gene:
+        return JsonResponse({"error": "Falta el parámetro gene"}, status=400)
+    samples, genes = surveillance.co_occurrence(gene, owner=_surveillance_owner(request))
+    return JsonResponse({"gene": gene, "samples": samples, "co_occurring": genes})
+
+
+@login_required
+def vigilancia_serie(request):
+    """Muestras analizadas y muestras con ?gene= por período (?bucket=day|week|month|year)."""
+    gene = request.GET.get('gene', '').strip()
+    bucket = request.GET.get('bucket', 'month')
+    if not gene:
+        return JsonResponse({"error": "Falta el parámetro gene"}, status=400)
+    try:
+        series = surveillance.time_series(gene, bucket=bucket, owner=_surveillance_owner(request))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"gene": gene, "bucket": bucket, "series": series})
+
+
+@login_required
+def vigilancia_similares(request, pk):
+    """Muestras con el perfil de genes más parecido al de la secuencia (?k=, Jaccard)."""
+    seq = get_object_or_404(Sequence, pk=pk) if request.user.is_staff else \
+        get_object_or_404(Sequence, pk=pk, owner=request.user)
+    try:
+        k = min(max(int(request.GET.get('k', 10)), 1), MAX_NEIGHBORS)
+    except ValueError:
+        return JsonResponse({"error": "k debe ser un entero"}, status=400)
+    profile, neighbors = surveillance.nearest(seq.pk, k=k, owner=_surveillance_owner(request))
+    names = dict(Sequence.objects.filter(pk__in=[n["sample"] for n in neighbors]).values_list("pk", "name"))
+    for n in neighbors:
+        n["name"] = names.get(n["sample"], "")
+    return JsonResponse({"sequence": seq.pk, "profile": profile, "neighbors": neighbors})
+
+
+@login_required
+def export_columnar(request, what, fmt):
+    """
+    Exporta jobs (what=jobs) o genes detectados (what=hits) del historial,
+    con sus mismos filtros, en Parquet (fmt=parquet) o Arrow IPC (fmt=arrow).
+    El archivo se genera por lotes mientras se descarga (services.columnar).
+    """
+    if what not in EXPORTS or fmt not in COLUMNAR_FORMATS:
+        return HttpResponse(status=404)
+    columns, rows = EXPORTS[what]
+    try:
+        chunks = columnar_stream(rows(_history_jobs(request)[0]), columns, fmt)
+        first = next(chunks)  # valida pyarrow antes de responder
+    except ColumnarUnavailable as e:
+        messages.error(request, str(e))
+        return redirect("historial")
+    extension, content_type = COLUMNAR_FORMATS[fmt]
+    response = StreamingHttpResponse(itertools.chain([first], chunks), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="historial_{what}{extension}"'
+    return response
@@ -1,19 +1,37 @@
 """
 Detector de Genes de Resistencia Antimicrobiana (RAM)
 Aplicación web con Streamlit - MVP
+
+pandas y matplotlib se cargan al usarlos (y en segundo plano al arrancar,
+ver analisis.services.warmup): la primera página no espera por ellos.
 """
+from __future__ import annotations
 
-from Bio import pairwise2
-from Bio.pairwise2 import format_alignment
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Necesario para Streamlit Cloud
-import matplotlib.pyplot as plt
-from pathlib import Path
+import os
+os.environ.setdefault('MPLBACKEND', 'Agg')  # Necesario para Streamlit Cloud
 import time
 import random
 import io
 import streamlit as st
+from analisis.services.fasta_stream import parse_fasta_stream, FastaFormatError
+from analisis.services.fasta_index import FastaIndex, fetch_region, fetch_regions
+from analisis.services.contigs import iter_records
+from analisis.services.alignment import DEFAULT_MEMORY_MB
+from analisis.services.clustering import cluster_sequences
+from analisis.services.engine import BACKENDS, create_backend, load_reference
+from analisis.services.protein import ProteinIndex
+from analisis.services.resources import PeakRSS
+from analisis.services.seqstats import top_kmers
+from analisis.services.mutations import MutationPanel, DEMO_MUTATION_PANEL
+from analisis.services.priority import DEFAULT_PRIORITY_GENES, is_critical, is_priority, parse_panel, split_panel
+from analisis.services.reads import map_reads, FastqFormatError
+from analisis.constants import FASTQ_EXTENSIONS
+from analisis.services.compression import strip_compression_suffix
+from analisis.services.warmup import lazy_module, prewarm
+
+pd = lazy_module('pandas')
+plt = lazy_module('matplotlib.pyplot')
+
 # Configuración de la página
 st.set_page_config(
     page_title="Detector RAM",
@@ -22,7 +40,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-print("✓ Módulos importados correctamente")
+
+
+@st.cache_resource(show_spinner=False)
+def prewarm_dependencies():
+    """Una vez por proceso: importa en segundo plano lo que la primera página no necesita."""
+    return prewarm(('pandas', 'matplotlib.pyplot', 'analisis.services.alignment:load_pairwise2'))
+
+
+prewarm_dependencies()
 
 
 # ==================== BASE DE DATOS ====================
@@ -67,16 +93,59 @@ REF_DB = {
     }
 }
 
+
+@st.cache_resource(show_spinner=False)
+def reference_clusters(ref_items: tuple) -> dict:
+    """Agrupa la base de referencia por identidad: {gen: representante de su clúster}."""
+    return cluster_sequences(dict(ref_items))
+
+
+REF_CLUSTERS = reference_clusters(tuple((gene, data['seq']) for gene, data in REF_DB.items()))
+
+
+@st.cache_resource(show_spinner=False)
+def reference_protein_index(ref_items: tuple) -> ProteinIndex:
+    """Índice de k-mers de aminoácidos de la base de referencia traducida (modo aminoácidos)."""
+    # Con los clústeres del panel: un hit por clúster, como en nucleótidos
+    return ProteinIndex(load_reference({gene: {'seq': seq, 'antibiotic_class': abx} for gene, seq, abx in ref_items},
+                                       clusters=REF_CLUSTERS))
+
+# Panel de mutaciones puntuales (posiciones de codón con alelos resistentes)
+MUTATION_PANEL = MutationPanel(DEMO_MUTATION_PANEL)
+
 # ==================== FUNCIONES ====================
 
-def read_fasta_from_string(fasta_content: str) -> str:
-    """Lee contenido FASTA de un string y retorna secuencia concatenada."""
-    sequence = []
-    for line in fasta_content.split('\n'):
-        line = line.strip()
-        if not line.startswith('>') and line:
-            sequence.append(line.upper())
-    return ''.join(sequence)
+def read_fasta_from_string(fasta_content: str) -> list:
+    """
+    Lee contenido FASTA de un string y retorna [(id, secuencia), ...].
+    Los registros no se concatenan: unirlos crearía alineamientos falsos
+    entre contigs.
+    """
+    return list(iter_records(io.BytesIO(fasta_content.encode('utf-8'))))
+
+
+def read_fasta_upload(uploaded_file) -> dict:
+    """
+    Lee el archivo subido por bloques (descomprimiendo gzip/bz2/xz al vuelo):
+    valida el formato y calcula longitud, GC, N, número de registros y
+    SHA-256 en la misma pasada, junto con el índice .fai (stats["fai"]) y el
+    perfil de composición (stats["profile"]: ventanas de GC, GC-skew, k-mers).
+    La secuencia no se guarda: los contigs se leen de a uno al analizarlos.
+    Las estadísticas quedan en la sesión por archivo y por SHA-256, así los
+    reruns de Streamlit no vuelven a recorrer la secuencia.
+    Retorna las estadísticas.
+    """
+    by_file = st.session_state.setdefault('stats_by_file', {})
+    by_hash = st.session_state.setdefault('stats_by_hash', {})
+    file_key = getattr(uploaded_file, 'file_id', None)
+    if file_key in by_file:
+        return by_hash[by_file[file_key]]
+    uploaded_file.seek(0)
+    stats, _ = parse_fasta_stream(uploaded_file)
+    stats = by_hash.setdefault(stats['sha256'], stats)
+    if file_key is not None:
+        by_file[file_key] = stats['sha256']
+    return stats
 
 
 def make_demo_fasta(ref_db: dict, genome_len: int = 4000, n_inserts: int = 3) -> tuple:
@@ -102,60 +171,76 @@ def make_demo_fasta(ref_db: dict, genome_len: int = 4000, n_inserts: int = 3) ->
     return fasta_str, genes_to_insert
 
 
-def align_and_score(query: str, ref: str) -> dict:
-    """Alinea query vs ref y calcula métricas."""
-    alignments = pairwise2.align.localms(query, ref, 2, -1, -2, -1, one_alignment_only=True)
-    
-    if not alignments:
-        return {
-            'identity': 0.0,
-            'coverage': 0.0,
-            'start': -1,
-            'end': -1,
-            'alignment_length': 0
-        }
-    
-    best = alignments[0]
-    seq_a, seq_b, score, start, end = best
-    
-    matches = sum(1 for a, b in zip(seq_a[start:end], seq_b[start:end]) if a == b and a != '-')
-    alignment_length = end - start
-    
-    identity = matches / alignment_length if alignment_length > 0 else 0.0
-    coverage = alignment_length / len(ref) if len(ref) > 0 else 0.0
-    
-    return {
-        'identity': identity,
-        'coverage': coverage,
-        'start': start,
-        'end': end,
-        'alignment_length': alignment_length
-    }
-
-
-def detect_genes(query_seq: str, ref_db: dict, id_thr: float = 0.90, cov_thr: float = 0.80) -> pd.DataFrame:
-    """Detecta genes en query_seq."""
+def detect_genes(records, ref_db: dict, id_thr: float = 0.90, cov_thr: float = 0.80,
+                 n_records: int = 1, memory_mb: int = DEFAULT_MEMORY_MB,
+                 clusters: dict = None, protein_index: ProteinIndex = None,
+                 backend: str = "pairwise2", priority: tuple = ()) -> pd.DataFrame:
+    """
+    Detecta genes en cada registro de `records` ((id, secuencia), p. ej. de
+    iter_records) con un backend del motor de detección (el mismo que usa
+    Django): cada contig se busca por separado y los hits llevan su id.
+    memory_mb: presupuesto por alineamiento del backend pairwise2 (contigs
+    grandes se alinean por ventanas).
+    clusters: {gen: representante} (ver reference_clusters). Se busca primero
+    el representante y solo si se acerca a los umbrales se revisan los demás
+    alelos del clúster; se reporta el mejor. df.attrs['alignments'] cuenta
+    las búsquedas hechas.
+    protein_index: si se indica, búsqueda traducida en seis marcos (umbrales
+    sobre identidad y cobertura de la proteína); solo se alinean las
+    regiones con semillas de aminoácidos.
+    priority: familias de genes prioritarios (services.priority); en cada
+    contig se buscan antes que el resto y, si alguno supera los umbrales de
+    riesgo alto, la alerta se muestra en ese momento (df.attrs['time_to_alert']
+    guarda los segundos hasta la primera).
+    """
+    if protein_index is not None:
+        return detect_genes_translated(records, ref_db, protein_index, id_thr, cov_thr, n_records)
+    first, rest = split_panel(load_reference(ref_db, clusters=clusters), priority)
+    priority_detector, detector = [
+        create_backend(backend, genes, min_identity=id_thr, min_coverage=cov_thr, memory_mb=memory_mb)
+        if genes else None
+        for genes in (first, rest)
+    ]
+    detectors = [d for d in (priority_detector, detector) if d is not None]
     results = []
+    stats = {}
+    alerts = []
+    time_to_alert = None
     
+    alert_box = st.empty()
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    total_genes = len(ref_db)
-    for idx, (gene_name, gene_data) in enumerate(ref_db.items()):
-        status_text.text(f"Analizando {gene_name}...")
-        progress_bar.progress((idx + 1) / total_genes)
+    started = time.perf_counter()
+    total_steps = max(n_records, 1) * sum(len(d.groups) for d in detectors)
+    step = 0
+    for contig, query_seq in records:
+        status_text.text(f"Analizando {contig}...")
         
-        ref_seq = gene_data['seq']
-        metrics = align_and_score(query_seq, ref_seq)
+        def tick(gene, hit):
+            nonlocal step
+            step += 1
+            progress_bar.progress(min(step / total_steps, 1.0))
         
-        if metrics['identity'] >= id_thr and metrics['coverage'] >= cov_thr:
+        hits = (
+            (d, hit) for d in detectors for hit in d.search(query_seq, progress=tick, stats=stats)
+        )
+        for source_detector, hit in hits:
+            if source_detector is priority_detector and is_critical(hit):
+                if time_to_alert is None:
+                    time_to_alert = time.perf_counter() - started
+                alerts.append(f"{hit['gene']} ({contig})")
+                alert_box.error(f"🚨 **Alerta temprana — genes prioritarios:** {', '.join(alerts)} "
+                                f"a los {time_to_alert:.2f} s; el análisis continúa")
+            gene_data = ref_db[hit['gene']]
             results.append({
-                'gene': gene_name,
-                'identity': metrics['identity'],
-                'coverage': metrics['coverage'],
-                'start': metrics['start'],
-                'end': metrics['end'],
-                'length_ref': len(ref_seq),
+                'gene': hit['gene'],
+                'contig': contig,
+                'identity': hit['identity'] / 100,
+                'coverage': hit['coverage'] / 100,
+                'start': hit['start'],
+                'end': hit['end'],
+                'length_ref': len(gene_data['seq']),
                 'antibiotic_class': gene_data['antibiotic_class'],
                 'mechanism': gene_data['mechanism']
             })
@@ -166,10 +251,64 @@ def detect_genes(query_seq: str, ref_db: dict, id_thr: float = 0.90, cov_thr: fl
     df = pd.DataFrame(results)
     if not df.empty:
         df = df.sort_values(['identity', 'coverage'], ascending=False).reset_index(drop=True)
+    df.attrs['alignments'] = stats.get('searches', 0)
+    df.attrs['time_to_alert'] = time_to_alert
+    
+    return df
+
+
+def detect_genes_translated(records, ref_db: dict, protein_index: ProteinIndex, id_thr: float,
+                            cov_thr: float, n_records: int = 1) -> pd.DataFrame:
+    """Modo aminoácidos de detect_genes: cada contig se traduce en seis marcos."""
+    results = []
+    stats = {}
+    progress_bar = st.progress(0)
+    for i, (contig, query_seq) in enumerate(records, start=1):
+        for hit in protein_index.search(query_seq, id_thr, cov_thr, stats=stats):
+            gene_data = ref_db[hit['gene']]
+            results.append({
+                'gene': hit['gene'],
+                'contig': contig,
+                'identity': hit['identity'],
+                'coverage': hit['coverage'],
+                'start': hit['start'],
+                'end': hit['end'],
+                'frame': hit['frame'],
+                'length_ref': len(gene_data['seq']),
+                'antibiotic_class': gene_data['antibiotic_class'],
+                'mechanism': gene_data['mechanism']
+            })
+        progress_bar.progress(min(i / max(n_records, 1), 1.0))
+    progress_bar.empty()
     
+    df = pd.DataFrame(results)
+    if not df.empty:
+        df = df.sort_values(['identity', 'coverage'], ascending=False).reset_index(drop=True)
+    df.attrs['alignments'] = stats.get('alignments', 0)
     return df
 
 
+def detect_genes_from_reads(fastq_file, ref_db: dict, min_breadth: float = 0.80) -> tuple:
+    """
+    Modo lecturas: mapea un FASTQ (comprimido o no) por k-mers contra ref_db.
+    Retorna (total de lecturas, DataFrame con amplitud y profundidad por gen).
+    """
+    progress_text = st.empty()
+    total_reads, results = map_reads(
+        fastq_file,
+        {name: data['seq'] for name, data in ref_db.items()},
+        progress=lambda n: progress_text.text(f"Lecturas procesadas: {n:,}")
+    )
+    progress_text.empty()
+
+    rows = [
+        {**r, 'antibiotic_class': ref_db[r['gene']]['antibiotic_class'],
+         'mechanism': ref_db[r['gene']]['mechanism']}
+        for r in results if r['breadth'] >= min_breadth * 100
+    ]
+    return total_reads, pd.DataFrame(rows)
+
+
 def plot_by_class(df: pd.DataFrame):
     """Genera gráfico de barras por clase de antibiótico."""
     if df.empty:
@@ -227,6 +366,41 @@ with st.sidebar:
         help="Porcentaje del gen de referencia que debe estar presente"
     ) / 100
     
+    search_mode = st.radio(
+        "Modo de búsqueda",
+        ["Nucleótidos", "Aminoácidos (6 marcos)"],
+        help="Aminoácidos: traduce la secuencia en seis marcos; encuentra variantes sinónimas "
+             "y homólogos distantes sin bajar los umbrales"
+    )
+    detection_backend = st.selectbox(
+        "Motor de detección",
+        list(BACKENDS),
+        index=list(BACKENDS).index("pairwise2"),
+        format_func=lambda name: BACKENDS[name].label,
+        disabled=search_mode.startswith("Aminoácidos"),
+        help="Backend del motor compartido con la plataforma Django (solo búsqueda en nucleótidos)"
+    )
+    priority_panel = parse_panel(st.text_input(
+        "Genes prioritarios",
+        value=", ".join(DEFAULT_PRIORITY_GENES),
+        help="Familias (separadas por comas) que se buscan primero: si alguna supera identidad ≥ 90% "
+             "y cobertura ≥ 80% se alerta de inmediato, sin esperar al resto del panel"
+    ))
+    protein_index = None
+    if search_mode.startswith("Aminoácidos"):
+        protein_index = reference_protein_index(
+            tuple((gene, data['seq'], data['antibiotic_class']) for gene, data in REF_DB.items())
+        )
+    
+    align_memory_mb = st.number_input(
+        "Memoria por alineamiento (MB)",
+        min_value=16,
+        max_value=8192,
+        value=DEFAULT_MEMORY_MB,
+        step=16,
+        help="Los contigs grandes se alinean por ventanas solapadas que caben en este presupuesto"
+    )
+    
     st.markdown("---")
     st.caption("💡 **Nota**: Secuencias de referencia son dummy para demostración")
 
@@ -241,41 +415,91 @@ with tab1:
     with col1:
         uploaded_file = st.file_uploader(
             "Sube tu archivo FASTA",
-            type=['fasta', 'fa', 'fna', 'txt'],
-            help="Archivo con secuencia(s) en formato FASTA"
+            type=['fasta', 'fa', 'fna', 'txt', 'fastq', 'fq', 'gz', 'bz2', 'xz'],
+            help="Archivo con secuencia(s) en formato FASTA, o lecturas FASTQ (se aceptan comprimidos gzip/bz2/xz)"
         )
     
     with col2:
         st.markdown("**O usa datos demo:**")
         use_demo = st.button("🎲 Generar secuencia demo", use_container_width=True)
     
+    is_reads = (uploaded_file is not None and not use_demo
+                and strip_compression_suffix(uploaded_file.name).lower().endswith(FASTQ_EXTENSIONS))
+    
+    # Modo lecturas (FASTQ): mapeo por k-mers sin ensamblar
+    if is_reads:
+        st.success(f"✅ Lecturas cargadas: {uploaded_file.name}")
+        st.caption(f"Amplitud mínima de cobertura: {coverage_threshold*100:.0f}% (umbral de cobertura)")
+        
+        if st.button("🔬 **MAPEAR LECTURAS**", type="primary", use_container_width=True):
+            start_time = time.time()
+            try:
+                with st.spinner("Mapeando lecturas..."):
+                    total_reads, reads_df = detect_genes_from_reads(uploaded_file, REF_DB, coverage_threshold)
+            except FastqFormatError as e:
+                st.error(f"❌ FASTQ no válido: {e}")
+                st.stop()
+            elapsed = time.time() - start_time
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Lecturas", f"{total_reads:,}")
+            with col2:
+                st.metric("Genes detectados", len(reads_df))
+            with col3:
+                st.metric("Tiempo", f"{elapsed:.2f}s")
+            
+            if reads_df.empty:
+                st.warning("❌ Ningún gen alcanzó la amplitud de cobertura mínima")
+            else:
+                st.dataframe(reads_df, use_container_width=True, hide_index=True)
+    
     # Procesamiento
-    if uploaded_file is not None or use_demo:
+    elif uploaded_file is not None or use_demo:
         
         if use_demo:
             st.info("🔄 Generando secuencia demo con genes insertados...")
             fasta_content, inserted_genes = make_demo_fasta(REF_DB, genome_len=4000, n_inserts=3)
             st.success(f"✅ Demo generado con: {', '.join(inserted_genes)}")
+            fasta_source = io.BytesIO(fasta_content.encode('utf-8'))
         else:
-            fasta_content = uploaded_file.read().decode('utf-8')
-            st.success(f"✅ Archivo cargado: {uploaded_file.name}")
+            fasta_source = uploaded_file
         
-        # Leer secuencia
-        query_seq = read_fasta_from_string(fasta_content)
+        # Validación y métricas en una sola pasada (sin retener la secuencia)
+        try:
+            seq_stats = read_fasta_upload(fasta_source)
+        except FastaFormatError as e:
+            st.error(f"❌ FASTA no válido: {e}")
+            st.stop()
+        if not use_demo:
+            st.success(f"✅ Archivo cargado: {uploaded_file.name} ({seq_stats['records']} registro(s))")
         
         # Mostrar info de secuencia
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Longitud", f"{len(query_seq):,} nt")
+            st.metric("Longitud", f"{seq_stats['length']:,} nt")
         with col2:
-            gc_content = (query_seq.count('G') + query_seq.count('C')) / len(query_seq) * 100
-            st.metric("GC%", f"{gc_content:.1f}%")
+            st.metric("GC%", f"{seq_stats['gc_pct']:.1f}%")
         with col3:
             st.metric("Umbrales", f"ID≥{identity_threshold*100:.0f}% COV≥{coverage_threshold*100:.0f}%")
         
-        # Vista previa
+        # Composición (calculada en la misma lectura de validación)
+        profile = seq_stats['profile']
+        with st.expander("📊 Composición de la secuencia"):
+            st.write(f"**N:** {profile['n_count']:,} | **Ambiguas (IUPAC):** {profile['ambiguous_count']:,}")
+            st.caption(f"GC % y GC-skew por ventana de {profile['window_size']:,} bp")
+            st.line_chart(pd.DataFrame({'GC %': profile['gc_profile']}))
+            st.line_chart(pd.DataFrame({'GC-skew': profile['gc_skew']}))
+            st.dataframe(
+                pd.DataFrame(top_kmers(profile['kmer_counts'], profile['kmer_k']), columns=[f"{profile['kmer_k']}-mer", 'conteo']),
+                hide_index=True
+            )
+        
+        # Vista previa: un seek en el archivo gracias al índice .fai
+        fasta_index = FastaIndex.from_fai(seq_stats['fai']) if seq_stats['fai'] else None
         with st.expander("🔍 Vista previa de la secuencia"):
-            st.code(query_seq[:500] + "..." if len(query_seq) > 500 else query_seq)
+            preview = fetch_region(fasta_source, fasta_index, None, 0, 500)
+            st.code(preview + "..." if seq_stats['length'] > 500 else preview)
         
         st.markdown("---")
         
@@ -284,14 +508,21 @@ with tab1:
             
             start_time = time.time()
             
-            with st.spinner("Analizando secuencia..."):
-                results_df = detect_genes(query_seq, REF_DB, identity_threshold, coverage_threshold)
+            with st.spinner("Analizando secuencia..."), PeakRSS() as peak_rss:
+                results_df = detect_genes(iter_records(fasta_source), REF_DB, identity_threshold,
+                                          coverage_threshold, n_records=seq_stats['records'],
+                                          memory_mb=align_memory_mb, clusters=REF_CLUSTERS,
+                                          protein_index=protein_index, backend=detection_backend,
+                                          priority=priority_panel)
             
             elapsed = time.time() - start_time
             
             # Resultados
             st.markdown("---")
             st.header("📊 Resultados")
+            st.caption(f"Memoria pico (RSS): {peak_rss.kb / 1024:.1f} MB | "
+                       f"Búsquedas: {results_df.attrs.get('alignments', 0)} "
+                       f"({len(REF_DB)} genes en {len(set(REF_CLUSTERS.values()))} clústeres)")
             
             if results_df.empty:
                 st.warning("❌ No se detectaron genes que cumplan los umbrales especificados")
@@ -338,15 +569,60 @@ with tab1:
                     mime="text/csv",
                     use_container_width=True
                 )
+
+                # Parquet (pyarrow viene con streamlit): tipos y columnas listos para pandas
+                parquet = io.BytesIO()
+                results_df.to_parquet(parquet, index=False)
+                st.download_button(
+                    label="💾 Descargar resultados (Parquet)",
+                    data=parquet.getvalue(),
+                    file_name=f"ram_results_{time.strftime('%Y%m%d_%H%M%S')}.parquet",
+                    mime="application/vnd.apache.parquet",
+                    use_container_width=True
+                )
+                
+                # Secuencias de los hits, leídas por tramo desde el archivo
+                hit_seqs = fetch_regions(
+                    fasta_source, fasta_index,
+                    [(r.contig, int(r.start), int(r.end)) for r in results_df.itertuples()]
+                )
+                st.download_button(
+                    label="🧬 Descargar secuencias de los hits (FASTA)",
+                    data="".join(
+                        f">{r.gene} region={r.contig}:{r.start + 1}-{r.end}\n{s}\n"
+                        for r, s in zip(results_df.itertuples(), hit_seqs)
+                    ),
+                    file_name=f"ram_hits_{time.strftime('%Y%m%d_%H%M%S')}.fasta",
+                    mime="text/x-fasta",
+                    use_container_width=True
+                )
                 
                 # Genes prioritarios
-                priority_genes = ['blaNDM', 'blaKPC', 'mcr-1']
-                detected_priority = results_df[results_df['gene'].isin(priority_genes)]
+                detected_priority = results_df[results_df['gene'].map(lambda g: is_priority(g, priority_panel))]
                 
                 if not detected_priority.empty:
                     st.markdown("---")
                     st.error("⚠️ **ALERTA: Genes prioritarios detectados**")
+                    if results_df.attrs.get('time_to_alert') is not None:
+                        st.caption(f"⏱ Tiempo hasta la alerta: {results_df.attrs['time_to_alert']:.2f} s "
+                                   f"(análisis completo: {elapsed:.2f} s)")
                     st.dataframe(detected_priority[['gene', 'antibiotic_class']], hide_index=True)
+            
+            # Mutaciones puntuales: cada gen diana se ubica una vez y se
+            # revisan todas sus posiciones del panel
+            mutation_hits = [
+                {**m, 'contig': contig}
+                for contig, query_seq in iter_records(fasta_source)
+                for m in MUTATION_PANEL.scan(query_seq) if m['resistant']
+            ]
+            if mutation_hits:
+                st.markdown("---")
+                st.subheader("🧪 Mutaciones puntuales de resistencia")
+                st.dataframe(
+                    pd.DataFrame(mutation_hits)[['gene', 'mutation', 'identity', 'contig', 'start', 'strand', 'class']],
+                    use_container_width=True,
+                    hide_index=True
+                )
 
 with tab2:
     st.header("ℹ️ Información del sistema")
@@ -357,7 +633,8 @@ with tab2:
     mediante alineamiento local contra una base de datos de referencia.
     
     ### 🔬 Metodología
-    1. **Alineamiento**: Se usa `Bio.pairwise2` (algoritmo Smith-Waterman local)
+    1. **Alineamiento**: motor de detección compartido con la plataforma Django; por defecto
+       `Bio.pairwise2` (Smith-Waterman local), o k-mer exacto, Aho-Corasick y Smith-Waterman en banda
     2. **Métricas calculadas**:
        - **Identidad**: % de bases coincidentes en la región alineada
        - **Cobertura**: % del gen de referencia presente en la secuencia query
@@ -369,7 +646,7 @@ with tab2:
     
     ### ⚡ Limitaciones del MVP
     - ⚠️ Secuencias de referencia son **ejemplos ficticios**
-    - ⚠️ No detecta mutaciones puntuales (excepto gyrA_S83L como ejemplo)
+    - ⚠️ Mutaciones puntuales: solo el panel de ejemplo (gyrA S83/D87, parC S80/E84)
     - ⚠️ Sensibilidad limitada a variantes alélicas
     
     ### 🚀 Próxima versión
@@ -402,13 +679,16 @@ with tab3:
     if st.button("🎲 Generar y analizar demo", type="primary"):
         with st.spinner("Generando secuencia demo..."):
             fasta_demo, genes_inserted = make_demo_fasta(REF_DB, demo_length, demo_inserts)
-            query_demo = read_fasta_from_string(fasta_demo)
+            demo_records = read_fasta_from_string(fasta_demo)
         
-        st.success(f"✅ Secuencia generada: {len(query_demo)} nt")
+        st.success(f"✅ Secuencia generada: {sum(len(s) for _, s in demo_records)} nt")
         st.info(f"🧬 Genes insertados: **{', '.join(genes_inserted)}**")
         
         with st.spinner("Analizando..."):
-            demo_results = detect_genes(query_demo, REF_DB, identity_threshold, coverage_threshold)
+            demo_results = detect_genes(demo_records, REF_DB, identity_threshold, coverage_threshold,
+                                        n_records=len(demo_records), memory_mb=align_memory_mb,
+                                        clusters=REF_CLUSTERS, protein_index=protein_index,
+                                        backend=detection_backend, priority=priority_panel)
         
         if not demo_results.empty:
             st.success(f"✅ Detectados {len(demo_results)} genes")
@@ -74,10 +74,40 @@ WSGI_APPLICATION = 'plataforma_bioinfo.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# SQLite en modo concurrente: WAL (lectores no bloquean al escritor),
+# transacciones IMMEDIATE (el bloqueo de escritura se toma al inicio y no al
+# promover una lectura, que fallaría sin esperar) y espera ante bloqueos.
+SQLITE_BUSY_TIMEOUT = int(os.environ.get("RAM_SQLITE_BUSY_TIMEOUT", 20))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000};'
+                'PRAGMA temp_store=MEMORY;'
+                'PRAGMA cache_size=-20000;'
+                'PRAGMA mmap_size=134217728;'
+            ),
+        },
+    }
+}
+
+
+# Caché de vistas por usuario (analisis.services.view_cache). Por defecto en
+# memoria del proceso; con varios procesos usar el backend de archivos:
+# RAM_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# RAM_CACHE_LOCATION=/ruta/al/directorio
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get("RAM_CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get("RAM_CACHE_LOCATION", 'ram-views'),
+        'TIMEOUT': int(os.environ.get("RAM_CACHE_TIMEOUT", 300)),
     }
 }
 
@@ -129,4 +159,65 @@ MESSAGE_TAGS = {
     messages.SUCCESS: 'success',
     messages.WARNING: 'warning',
     messages.ERROR: 'danger',
-}
\ No newline at end of file
+}
+
+# Modo lecturas (FASTQ): procesos para mapear bloques de lecturas en paralelo
+RAM_READS_WORKERS = int(os.environ.get("RAM_READS_WORKERS", os.cpu_count() or 1))
+
+# Ensamblados multi-registro: procesos para analizar lotes de contigs en paralelo
+RAM_CONTIG_WORKERS = int(os.environ.get("RAM_CONTIG_WORKERS", os.cpu_count() or 1))
+
+# Hilos que ejecutan análisis encolados desde la API (analisis.services.jobs.submit_job)
+RAM_JOB_WORKERS = int(os.environ.get("RAM_JOB_WORKERS", 2))
+
+# Reparto de esos hilos entre usuarios (analisis.services.scheduler): hilos
+# que un usuario puede ocupar a la vez cuando otros esperan (por defecto deja
+# uno para los demás; sin nadie más en cola usa también los libres, así que
+# el límite es blando: quien llega espera a que termine una tarea) y
+# segundos de espera tras los que un job cuenta como la mitad de su costo
+# (los grandes no quedan postergados indefinidamente)
+RAM_JOB_USER_LIMIT = int(os.environ.get("RAM_JOB_USER_LIMIT", max(1, RAM_JOB_WORKERS - 1)))
+RAM_JOB_AGING_SECONDS = int(os.environ.get("RAM_JOB_AGING_SECONDS", 600))
+
+# Presupuestos por job (segundos): tiempo de reloj y CPU (hilo del job más los
+# procesos del pool); 0 desactiva el límite. Ver analisis.services.budget
+RAM_JOB_WALL_SECONDS = int(os.environ.get("RAM_JOB_WALL_SECONDS", 3600))
+RAM_JOB_CPU_SECONDS = int(os.environ.get("RAM_JOB_CPU_SECONDS", 4 * 3600))
+
+# Recuperación de jobs colgados (analisis.services.reaper): RUNNING sin latido
+# durante este tiempo se reencolan hasta RAM_JOB_MAX_ATTEMPTS intentos. El
+# pool de análisis la ejecuta cada RAM_JOB_REAP_SECONDS; con 0 solo con
+# `python manage.py reap_jobs` (p. ej. desde cron)
+RAM_JOB_STALE_SECONDS = int(os.environ.get("RAM_JOB_STALE_SECONDS", 600))
+RAM_JOB_MAX_ATTEMPTS = int(os.environ.get("RAM_JOB_MAX_ATTEMPTS", 2))
+RAM_JOB_REAP_SECONDS = int(os.environ.get("RAM_JOB_REAP_SECONDS", 60))
+# Jobs PENDING que llevan más de estos segundos sin estar en la cola del
+# proceso (p. ej. encolados antes de un reinicio) se vuelven a encolar
+RAM_JOB_RESUBMIT_SECONDS = int(os.environ.get("RAM_JOB_RESUBMIT_SECONDS", 30))
+
+# Dependencias pesadas que se importan en segundo plano al arrancar (el
+# primer PDF o análisis no paga su carga); RAM_PREWARM=0 lo desactiva
+RAM_PREWARM = os.environ.get("RAM_PREWARM", "1") != "0"
+RAM_PREWARM_MODULES = ("xhtml2pdf.pisa", "analisis.services.analyzers", "analisis.services.alignment:load_pairwise2",
+                       "analisis.services.protein:blosum62")
+
+# Matriz de presencia de genes entre muestras (analisis.services.surveillance):
+# archivo donde se guarda y segundos mínimos entre escrituras
+RAM_PRESENCE_PATH = os.environ.get("RAM_PRESENCE_PATH", str(BASE_DIR / "presence.npz"))
+RAM_PRESENCE_SAVE_SECONDS = int(os.environ.get("RAM_PRESENCE_SAVE_SECONDS", 30))
+
+# Genes prioritarios (familias, separadas por comas) que se buscan antes que el
+# resto del panel para emitir la alerta de riesgo alto apenas aparecen
+# (analisis.services.priority); vacío desactiva el carril rápido
+RAM_PRIORITY_GENES = tuple(g.strip() for g in os.environ.get("RAM_PRIORITY_GENES", "blaNDM,blaKPC,mcr-1").split(",")
+                           if g.strip())
+
+# Máximo (MB) del cuerpo crudo de POST /api/v1/jobs/ (analisis.api), que se
+# copia a disco por bloques; más grande responde 413. 0 desactiva el límite
+RAM_API_UPLOAD_MAX_MB = int(os.environ.get("RAM_API_UPLOAD_MAX_MB", 2048))
+
+# Memoización de búsquedas por (huella del archivo, gen y versión, parámetros)
+# (analisis.services.memo): re-analizar la misma secuencia solo busca los genes
+# nuevos o modificados; la tabla se limita a RAM_MEMO_MAX_MB (LRU)
+RAM_ALIGNMENT_MEMO = os.environ.get("RAM_ALIGNMENT_MEMO", "1") != "0"
+RAM_MEMO_MAX_MB = int(os.environ.get("RAM_MEMO_MAX_MB", 256))
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'plataforma_bioinfo.settings')
 
 application = get_wsgi_application()
+
+# Arranca el pool de análisis con su reaper, que retoma los jobs PENDING o
+# abandonados de antes del reinicio (analisis.services.reaper)
+from analisis.services.jobs import scheduler  # noqa: E402
+
+scheduler()